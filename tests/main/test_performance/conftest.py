@@ -0,0 +1,69 @@
+import pytest
+
+# Small chain of convolutional layers. Layers 1 and 2 are equivalent for the mapping search.
+WORKLOAD = """
+- id: 0
+  operator_type: Conv
+  equation: O[b][k][oy][ox]+=W[k][c][fy][fx]*I[b][c][iy][ix]
+  dimension_relations: [ix=1*ox+1*fx, iy=1*oy+1*fy]
+  loop_dims: [B, K, C, OY, OX, FY, FX]
+  loop_sizes: [1, 16, 8, 8, 8, 3, 3]
+  operand_precision:
+    W: 8
+    I: 8
+    O: 16
+    O_final: 8
+  operand_source:
+    I: 0
+    W: 0
+- id: 1
+  operator_type: Conv
+  equation: O[b][k][oy][ox]+=W[k][c][fy][fx]*I[b][c][iy][ix]
+  dimension_relations: [ix=1*ox+1*fx, iy=1*oy+1*fy]
+  loop_dims: [B, K, C, OY, OX, FY, FX]
+  loop_sizes: [1, 16, 16, 8, 8, 3, 3]
+  operand_precision:
+    W: 8
+    I: 8
+    O: 16
+    O_final: 8
+  operand_source:
+    I: 0
+    W: 1
+- id: 2
+  operator_type: Conv
+  equation: O[b][k][oy][ox]+=W[k][c][fy][fx]*I[b][c][iy][ix]
+  dimension_relations: [ix=1*ox+1*fx, iy=1*oy+1*fy]
+  loop_dims: [B, K, C, OY, OX, FY, FX]
+  loop_sizes: [1, 16, 16, 8, 8, 3, 3]
+  operand_precision:
+    W: 8
+    I: 8
+    O: 16
+    O_final: 8
+  operand_source:
+    I: 1
+    W: 2
+"""
+
+
+@pytest.fixture
+def workload(tmp_path) -> str:  # type: ignore
+    path = tmp_path / "workload.yaml"
+    path.write_text(WORKLOAD)
+    return str(path)
+
+
+@pytest.fixture
+def accelerator() -> str:
+    return "zigzag/inputs/hardware/tpu_like.yaml"
+
+
+@pytest.fixture
+def mapping() -> str:
+    return "zigzag/inputs/mapping/tpu_like.yaml"
+
+
+@pytest.fixture
+def dump_folder(tmp_path) -> str:  # type: ignore
+    return str(tmp_path / "outputs")
@@ -0,0 +1,72 @@
+import glob
+from copy import deepcopy
+
+import pytest
+from cerberus import Validator
+
+from zigzag.parser.accelerator_validator import AcceleratorValidator
+from zigzag.parser.compiled_schema import CompiledSchema
+from zigzag.stages.parser.accelerator_parser import AcceleratorParseCache
+from zigzag.utils import open_yaml
+
+ACCELERATOR_FILES = sorted(glob.glob("zigzag/inputs/hardware/**/*.yaml", recursive=True))
+
+
+def test_parse_cache_returns_independent_copies(accelerator: str, tmp_path):  # type: ignore # pylint: disable=W0621
+    path = tmp_path / "accelerator.yaml"
+    with open(accelerator, encoding="utf-8") as f:
+        content = f.read()
+    path.write_text(content)
+    parse_cache = AcceleratorParseCache()
+
+    first = parse_cache.get(str(path))
+    second = parse_cache.get(str(path))
+    assert len(parse_cache.accelerators) == 1
+    assert first is not second
+    first_memory = first.memory_hierarchy.mem_level_list[0].memory_instance
+    second_memory = second.memory_hierarchy.mem_level_list[0].memory_instance
+    assert first_memory is not second_memory
+    first_memory.update_size(2 * first_memory.size)
+    assert parse_cache.get(str(path)).memory_hierarchy.mem_level_list[0].memory_instance.size == second_memory.size
+
+    # A modified file is parsed again
+    path.write_text(content.replace(f"name: {first.name}", "name: modified_accelerator"))
+    assert parse_cache.get(str(path)).name == "modified_accelerator"
+    assert len(parse_cache.accelerators) == 2
+
+
+@pytest.mark.parametrize("accelerator_file", ACCELERATOR_FILES)
+def test_compiled_schema_matches_cerberus(accelerator_file: str):
+    data = open_yaml(accelerator_file)
+    validator = Validator()
+    validator.schema = AcceleratorValidator.SCHEMA  # type: ignore
+    expected = validator.normalized(deepcopy(data))  # type: ignore
+    if not validator.validate(expected):  # type: ignore
+        # Accelerators that do not pass the schema are rejected by the compiled schema as well
+        assert CompiledSchema(AcceleratorValidator.SCHEMA).normalize(deepcopy(data)) is None
+        return
+
+    normalized = CompiledSchema(AcceleratorValidator.SCHEMA).normalize(deepcopy(data))
+    assert normalized == expected
+    # Including the order of the (default) keys
+    assert list(normalized) == list(expected)  # type: ignore
+    assert [list(memory) for memory in normalized["memories"].values()] == [  # type: ignore
+        list(memory) for memory in expected["memories"].values()  # type: ignore
+    ]
+
+
+def test_compiled_schema_misses_invalid_data(accelerator: str):  # pylint: disable=W0621
+    compiled_schema = CompiledSchema(AcceleratorValidator.SCHEMA)
+    data = open_yaml(accelerator)
+
+    invalid_type = deepcopy(data)
+    invalid_type["operational_array"]["sizes"] = "32, 32"
+    missing_field = deepcopy(data)
+    del missing_field["name"]
+    unknown_field = deepcopy(data)
+    unknown_field["unknown"] = 1
+    for invalid_data in (invalid_type, missing_field, unknown_field):
+        assert compiled_schema.normalize(invalid_data) is None
+        validator = Validator()
+        validator.schema = AcceleratorValidator.SCHEMA  # type: ignore
+        assert not validator.validate(validator.normalized(invalid_data))  # type: ignore
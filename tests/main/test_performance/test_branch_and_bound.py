@@ -0,0 +1,30 @@
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+
+
+@pytest.mark.parametrize("lpf_limit", [4, 6])
+def test_branch_and_bound_finds_minimal_energy(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, lpf_limit: int
+):  # pylint: disable=W0621
+    energy, latency, cmes = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, opt="energy", lpf_limit=lpf_limit, dump_folder=dump_folder
+    )
+    bnb_energy, bnb_latency, bnb_cmes = get_hardware_performance_zigzag(
+        workload,
+        accelerator,
+        mapping,
+        opt="energy",
+        lpf_limit=lpf_limit,
+        dump_folder=dump_folder,
+        loma_branch_and_bound=True,
+    )
+    assert bnb_energy == pytest.approx(energy)
+    assert bnb_latency == pytest.approx(latency)
+    for (cme, _), (bnb_cme, _) in zip(cmes[0][1], bnb_cmes[0][1]):
+        assert bnb_cme.energy_total == pytest.approx(cme.energy_total)
+
+
+def test_branch_and_bound_requires_energy(workload: str, accelerator: str, mapping: str):  # pylint: disable=W0621
+    with pytest.raises(ValueError):
+        get_hardware_performance_zigzag(workload, accelerator, mapping, opt="latency", loma_branch_and_bound=True)
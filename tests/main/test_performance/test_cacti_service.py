@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from zigzag.hardware.architecture import get_cacti_cost
+from zigzag.hardware.architecture.get_cacti_cost import CactiCost, CactiService
+
+
+class CountingCactiService(CactiService):
+    """! CACTI service that derives the costs from the request instead of running CACTI, and counts the runs"""
+
+    def __init__(self, cacti_path: str, cache_path: str | None = None, run_time: float = 0.0):
+        super().__init__(cacti_path, cache_path)
+        self.run_time = run_time
+        self.nb_runs: dict[tuple[float, str, float, float], int] = {}
+        self.nb_runs_lock = threading.Lock()
+        self.fail = False
+
+    def run_cacti(self, tech_node: float, mem_type: str, mem_size_in_byte: float, bw: float) -> CactiCost:
+        request = (tech_node, mem_type, mem_size_in_byte, bw)
+        with self.nb_runs_lock:
+            self.nb_runs[request] = self.nb_runs.get(request, 0) + 1
+        time.sleep(self.run_time)
+        if self.fail:
+            raise ChildProcessError("CACTI failed")
+        return tech_node, mem_size_in_byte / 1024, bw / 8, bw / 4
+
+
+def test_cache_key(tmp_path, monkeypatch):  # pylint: disable=W0621
+    service = CountingCactiService(str(tmp_path / "cacti"))
+    key = service.get_key(0.028, "sram", 1024, 64)
+    # Equal numbers give the same key, whatever their type
+    assert service.get_key(0.028, "sram", 1024.0, 64.0) == key
+    assert service.get_key(0.028, "dram", 1024, 64) != key
+    assert service.get_key(0.028, "sram", 2048, 64) != key
+    assert service.get_key(0.028, "sram", 1024, 128) != key
+    assert service.get_key(0.045, "sram", 1024, 64) != key
+
+    # Results of another CACTI binary or version of the cost derivation are never reused
+    (tmp_path / "cacti" / "cacti").write_bytes(b"binary")
+    other_binary_service = CountingCactiService(str(tmp_path / "cacti"))
+    assert other_binary_service.get_key(0.028, "sram", 1024, 64) != key
+    monkeypatch.setattr(get_cacti_cost, "CACTI_COST_CACHE_VERSION", "test")
+    other_version_service = CountingCactiService(str(tmp_path / "cacti"))
+    assert other_version_service.get_key(0.028, "sram", 1024, 64) not in (
+        key,
+        other_binary_service.get_key(0.028, "sram", 1024, 64),
+    )
+
+
+def test_repeated_lookups(tmp_path):  # pylint: disable=W0621
+    service = CountingCactiService(str(tmp_path / "cacti"))
+    cost = service.get_cost(0.028, "sram", 1024, 64)
+    assert service.get_cost(0.028, "sram", 1024.0, 64.0) == cost
+    assert service.nb_runs == {(0.028, "sram", 1024, 64): 1}
+
+    # The results persist across services that share the cache
+    other_service = CountingCactiService(str(tmp_path / "cacti"))
+    assert other_service.cache_path == service.cache_path
+    assert other_service.get_cost(0.028, "sram", 1024, 64) == cost
+    assert not other_service.nb_runs
+
+    # Failed runs are not cached
+    other_service.fail = True
+    with pytest.raises(ChildProcessError):
+        other_service.get_cost(0.028, "sram", 2048, 64)
+    with pytest.raises(ChildProcessError):
+        other_service.get_cost(0.028, "sram", 2048, 64)
+    assert other_service.nb_runs == {(0.028, "sram", 2048, 64): 2}
+    assert not other_service.in_flight
+
+
+def test_concurrent_lookups(tmp_path):  # pylint: disable=W0621
+    service = CountingCactiService(str(tmp_path / "cacti"), run_time=0.2)
+    requests = [(0.028, "sram", size, bw) for size in (1024, 2048) for bw in (64, 128)]
+    costs = service.get_costs(4 * requests, max_workers=16)
+
+    # Identical requests that are in flight are only simulated once
+    assert service.nb_runs == {request: 1 for request in requests}
+    assert costs == [service.get_cost(*request) for request in 4 * requests]
+    assert service.nb_runs == {request: 1 for request in requests}
+    assert not service.in_flight
+
+    # Concurrent callers of a failing run all get the error
+    service.fail = True
+    errors: list[BaseException] = []
+
+    def get_failing_cost():
+        try:
+            service.get_cost(0.028, "sram", 4096, 64)
+        except ChildProcessError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=get_failing_cost) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 4
+    assert service.nb_runs[(0.028, "sram", 4096, 64)] == 1
+    assert not service.in_flight
@@ -0,0 +1,74 @@
+import pickle
+
+import pytest
+
+from zigzag.cost_model.cme_summary import CMESummary
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.results.reduce_stages import MinimalEnergyStage, SumStage
+from zigzag.stages.results.save import PickleSaveStage
+from zigzag.stages.workload_iterator import WorkloadStage
+
+
+def assert_same_results(summary: CMESummary, cme: CostModelEvaluation):
+    assert summary.energy_total == pytest.approx(cme.energy_total)
+    assert summary.mem_energy == pytest.approx(cme.mem_energy)
+    assert summary.latency_total2 == pytest.approx(cme.latency_total2)
+    assert summary.mac_utilization2 == pytest.approx(cme.mac_utilization2)
+    for layer_op, energies in cme.mem_energy_breakdown.items():
+        assert summary.mem_energy_breakdown[layer_op] == pytest.approx(tuple(energies))
+
+
+def test_cme_summaries_rebuild(
+    workload: str, accelerator: str, mapping: str, dump_folder: str
+):  # pylint: disable=W0621
+    pickle_filename = f"{dump_folder}/list_of_cmes.pickle"
+    mainstage = MainStage(
+        [
+            WorkloadParserStage,
+            AcceleratorParserStage,
+            PickleSaveStage,
+            SumStage,
+            WorkloadStage,
+            MinimalEnergyStage,
+            SpatialMappingGeneratorStage,
+            TemporalMappingGeneratorStage,
+            CostModelStage,
+        ],
+        accelerator=accelerator,
+        workload=workload,
+        mapping=mapping,
+        pickle_filename=pickle_filename,
+        pickle_summaries=True,
+        reduce_minimal_keep_others=True,
+        reduce_keep_summaries=True,
+        loma_lpf_limit=4,
+        nb_mappings_generated=2,
+        access_same_data_considered_as_no_access=True,
+    )
+    cmes = mainstage.run()
+    layer_cmes = [cme for cme, _ in cmes[0][1]]
+
+    for best_cme, (_, other_cmes) in cmes[0][1]:
+        summaries = [summary for summary, _ in other_cmes]
+        assert all(isinstance(summary, CMESummary) for summary in summaries)
+        assert min(summary.energy_total for summary in summaries) == pytest.approx(best_cme.energy_total)
+        for summary in summaries[:: max(1, len(summaries) // 10)]:
+            assert summary.layer is best_cme.layer
+            assert_same_results(summary, summary.get_cme())
+
+    # The pickled summaries are rebuilt on the unpickled accelerator and layer
+    with open(pickle_filename, "rb") as handle:
+        pickled_summaries = pickle.load(handle)
+    assert len(pickled_summaries) == len(layer_cmes)
+    for summary, cme in zip(pickled_summaries, layer_cmes):
+        assert isinstance(summary, CMESummary)
+        assert_same_results(summary, cme)
+        rebuilt_cme = summary.get_cme()
+        assert rebuilt_cme.layer.id == cme.layer.id
+        assert_same_results(summary, rebuilt_cme)
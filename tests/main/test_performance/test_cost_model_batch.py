@@ -0,0 +1,127 @@
+from typing import Any
+
+import pytest
+
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.cost_model.cost_model_batch import evaluate_temporal_mappings
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.results.reduce_stages import MinimalEDPStage, MinimalEnergyStage, MinimalLatencyStage
+from zigzag.stages.stage import Stage, StageCallable
+from zigzag.stages.workload_iterator import WorkloadStage
+
+MINIMAL_STAGES: dict[str, StageCallable] = {
+    "energy": MinimalEnergyStage,
+    "latency": MinimalLatencyStage,
+    "EDP": MinimalEDPStage,
+}
+
+
+class ReplayStage(Stage):
+    """! Leaf stage that yields the given CMEs"""
+
+    def __init__(self, list_of_callables: list[StageCallable], *, cmes: list[CostModelEvaluation], **kwargs: Any):
+        super().__init__(list_of_callables, **kwargs)
+        self.cmes = cmes
+
+    def run(self):
+        for cme in self.cmes:
+            yield cme, None
+
+    def is_leaf(self) -> bool:
+        return True
+
+
+def get_cmes_per_layer(workload: str, accelerator: str, mapping: str) -> list[list[CostModelEvaluation]]:
+    """! All CMEs evaluated by the mapping search of every layer, for a single spatial mapping per layer"""
+    mainstage = MainStage(
+        [
+            WorkloadParserStage,
+            AcceleratorParserStage,
+            WorkloadStage,
+            SpatialMappingGeneratorStage,
+            TemporalMappingGeneratorStage,
+            CostModelStage,
+        ],
+        accelerator=accelerator,
+        workload=workload,
+        mapping=mapping,
+        loma_lpf_limit=5,
+        nb_mappings_generated=1,
+        access_same_data_considered_as_no_access=True,
+    )
+    cmes_per_layer: dict[int, list[CostModelEvaluation]] = {}
+    for cme, _ in mainstage.run():
+        cmes_per_layer.setdefault(cme.layer.id, []).append(cme)
+    return list(cmes_per_layer.values())
+
+
+def test_batch_selects_minimal_cmes(workload: str, accelerator: str, mapping: str):  # pylint: disable=W0621
+    for cmes in get_cmes_per_layer(workload, accelerator, mapping):
+        first_cme = cmes[0]
+        batch = evaluate_temporal_mappings(
+            accelerator=first_cme.accelerator,
+            layer=first_cme.layer,
+            spatial_mapping=first_cme.spatial_mapping,
+            spatial_mapping_int=first_cme.spatial_mapping_int,
+            temporal_mappings=[cme.temporal_mapping for cme in cmes],
+        )
+        assert len(batch) == len(cmes)
+        assert list(batch.energy_total) == pytest.approx([cme.energy_total for cme in cmes])
+        assert list(batch.latency_total2) == pytest.approx([cme.latency_total2 for cme in cmes])
+
+        for criterion, minimal_stage in MINIMAL_STAGES.items():
+            best_cme, _ = next(minimal_stage([ReplayStage], cmes=cmes).run())
+            best_index = batch.get_best_index(criterion)
+            assert cmes[best_index] is best_cme
+            assert batch.get_best_cme(criterion).energy_total == pytest.approx(best_cme.energy_total)
+            assert batch.get_best_cme(criterion).latency_total2 == pytest.approx(best_cme.latency_total2)
+
+        # The CMEs that are not kept are evaluated again on demand
+        last_index = len(cmes) - 1
+        last_cme = batch.get_cme(last_index)
+        assert last_cme.energy_total == pytest.approx(cmes[last_index].energy_total)
+        # and kept when more temporal mappings are evaluated
+        batch.evaluate([cme.temporal_mapping for cme in cmes])
+        assert len(batch) == 2 * len(cmes)
+        assert batch.get_cme(last_index) is last_cme
+        assert batch.get_best_index("energy") < len(cmes)
+
+
+def test_batch_invalid_criterion(workload: str, accelerator: str, mapping: str):  # pylint: disable=W0621
+    first_cme = get_cmes_per_layer(workload, accelerator, mapping)[0][0]
+    batch = evaluate_temporal_mappings(
+        accelerator=first_cme.accelerator,
+        layer=first_cme.layer,
+        spatial_mapping=first_cme.spatial_mapping,
+        spatial_mapping_int=first_cme.spatial_mapping_int,
+        temporal_mappings=[],
+    )
+    with pytest.raises(ValueError):
+        batch.get_best_index("energy")
+    with pytest.raises(ValueError):
+        batch.get_best_index("area")
+
+
+def test_cost_model_stage_shares_inputs(workload: str, accelerator: str, mapping: str):  # pylint: disable=W0621
+    for cmes in get_cmes_per_layer(workload, accelerator, mapping):
+        assert len(cmes) > 1
+        # The temporal mapping-invariant inputs are derived once per layer and spatial mapping
+        shared_spatial_mapping_int = cmes[0].mapping_int.spatial_mapping
+        assert all(cme.mapping_int.spatial_mapping is shared_spatial_mapping_int for cme in cmes)
+        for cme in cmes[:: max(1, len(cmes) // 5)]:
+            separate_cme = CostModelEvaluation(
+                accelerator=cme.accelerator,
+                layer=cme.layer,
+                spatial_mapping=cme.spatial_mapping,
+                spatial_mapping_int=cme.spatial_mapping_int,
+                temporal_mapping=cme.temporal_mapping,
+                access_same_data_considered_as_no_access=True,
+            )
+            assert separate_cme.mapping_int.spatial_mapping is not shared_spatial_mapping_int
+            assert separate_cme.energy_total == cme.energy_total
+            assert separate_cme.latency_total2 == cme.latency_total2
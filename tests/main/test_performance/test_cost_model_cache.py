@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.cost_model_cache import CostModelCache, get_cost_model_cache
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+
+
+def test_cache_hits_give_identical_results(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, tmp_path
+):  # pylint: disable=W0621
+    cache_path = str(tmp_path / "cache.sqlite")
+    expected_energy, expected_latency, _ = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, lpf_limit=4, dump_folder=dump_folder
+    )
+    energy, latency, _ = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, lpf_limit=4, dump_folder=dump_folder, cost_model_cache_path=cache_path
+    )
+    cache = get_cost_model_cache(cache_path)
+    # Layers 1 and 2 are equivalent, so the evaluations of layer 2 are hits
+    assert cache.hits > 0 and cache.misses > 0
+    hits, misses = cache.hits, cache.misses
+
+    cached_energy, cached_latency, _ = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, lpf_limit=4, dump_folder=dump_folder, cost_model_cache_path=cache_path
+    )
+    assert cache.misses == misses and cache.hits == 2 * hits + misses
+    assert energy == cached_energy == pytest.approx(expected_energy)
+    assert latency == cached_latency == pytest.approx(expected_latency)
+
+    # The access times of the hits are written when the cache is closed
+    assert cache.pending_accesses
+    cache.close()
+    with sqlite3.connect(cache_path) as connection:
+        nb_entries = connection.execute("SELECT COUNT(*) FROM cme").fetchone()[0]
+    assert nb_entries == misses
+
+
+def test_accelerator_digest_invalidation(accelerator: str, tmp_path):  # pylint: disable=W0621
+    cache = CostModelCache(str(tmp_path / "cache.sqlite"))
+    parsed_accelerator = AcceleratorParserStage.parse_accelerator(accelerator)
+    digest = cache.get_accelerator_digest(parsed_accelerator)
+    assert cache.get_accelerator_digest(parsed_accelerator) == digest
+
+    # Resizing a memory instance in place changes the digest
+    memory_instance = parsed_accelerator.memory_hierarchy.mem_level_list[0].memory_instance
+    memory_instance.update_size(2 * memory_instance.size)
+    assert cache.get_accelerator_digest(parsed_accelerator) != digest
+
+    # The cache does not keep the accelerators alive
+    del parsed_accelerator, memory_instance
+    assert not cache.accelerator_digests
+    cache.close()
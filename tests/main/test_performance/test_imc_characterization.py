@@ -0,0 +1,63 @@
+from collections import OrderedDict
+
+import pytest
+
+from zigzag.hardware.architecture.imc_array import ImcArray
+from zigzag.hardware.architecture.imc_nvm_array import ImcNvmArray
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.utils import open_yaml
+
+
+def parse_imc_array(accelerator_file: str) -> ImcArray:
+    # Without the parse cache of the accelerator files, which would not construct the array again
+    accelerator = AcceleratorParserStage.parse_accelerator_data(open_yaml(accelerator_file))
+    operational_array = accelerator.operational_array
+    assert isinstance(operational_array, ImcArray)
+    return operational_array
+
+
+@pytest.mark.parametrize(
+    "accelerator_file, array_type",
+    [
+        ("zigzag/inputs/hardware/aimc.yaml", ImcArray),
+        ("zigzag/inputs/hardware/dimc.yaml", ImcArray),
+        ("zigzag/inputs/hardware/Experiment2_paper3_reram.yaml", ImcNvmArray),
+        ("zigzag/inputs/hardware/Experiment2_paper4_reram.yaml", ImcNvmArray),
+    ],
+)
+def test_characterization_cache_hit(accelerator_file: str, array_type: type, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ImcArray, "characterization_cache", OrderedDict())
+    fresh_array = parse_imc_array(accelerator_file)
+    assert type(fresh_array) is array_type  # pylint: disable=C0123
+    assert len(ImcArray.characterization_cache) == 1
+
+    # The characterization is restored from the cache, not computed again
+    def get_tclk(*_):
+        raise AssertionError("The characterization is computed again")
+
+    monkeypatch.setattr(array_type, "get_tclk", get_tclk)
+    cached_array = parse_imc_array(accelerator_file)
+    assert len(ImcArray.characterization_cache) == 1
+    for attr in array_type.CHARACTERIZATION_ATTRIBUTES:
+        assert getattr(cached_array, attr) == getattr(fresh_array, attr), attr
+    if isinstance(fresh_array, ImcNvmArray):
+        assert isinstance(cached_array, ImcNvmArray)
+        assert cached_array.ReRAM_param == fresh_array.ReRAM_param
+    # The arrays do not share the (mutable) breakdowns
+    assert cached_array.area_breakdown is not fresh_array.area_breakdown
+    assert cached_array.tclk_breakdown is not fresh_array.tclk_breakdown
+
+
+def test_characterization_cache_is_bounded(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ImcArray, "characterization_cache", OrderedDict())
+    monkeypatch.setattr(ImcArray, "CHARACTERIZATION_CACHE_SIZE", 2)
+    accelerator_files = [
+        "zigzag/inputs/hardware/aimc.yaml",
+        "zigzag/inputs/hardware/dimc.yaml",
+        "zigzag/inputs/hardware/Experiment2_paper3_reram.yaml",
+    ]
+    keys = [parse_imc_array(accelerator_file).get_characterization_key() for accelerator_file in accelerator_files]
+    # The least recently used characterization is evicted
+    assert list(ImcArray.characterization_cache) == keys[1:]
+    parse_imc_array(accelerator_files[1])
+    assert list(ImcArray.characterization_cache) == [keys[2], keys[1]]
@@ -0,0 +1,70 @@
+import copy
+import glob
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from zigzag.hardware.architecture.imc_nvm_array import ENERGY_BREAKDOWN_FIELDS, ImcNvmArray
+from zigzag.parser.workload_factory import WorkloadFactory
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.workload.layer_node import LayerNode
+
+IMC_ACCELERATOR_FILES = sorted(glob.glob("zigzag/inputs/hardware/*.yaml"))
+
+
+def get_mapped_layers(accelerator_file: str, workload: str) -> tuple[ImcNvmArray, list[LayerNode]]:
+    """! The layers of the workload, for several spatial mappings on the NVM array of the accelerator"""
+    try:
+        accelerator = AcceleratorParserStage.parse_accelerator(accelerator_file)
+    except ValueError:
+        pytest.skip(f"{accelerator_file} does not pass the schema")
+    if not isinstance(accelerator.operational_array, ImcNvmArray):
+        pytest.skip(f"{accelerator_file} has no NVM array")
+    parsed_workload = WorkloadFactory(
+        WorkloadParserStage.parse_workload_data(workload),
+        WorkloadParserStage.parse_mapping_data("zigzag/inputs/mapping/default_imc_fornvm.yaml"),
+    ).create()
+
+    mapped_layers: list[LayerNode] = []
+    for layer in nx.topological_sort(parsed_workload):
+        stage = SpatialMappingGeneratorStage(
+            [CostModelStage],
+            accelerator=accelerator,
+            layer=layer,
+            enable_mix_spatial_mapping_generation=True,
+            nb_mappings_generated=4,
+        )
+        try:
+            spatial_mappings = list(stage.generate_spatial_mappings())
+        except ValueError:
+            # The unrolling limit of some arrays is below the smallest loop size of the layer
+            continue
+        for spatial_mapping in spatial_mappings:
+            mapped_layer = copy.copy(layer)
+            mapped_layer.spatial_mapping = spatial_mapping
+            mapped_layers.append(mapped_layer)
+    return accelerator.operational_array, mapped_layers
+
+
+@pytest.mark.parametrize("accelerator_file", IMC_ACCELERATOR_FILES)
+def test_scalar_and_batched_energy_match(accelerator_file: str, workload: str):  # pylint: disable=W0621
+    imc_array, layers = get_mapped_layers(accelerator_file, workload)
+    if not layers:
+        pytest.skip(f"{accelerator_file} has no spatial mappings for the workload")
+    batched_energies = imc_array.get_energy_for_layers(layers)
+    assert len(batched_energies) == len(layers)
+
+    for layer, batched_energy in zip(layers, batched_energies):
+        energy_breakdown = imc_array.get_energy_for_a_layer(layer, None)  # type: ignore
+        assert list(energy_breakdown) == list(ENERGY_BREAKDOWN_FIELDS)
+        for field in ENERGY_BREAKDOWN_FIELDS:
+            assert energy_breakdown[field] == batched_energy[field]
+        assert imc_array.energy == batched_energy["total"]
+        assert imc_array.energy == sum(energy_breakdown.values())
+        assert imc_array.number_of_cycles_for_layer >= 1
+    # The batched path has no side effects on the array
+    assert np.all(batched_energies["total"] > 0)
@@ -0,0 +1,40 @@
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_deduplicated_layers_have_identical_results(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, n_workers: int
+):  # pylint: disable=W0621
+    energy, latency, cmes = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, lpf_limit=4, dump_folder=dump_folder, n_workers=n_workers
+    )
+    dedup_energy, dedup_latency, dedup_cmes = get_hardware_performance_zigzag(
+        workload,
+        accelerator,
+        mapping,
+        lpf_limit=4,
+        dump_folder=dump_folder,
+        n_workers=n_workers,
+        deduplicate_layers=True,
+    )
+    assert dedup_energy == pytest.approx(energy)
+    assert dedup_latency == pytest.approx(latency)
+
+    layer_cmes = [cme for cme, _ in cmes[0][1]]
+    dedup_layer_cmes = [cme for cme, _ in dedup_cmes[0][1]]
+    assert len(dedup_layer_cmes) == len(layer_cmes) == 3
+    for cme, dedup_cme in zip(layer_cmes, dedup_layer_cmes):
+        assert dedup_cme.layer.id == cme.layer.id
+        assert dedup_cme.energy_total == pytest.approx(cme.energy_total)
+        assert dedup_cme.latency_total2 == pytest.approx(cme.latency_total2)
+        assert str(dedup_cme.temporal_mapping) == str(cme.temporal_mapping)
+        # All attributes of the reused CMEs refer to their own layer
+        for layer_node in (
+            dedup_cme.mapping.layer_node,
+            dedup_cme.mapping_int.layer_node,
+            dedup_cme.temporal_mapping.layer_node,
+            dedup_cme.spatial_mapping.layer_node,
+        ):
+            assert layer_node is dedup_cme.layer
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.cost_model.port_activity import PortActivity
+from zigzag.datatypes import Constants
+from zigzag.hardware.architecture.memory_port import DataDirection
+
+# (period, allowed cycles, period count) of the MUWs (memory updating windows) of the ports that share a memory port
+MemUpdatingWindow = tuple[int, int, int]
+
+
+def get_port_duty_list(windows: list[MemUpdatingWindow]) -> list[PortActivity]:
+    return [
+        PortActivity(
+            allowed, allowed, period, period_count, Constants.OUTPUT_LAYER_OP, mem_lv, DataDirection.WR_IN_BY_LOW
+        )
+        for mem_lv, (period, allowed, period_count) in enumerate(windows)
+    ]
+
+
+def calc_union(windows: list[MemUpdatingWindow]) -> int:
+    cme = CostModelEvaluation.__new__(CostModelEvaluation)
+    return cme._CostModelEvaluation__calc_mem_updating_window_union(  # type: ignore # pylint: disable=W0212
+        get_port_duty_list(windows)
+    )
+
+
+def calc_reference_union(windows: list[MemUpdatingWindow]) -> int:
+    """! Union of the MUWs within the largest period, from the explicit list of their intervals, times the period count
+    of the largest period"""
+    for period, allowed, period_count in windows:
+        if period == allowed:
+            return period * period_count
+    max_period, _, max_period_count = max(windows, key=lambda window: window[0])
+    intervals = sorted(
+        (start, min(start + min(allowed, period), max_period))
+        for period, allowed, _ in windows
+        for start in range(0, max_period, period)
+    )
+    union = 0
+    union_end = 0
+    for start, end in intervals:
+        if end > union_end:
+            union += end - max(start, union_end)
+            union_end = end
+    return union * max_period_count
+
+
+@pytest.mark.parametrize(
+    "windows",
+    [
+        # Periodic: every period divides the largest one
+        [(3, 1, 8), (6, 2, 4), (12, 4, 2)],
+        [(2, 1, 64), (128, 3, 1)],
+        [(16, 5, 4), (4, 3, 16), (64, 1, 1)],
+        # Aperiodic: the periods do not divide the largest one
+        [(4, 1, 6), (6, 2, 4)],
+        [(5, 2, 12), (7, 3, 9), (12, 5, 5)],
+        [(9, 4, 3), (10, 1, 3)],
+        # Zero-length windows
+        [(4, 0, 8), (8, 3, 4)],
+        [(4, 0, 3), (6, 0, 2)],
+        [(5, 0, 7), (7, 2, 5)],
+        # A window that spans the whole period
+        [(4, 4, 5), (8, 2, 3)],
+        [(6, 1, 4), (3, 3, 8)],
+        [(1, 1, 100), (7, 0, 1)],
+        # A single window
+        [(10, 3, 2)],
+    ],
+)
+def test_mem_updating_window_union(windows: list[MemUpdatingWindow]):
+    assert calc_union(windows) == calc_reference_union(windows)
+
+
+def test_mem_updating_window_union_random():
+    rng = random.Random(0)
+    for _ in range(300):
+        windows: list[MemUpdatingWindow] = []
+        for _ in range(rng.randint(1, 4)):
+            period = rng.randint(1, 40)
+            windows.append((period, rng.randint(0, period - 1), rng.randint(1, 10)))
+        assert calc_union(windows) == calc_reference_union(windows), windows
@@ -0,0 +1,33 @@
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+
+
+@pytest.mark.parametrize("exploit_data_locality", [False, True])
+def test_parallel_layers_match_serial(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, exploit_data_locality: bool
+):  # pylint: disable=W0621
+    energy, latency, cmes = get_hardware_performance_zigzag(
+        workload,
+        accelerator,
+        mapping,
+        lpf_limit=4,
+        dump_folder=dump_folder,
+        exploit_data_locality=exploit_data_locality,
+    )
+    parallel_energy, parallel_latency, parallel_cmes = get_hardware_performance_zigzag(
+        workload,
+        accelerator,
+        mapping,
+        lpf_limit=4,
+        dump_folder=dump_folder,
+        exploit_data_locality=exploit_data_locality,
+        n_workers=2,
+    )
+    assert parallel_energy == energy
+    assert parallel_latency == latency
+    # The layers are yielded in topological order
+    for (cme, _), (parallel_cme, _) in zip(cmes[0][1], parallel_cmes[0][1]):
+        assert parallel_cme.layer.id == cme.layer.id
+        assert parallel_cme.energy_total == cme.energy_total
+        assert parallel_cme.latency_total2 == cme.latency_total2
@@ -0,0 +1,130 @@
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.main import MainStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.stages.results.reduce_stages import MinimalEDPStage, MinimalEnergyStage, MinimalLatencyStage
+from zigzag.stages.stage import StageCallable
+from zigzag.stages.workload_iterator import WorkloadStage
+
+MINIMAL_STAGES: dict[str, StageCallable] = {
+    "energy": MinimalEnergyStage,
+    "latency": MinimalLatencyStage,
+    "EDP": MinimalEDPStage,
+}
+
+
+def get_all_cmes(workload: str, accelerator: str, mapping: str, nb_loma_workers: int, **kwargs: Any):
+    """! Run the mapping search without reduce stages, so that every evaluated CME is returned"""
+    mainstage = MainStage(
+        [
+            WorkloadParserStage,
+            AcceleratorParserStage,
+            WorkloadStage,
+            SpatialMappingGeneratorStage,
+            TemporalMappingGeneratorStage,
+            CostModelStage,
+        ],
+        accelerator=accelerator,
+        workload=workload,
+        mapping=mapping,
+        loma_lpf_limit=5,
+        loma_number_of_workers=nb_loma_workers,
+        nb_mappings_generated=2,
+        access_same_data_considered_as_no_access=True,
+        **kwargs,
+    )
+    return [cme for cme, _ in mainstage.run()]
+
+
+def get_minimal_cmes(workload: str, accelerator: str, mapping: str, nb_loma_workers: int, opt: str, **kwargs: Any):
+    """! Run the mapping search with a Minimal stage per spatial mapping, as in the API"""
+    mainstage = MainStage(
+        [
+            WorkloadParserStage,
+            AcceleratorParserStage,
+            WorkloadStage,
+            SpatialMappingGeneratorStage,
+            MINIMAL_STAGES[opt],
+            TemporalMappingGeneratorStage,
+            CostModelStage,
+        ],
+        accelerator=accelerator,
+        workload=workload,
+        mapping=mapping,
+        loma_lpf_limit=5,
+        loma_number_of_workers=nb_loma_workers,
+        loma_reduce_criterion=opt,
+        nb_mappings_generated=2,
+        access_same_data_considered_as_no_access=True,
+        **kwargs,
+    )
+    return mainstage.run()
+
+
+def test_parallel_loma_yields_serial_cmes(workload: str, accelerator: str, mapping: str):  # pylint: disable=W0621
+    serial_cmes = get_all_cmes(workload, accelerator, mapping, nb_loma_workers=1)
+    parallel_cmes = get_all_cmes(workload, accelerator, mapping, nb_loma_workers=3)
+
+    assert len(parallel_cmes) == len(serial_cmes)
+    for serial_cme, parallel_cme in zip(serial_cmes, parallel_cmes):
+        assert parallel_cme.layer.id == serial_cme.layer.id
+        assert str(parallel_cme.temporal_mapping) == str(serial_cme.temporal_mapping)
+        assert parallel_cme.energy_total == serial_cme.energy_total
+        assert parallel_cme.latency_total2 == serial_cme.latency_total2
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_parallel_loma_api(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, opt: str
+):  # pylint: disable=W0621
+    serial_energy, serial_latency, _ = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, opt=opt, lpf_limit=5, dump_folder=dump_folder
+    )
+    energy, latency, _ = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, opt=opt, lpf_limit=5, dump_folder=dump_folder, nb_loma_workers=2
+    )
+    assert energy == serial_energy
+    assert latency == serial_latency
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+def test_parallel_loma_workers_reduce_chunks(
+    workload: str, accelerator: str, mapping: str, opt: str
+):  # pylint: disable=W0621
+    nb_loma_workers = 2
+    serial_cmes = get_all_cmes(workload, accelerator, mapping, nb_loma_workers=1)
+    reduced_cmes = get_all_cmes(workload, accelerator, mapping, nb_loma_workers, loma_reduce_criterion=opt)
+    # Only the best CME of every chunk is returned, of which there are 4 per worker
+    nb_spatial_mappings = len({(cme.layer.id, str(cme.spatial_mapping)) for cme in serial_cmes})
+    assert len(reduced_cmes) <= 4 * nb_loma_workers * nb_spatial_mappings
+    assert len(reduced_cmes) < len(serial_cmes)
+
+    serial_best_cmes = get_minimal_cmes(workload, accelerator, mapping, 1, opt)
+    parallel_best_cmes = get_minimal_cmes(workload, accelerator, mapping, nb_loma_workers, opt)
+    assert len(parallel_best_cmes) == len(serial_best_cmes)
+    for (serial_cme, _), (parallel_cme, (_, (_, other_cmes))) in zip(serial_best_cmes, parallel_best_cmes):
+        assert str(parallel_cme.temporal_mapping) == str(serial_cme.temporal_mapping)
+        assert parallel_cme.energy_total == serial_cme.energy_total
+        assert parallel_cme.latency_total2 == serial_cme.latency_total2
+        assert not other_cmes
+
+
+def test_parallel_loma_keep_others(workload: str, accelerator: str, mapping: str):  # pylint: disable=W0621
+    serial_best_cmes = get_minimal_cmes(workload, accelerator, mapping, 1, "energy", reduce_minimal_keep_others=True)
+    parallel_best_cmes = get_minimal_cmes(
+        workload, accelerator, mapping, 2, "energy", reduce_minimal_keep_others=True, loma_keep_others=True
+    )
+    assert len(parallel_best_cmes) == len(serial_best_cmes)
+    for (serial_cme, serial_info), (parallel_cme, parallel_info) in zip(serial_best_cmes, parallel_best_cmes):
+        # The extra info is (layer, (spatial mapping, other CMEs))
+        (_, (_, serial_others)), (_, (_, parallel_others)) = serial_info, parallel_info
+        assert serial_others
+        assert str(parallel_cme.temporal_mapping) == str(serial_cme.temporal_mapping)
+        assert [cme.energy_total for cme, _ in parallel_others] == [cme.energy_total for cme, _ in serial_others]
@@ -0,0 +1,25 @@
+import gc
+import weakref
+
+import networkx as nx
+
+from zigzag.mapping.mapping_assist_funcs import get_pr_loop_decoupler
+from zigzag.parser.workload_factory import WorkloadFactory
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+
+
+def test_pr_loop_decoupler_does_not_keep_layer_alive(workload: str, mapping: str):  # pylint: disable=W0621
+    parsed_workload = WorkloadFactory(
+        WorkloadParserStage.parse_workload_data(workload), WorkloadParserStage.parse_mapping_data(mapping)
+    ).create()
+    layer = list(nx.topological_sort(parsed_workload))[0]
+    decoupler = get_pr_loop_decoupler(layer)
+    # The decoupler is shared by all mappings of the layer
+    assert get_pr_loop_decoupler(layer) is decoupler
+
+    layer_ref = weakref.ref(layer)
+    decoupler_ref = weakref.ref(decoupler)
+    del parsed_workload, layer, decoupler
+    gc.collect()
+    assert layer_ref() is None
+    assert decoupler_ref() is None
@@ -0,0 +1,70 @@
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag, get_zigzag_stages
+from zigzag.stages.results.reduce_stages import ParetoFrontStage, get_criteria_functions
+
+
+@pytest.fixture
+def tradeoff_accelerator() -> str:
+    """! Accelerator on which the mappings of the workload trade off energy against latency"""
+    return "zigzag/inputs/hardware/tesla_npu_like.yaml"
+
+
+@pytest.fixture
+def tradeoff_mapping() -> str:
+    return "zigzag/inputs/mapping/tesla_npu_like.yaml"
+
+
+@pytest.mark.parametrize("opt", ["energy", "latency", "EDP"])
+@pytest.mark.parametrize("reduce", ["top_k", "pareto"])
+def test_reduce_api(
+    workload: str, tradeoff_accelerator: str, tradeoff_mapping: str, dump_folder: str, opt: str, reduce: str
+):  # pylint: disable=W0621
+    expected_energy, expected_latency, _ = get_hardware_performance_zigzag(
+        workload, tradeoff_accelerator, tradeoff_mapping, opt=opt, lpf_limit=4, dump_folder=dump_folder
+    )
+    energy, latency, cmes = get_hardware_performance_zigzag(
+        workload,
+        tradeoff_accelerator,
+        tradeoff_mapping,
+        opt=opt,
+        reduce=reduce,
+        reduce_top_k=4,
+        lpf_limit=4,
+        dump_folder=dump_folder,
+    )
+    assert energy == pytest.approx(expected_energy)
+    assert latency == pytest.approx(expected_latency)
+
+    _, reduce_criteria = get_zigzag_stages(opt=opt)
+    criteria = get_criteria_functions(reduce_criteria)
+    max_nb_kept_cmes = 0
+    for best_cme, (_, kept_cmes) in cmes[0][1]:
+        assert 0 < len(kept_cmes) <= 4
+        max_nb_kept_cmes = max(max_nb_kept_cmes, len(kept_cmes))
+        keys = [tuple(criterion(cme) for criterion in criteria) for cme, _ in kept_cmes]
+        assert keys[0] == tuple(criterion(best_cme) for criterion in criteria)
+        assert keys == sorted(keys)
+        if reduce == "pareto":
+            # No CME on the front dominates another one
+            assert all(
+                not all(k_a <= k_b for k_a, k_b in zip(key_a, key_b))
+                for idx_a, key_a in enumerate(keys)
+                for idx_b, key_b in enumerate(keys)
+                if idx_a != idx_b
+            )
+    # Some layers have more than one CME on the front
+    assert max_nb_kept_cmes >= 2
+
+
+def test_pareto_front_truncation_keeps_extremes():
+    keys = [(1.0, 10.0), (2.0, 9.0), (3.0, 8.5), (10.0, 1.0)]
+    front = [(key, count, None, None) for count, key in enumerate(keys)]
+    # (2.0, 9.0) lies in the most crowded region of the front
+    assert ParetoFrontStage.get_most_crowded_index(front) == 1
+    # For equal crowding distances, the entry with the worst criteria is dropped
+    keys = [(1.0, 10.0), (5.0, 6.0), (6.0, 5.0), (10.0, 1.0)]
+    front = [(key, count, None, None) for count, key in enumerate(keys)]
+    assert ParetoFrontStage.get_most_crowded_index(front) == 2
+    # The extremes are only dropped if all entries are extremes
+    assert ParetoFrontStage.get_most_crowded_index([front[0], front[3]]) == 1
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.results_table import ResultsTable, ResultsTableWriter
+
+
+def test_api_results_table(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, tmp_path  # type: ignore
+):  # pylint: disable=W0621
+    results_table_path = str(tmp_path / "results_table")
+    energy, latency, cmes = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, lpf_limit=4, dump_folder=dump_folder, results_table_path=results_table_path
+    )
+    layer_cmes = [cme for cme, _ in cmes[0][1]]
+
+    table = ResultsTable(results_table_path)
+    # One row per layer and one for the overall results
+    assert len(table) == len(layer_cmes) + 1
+    assert list(table["layer"]) == [cme.layer.name for cme in layer_cmes] + ["overall"]
+    assert table["energy_total"][-1] == pytest.approx(energy)
+    assert table["latency_total"][-1] == pytest.approx(latency)
+    for row, cme in enumerate(layer_cmes):
+        assert table["layer_id"][row] == cme.layer.id
+        assert table["energy_total"][row] == pytest.approx(cme.energy_total)
+        assert table["latency_total"][row] == pytest.approx(cme.latency_total2)
+        assert table["temporal_mapping"][row] == str(cme.temporal_mapping)
+    # The columns are memory-mapped and read-only
+    with pytest.raises(ValueError):
+        table["energy_total"][0] = 0.0
+
+
+def test_results_table_round_trip(tmp_path):  # type: ignore
+    path = str(tmp_path / "results_table")
+    writer = ResultsTableWriter(path)
+    writer.add_row({"layer": "conv1", "energy_total": 1.0})
+    writer.add_row({"layer": "conv2", "energy_total": 2.0, "tclk": 5.0})
+    writer.save()
+
+    table = ResultsTable(path)
+    assert table.columns == ["layer", "energy_total", "tclk"]
+    assert "tclk" in table and "area_total" not in table
+    assert list(table["layer"]) == ["conv1", "conv2"]
+    assert np.array_equal(table["energy_total"], [1.0, 2.0])
+    # Missing values are filled with NaN
+    assert math.isnan(table["tclk"][0]) and table["tclk"][1] == 5.0
+    with pytest.raises(KeyError):
+        table["area_total"]  # pylint: disable=W0104
+
+    writer = ResultsTableWriter(path, append=True)
+    writer.add_row({"layer": "overall", "energy_total": 3.0})
+    writer.save()
+    columns = ResultsTable(path).load()
+    assert list(columns["layer"]) == ["conv1", "conv2", "overall"]
+    assert np.array_equal(columns["energy_total"], [1.0, 2.0, 3.0])
+    assert math.isnan(columns["tclk"][2])
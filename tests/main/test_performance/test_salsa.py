@@ -0,0 +1,133 @@
+from typing import Any
+
+import pytest
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.opt.loma.memory_allocator import LoopPrefixNode, LoopPrefixTrie
+from zigzag.opt.salsa.engine import SalsaChain, SalsaEngine
+from zigzag.opt.salsa.state import SalsaEvaluator
+
+
+@pytest.fixture
+def layer_cme(workload: str, accelerator: str, mapping: str, dump_folder: str) -> Any:  # pylint: disable=W0621
+    _, _, cmes = get_hardware_performance_zigzag(workload, accelerator, mapping, lpf_limit=4, dump_folder=dump_folder)
+    return cmes[0][1][1][0]
+
+
+class FailingSalsaEvaluator(SalsaEvaluator):
+    """! Evaluator of which every evaluation fails"""
+
+    def evaluate(self, ordering: list[int], previous_ordering: list[int] | None = None) -> float:
+        raise ValueError("Chain failure")
+
+
+class FailingSalsaEngine(SalsaEngine):
+    """! Engine of which the chains fail"""
+
+    def create_evaluator(self) -> SalsaEvaluator:
+        return FailingSalsaEvaluator(
+            self.accelerator,
+            self.layer,
+            self.spatial_mapping,
+            self.opt_criterion_name,
+            self.loop_encoding,
+            memo_size=self.memo_size,
+        )
+
+
+def create_engine(layer_cme: CostModelEvaluation, salsa_iteration_number: int = 200) -> SalsaEngine:
+    return SalsaEngine(
+        accelerator=layer_cme.accelerator,
+        layer=layer_cme.layer,
+        spatial_mapping=layer_cme.spatial_mapping,
+        loma_lpf_limit=6,
+        salsa_iteration_number=salsa_iteration_number,
+        salsa_seed=3,
+    )
+
+
+def test_parallel_tempering_is_deterministic(layer_cme: CostModelEvaluation):  # pylint: disable=W0621
+    serial_engine = create_engine(layer_cme)
+    serial_cme = serial_engine.run_parallel_tempering(1)
+    parallel_engine = create_engine(layer_cme)
+    parallel_cme = parallel_engine.run_parallel_tempering(2)
+    assert parallel_cme.energy_total == serial_cme.energy_total
+    assert parallel_cme.temporal_mapping.mapping_dic_origin == serial_cme.temporal_mapping.mapping_dic_origin
+    assert parallel_engine.convergence_traces == serial_engine.convergence_traces
+
+
+def test_parallel_tempering_without_iterations(layer_cme: CostModelEvaluation):  # pylint: disable=W0621
+    cme = create_engine(layer_cme, salsa_iteration_number=0).run_parallel_tempering(2)
+    assert cme.energy_total > 0
+
+
+def test_parallel_tempering_worker_failure(layer_cme: CostModelEvaluation):  # pylint: disable=W0621
+    # The failing engine is passed to the worker processes, whatever their start method
+    engine = FailingSalsaEngine(
+        accelerator=layer_cme.accelerator,
+        layer=layer_cme.layer,
+        spatial_mapping=layer_cme.spatial_mapping,
+        loma_lpf_limit=6,
+        salsa_iteration_number=200,
+        salsa_seed=3,
+    )
+    with pytest.raises(RuntimeError):
+        engine.run_parallel_tempering(2)
+
+
+def count_trie_nodes(node: LoopPrefixNode) -> int:
+    return sum(1 + count_trie_nodes(child) for child in node.children.values())
+
+
+def test_size_cache_is_bounded(layer_cme: CostModelEvaluation):  # pylint: disable=W0621
+    engine = SalsaEngine(
+        accelerator=layer_cme.accelerator,
+        layer=layer_cme.layer,
+        spatial_mapping=layer_cme.spatial_mapping,
+        loma_lpf_limit=6,
+        salsa_memo_size=50,
+    )
+    engine.get_temporal_loops()
+    engine.get_prime_factors()
+    evaluator = engine.create_evaluator()
+    unbounded_evaluator = engine.create_evaluator()
+    unbounded_evaluator.size_cache = LoopPrefixTrie()
+    chain = SalsaChain(evaluator, engine.temporal_mapping_loop_ids, 3)
+    unbounded_chain = SalsaChain(unbounded_evaluator, engine.temporal_mapping_loop_ids, 3)
+
+    for _ in range(10):
+        trace = chain.anneal(0.05, 20)
+        assert evaluator.size_cache.nb_nodes == count_trie_nodes(evaluator.size_cache.root)
+        assert evaluator.size_cache.nb_nodes <= 50
+        # The tile sizes of the emptied trie are computed again, with the same results
+        assert trace == unbounded_chain.anneal(0.05, 20)
+    assert unbounded_evaluator.size_cache.nb_nodes > 50
+
+
+def test_allocators_are_kept_on_memo_hits(layer_cme: CostModelEvaluation):  # pylint: disable=W0621
+    engine = create_engine(layer_cme)
+    engine.get_temporal_loops()
+    engine.get_prime_factors()
+    evaluator = engine.create_evaluator()
+    evaluator.allocator_memo_size = 2
+    ordering = list(engine.temporal_mapping_loop_ids)
+    swapped_orderings = [ordering[i:] + ordering[:i] for i in range(1, 3)]
+
+    cost = evaluator.evaluate(ordering)
+    evaluator.evaluate(swapped_orderings[0], ordering)
+    evaluator.evaluate(swapped_orderings[1], swapped_orderings[0])
+    assert evaluator.get_allocator(ordering) is None
+    # The cost is memoized, and the allocator of the ordering is restored for its next swaps
+    assert evaluator.evaluate(ordering, swapped_orderings[1]) == cost
+    allocator = evaluator.get_allocator(ordering)
+    assert allocator is not None
+    fresh_allocator, _ = engine.create_evaluator().allocate(ordering)
+    assert allocator.temporal_mapping_dict == fresh_allocator.temporal_mapping_dict
+    assert len(evaluator.allocators) == 2
+
+    # Chains give the same results when allocators are evicted
+    chain = SalsaChain(evaluator, list(ordering), 3)
+    unbounded_chain = SalsaChain(engine.create_evaluator(), list(ordering), 3)
+    for _ in range(5):
+        assert chain.anneal(0.05, 20) == unbounded_chain.anneal(0.05, 20)
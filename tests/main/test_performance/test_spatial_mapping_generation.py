@@ -0,0 +1,54 @@
+import networkx as nx
+import pytest
+
+from zigzag.datatypes import LayerDim, OADimension
+from zigzag.mapping.spatial_mapping import MappingSingleOADim, SpatialMapping
+from zigzag.parser.workload_factory import WorkloadFactory
+from zigzag.stages.evaluation.cost_model_evaluation import CostModelStage
+from zigzag.stages.mapping.spatial_mapping_generation import SpatialMappingGeneratorStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+
+
+@pytest.fixture
+def imc_accelerator() -> str:
+    return "zigzag/inputs/hardware/aimc.yaml"
+
+
+@pytest.fixture
+def imc_mapping() -> str:
+    return "zigzag/inputs/mapping/default_imc.yaml"
+
+
+def test_diagonal_mapping_does_not_modify_shared_accelerator(
+    workload: str, imc_accelerator: str, imc_mapping: str
+):  # pylint: disable=W0621
+    # The layers share the accelerator, as they share the pruned accelerators of ExploitInterLayerDataLocalityStage
+    accelerator = AcceleratorParserStage.parse_accelerator(imc_accelerator)
+    parsed_workload = WorkloadFactory(
+        WorkloadParserStage.parse_workload_data(workload), WorkloadParserStage.parse_mapping_data(imc_mapping)
+    ).create()
+    # Layers with weights as only constant operand, i.e. that are weight stationary
+    layers = list(nx.topological_sort(parsed_workload))[1:]
+    original_sizes = [level.memory_instance.size for level in accelerator.memory_hierarchy.mem_level_list]
+
+    # Diagonal mapping: OX is unrolled on the OA dimension that serves the innermost activation memory
+    diagonal_mapping = SpatialMapping(
+        {
+            OADimension("D1"): MappingSingleOADim({LayerDim("K"): 16, LayerDim("OX"): 2}),
+            OADimension("D2"): MappingSingleOADim({LayerDim("C"): 8, LayerDim("FX"): 3, LayerDim("FY"): 3}),
+        }
+    )
+    for layer in layers:
+        stage = SpatialMappingGeneratorStage(
+            [CostModelStage], accelerator=accelerator, layer=layer, enable_weight_diagonal_mapping=True
+        )
+        diagonal_accelerator = stage.modify_innermost_input_mem_size(diagonal_mapping)
+        assert diagonal_accelerator is not accelerator
+        # Only the innermost activation memory is scaled by the OX unrolling, for every layer
+        scaled_sizes = [level.memory_instance.size for level in diagonal_accelerator.memory_hierarchy.mem_level_list]
+        memory_names = [level.name for level in accelerator.memory_hierarchy.mem_level_list]
+        assert scaled_sizes == [
+            size * 2 if name == "rf_1B" else size for name, size in zip(memory_names, original_sizes)
+        ]
+        assert [level.memory_instance.size for level in accelerator.memory_hierarchy.mem_level_list] == original_sizes
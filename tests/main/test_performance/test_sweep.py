@@ -0,0 +1,90 @@
+import csv
+import sys
+
+import pytest
+import yaml
+
+from zigzag.api import get_hardware_performance_zigzag
+from zigzag.sweep import apply_accelerator_overrides, get_hardware_performance_zigzag_sweep, main
+from zigzag.utils import open_yaml
+
+GRID = {"memories.rf_128B.r_cost": [0.095, 0.19], "memories.rf_2B.w_cost": [0.021, 0.042]}
+
+
+@pytest.mark.parametrize("nb_variant_workers", [1, 2])
+def test_sweep_matches_api(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, tmp_path, nb_variant_workers: int  # type: ignore
+):  # pylint: disable=W0621
+    columns = get_hardware_performance_zigzag_sweep(
+        workload,
+        accelerator,
+        mapping,
+        GRID,
+        opt="energy",
+        dump_folder=dump_folder,
+        lpf_limit=4,
+        nb_variant_workers=nb_variant_workers,
+    )
+    assert len(columns["energy_total"]) == 4
+
+    accelerator_data = open_yaml(accelerator)
+    for variant in range(4):
+        overrides = {path: columns[path][variant] for path in GRID}
+        variant_path = tmp_path / f"variant_{variant}.yaml"
+        variant_data = apply_accelerator_overrides(accelerator_data, overrides)
+        variant_path.write_text(yaml.safe_dump(variant_data, sort_keys=False))
+        energy, latency, _ = get_hardware_performance_zigzag(
+            workload, str(variant_path), mapping, opt="energy", dump_folder=dump_folder, lpf_limit=4
+        )
+        assert columns["energy_total"][variant] == pytest.approx(energy)
+        assert columns["latency_total"][variant] == pytest.approx(latency)
+
+
+def test_sweep_in_memory_compute(workload: str, dump_folder: str):  # pylint: disable=W0621
+    accelerator = "zigzag/inputs/hardware/aimc.yaml"
+    mapping = "zigzag/inputs/mapping/default_imc.yaml"
+    columns = get_hardware_performance_zigzag_sweep(
+        workload,
+        accelerator,
+        mapping,
+        {"operational_array.adc_resolution": [4, 8]},
+        dump_folder=dump_folder,
+        lpf_limit=4,
+        in_memory_compute=True,
+    )
+    _, _, tclk, area, _ = get_hardware_performance_zigzag(
+        workload, accelerator, mapping, dump_folder=dump_folder, lpf_limit=4, in_memory_compute=True
+    )
+    # The variants only differ in the ADC resolution, which changes the clock period and area of the array. The area of
+    # the whole accelerator is at least the area of the memories used by the first layer.
+    assert columns["tclk"][0] != columns["tclk"][1]
+    assert columns["area_total"][0] != columns["area_total"][1]
+    adc_resolution = open_yaml(accelerator)["operational_array"]["adc_resolution"]
+    original_variant = columns["operational_array.adc_resolution"].index(adc_resolution)
+    assert columns["tclk"][original_variant] == pytest.approx(tclk)
+    assert columns["area_total"][original_variant] >= area
+
+
+def test_sweep_cli(
+    workload: str, accelerator: str, mapping: str, dump_folder: str, monkeypatch: pytest.MonkeyPatch
+):  # pylint: disable=W0621
+    results_path = f"{dump_folder}/results.csv"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "sweep",
+            f"--model={workload}",
+            f"--accelerator={accelerator}",
+            f"--mapping={mapping}",
+            "--grid=memories.rf_128B.r_cost=[0.095, 0.19]",
+            f"--dump-folder={dump_folder}",
+            f"--results={results_path}",
+            "--lpf-limit=4",
+        ],
+    )
+    main()
+    with open(results_path, encoding="utf-8") as results_file:
+        rows = list(csv.DictReader(results_file))
+    assert [float(row["memories.rf_128B.r_cost"]) for row in rows] == [0.095, 0.19]
+    assert all(float(row["energy_total"]) > 0 and float(row["latency_total"]) > 0 for row in rows)
@@ -16,26 +16,135 @@ from zigzag.stages.mapping.temporal_mapping_generator_stage import TemporalMappi
 from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
 from zigzag.stages.parser.onnx_model_parser import ONNXModelParserStage
 from zigzag.stages.parser.workload_parser import WorkloadParserStage
-from zigzag.stages.results.reduce_stages import MinimalEDPStage, MinimalEnergyStage, MinimalLatencyStage, SumStage
-from zigzag.stages.results.save import CompleteSaveStage, PickleSaveStage, SimpleSaveStage
+from zigzag.stages.results.reduce_stages import (
+    MinimalEDPStage,
+    MinimalEnergyStage,
+    MinimalLatencyStage,
+    ParetoFrontStage,
+    SumStage,
+    TopKStage,
+)
+from zigzag.stages.results.save import ColumnarSaveStage, CompleteSaveStage, PickleSaveStage, SimpleSaveStage
 from zigzag.stages.results.visualization import VisualizationStage
 from zigzag.stages.stage import StageCallable
 from zigzag.stages.workload_iterator import WorkloadStage
 
 
+def get_zigzag_stages(
+    *,
+    opt: str = "latency",
+    reduce: str = "minimal",
+    workload_parser_stage: StageCallable | None = WorkloadParserStage,
+    save_results: bool = True,
+    save_results_table: bool = False,
+    in_memory_compute: bool = False,
+    exploit_data_locality: bool = False,
+    enable_mix_spatial_mapping: bool = False,
+    deduplicate_layers: bool = False,
+) -> tuple[list[StageCallable], tuple[str, ...]]:
+    """! Stages of the ZigZag API, see `get_hardware_performance_zigzag` for the parameters.
+    @param workload_parser_stage Stage that parses the workload. If None, the workload and accelerator are not parsed:
+        the MainStage must be given a parsed workload and accelerator.
+    @param save_results Iff true, the results are saved in the dump folder (json, pickle and visualization).
+    @param save_results_table Iff true, the results of all layers are saved as rows of a columnar table.
+    @return the stages and the criteria on which the top-k and Pareto front reduce stages rank.
+    """
+    match opt:
+        case "energy":
+            opt_stage = MinimalEnergyStage
+            reduce_criteria = ("energy", "latency")
+        case "latency":
+            opt_stage = MinimalLatencyStage
+            reduce_criteria = ("latency", "energy")
+        case "EDP":
+            opt_stage = MinimalEDPStage
+            reduce_criteria = ("EDP", "energy", "latency")
+        case _:
+            raise NotImplementedError("Optimization criterion 'opt' should be either 'energy' or 'latency' or 'EDP'.")
+
+    # The top-k and Pareto front reduce stages rank on the `reduce_criteria`, of which the first one is `opt`
+    match reduce:
+        case "minimal":
+            layer_reduce_stage = opt_stage
+        case "top_k":
+            layer_reduce_stage = TopKStage
+        case "pareto":
+            layer_reduce_stage = ParetoFrontStage
+        case _:
+            raise NotImplementedError("Reduce mode 'reduce' should be either 'minimal' or 'top_k' or 'pareto'.")
+
+    # Add stages to keep whole layers in lower level memory instead of rewriting to DRAM, if possible
+    do_exploint_inter_layer_locality = in_memory_compute or exploit_data_locality or enable_mix_spatial_mapping
+    parse_inputs = workload_parser_stage is not None
+    save_complete_results = save_results and deduplicate_layers
+    save_layer_results = save_results and not deduplicate_layers
+    stages = [
+        # Parse the ONNX Model into the workload
+        workload_parser_stage,
+        # Parse the accelerator module/passthrough given accelerator
+        AcceleratorParserStage if parse_inputs else None,
+        # Save the summed CME energy and latency to a json
+        SimpleSaveStage if save_results else None,
+        # Save all received CMEs in a list to a pickle file
+        PickleSaveStage if save_results else None,
+        # Save the results of all layers as rows of a columnar table
+        ColumnarSaveStage if save_results_table else None,
+        # Sum up the received best CME across all layers of the workload
+        SumStage,
+        # Search the lowest allowed memory level per operand per layer
+        SearchInterLayerDataLocalityStage if do_exploint_inter_layer_locality else None,
+        # Save the chosen loop ordering and memory hierarchy, and each processed layer to a json. If the layers are
+        # deduplicated, these are placed above the WorkloadStage so that the layers whose results are reused from an
+        # equivalent layer are saved as well.
+        VisualizationStage if save_complete_results else None,
+        CompleteSaveStage if save_complete_results else None,
+        # Iterate through the different layers in the workload
+        WorkloadStage,
+        # Save the chosen loop ordering and memory hierarchy
+        VisualizationStage if save_layer_results else None,
+        # Remove unused memories
+        ExploitInterLayerDataLocalityStage if do_exploint_inter_layer_locality else None,
+        # Save each processed layer to a json
+        CompleteSaveStage if save_layer_results else None,
+        # Reduce all CMEs, returning minimal energy/latency one (and the top-k or Pareto optimal ones, if requested)
+        layer_reduce_stage,
+        # Generate multiple spatial mappings (SM)
+        SpatialMappingGeneratorStage,
+        # Reduce all CMEs, returning minimal energy/latency one. Not used for the top-k and Pareto front, which span
+        # the temporal mappings of all spatial mappings.
+        opt_stage if reduce == "minimal" else None,
+        # Generate multiple temporal mappings (TM)
+        TemporalMappingGeneratorStage,
+        # Evaluate generated SM and TM through cost model
+        CostModelStage,
+    ]
+
+    stage_callables: list[StageCallable] = [s for s in stages if s is not None]
+    return stage_callables, reduce_criteria
+
+
 def get_hardware_performance_zigzag(
     workload: str | ModelProto,
     accelerator: str,
     mapping: str,
     *,
     opt: str = "latency",
+    reduce: str = "minimal",
+    reduce_top_k: int = 10,
     dump_folder: str = f"outputs/{datetime.now()}",
     pickle_filename: str | None = None,
+    results_table_path: str | None = None,
     lpf_limit: int = 6,
     nb_spatial_mappings_generated: int = 3,
     in_memory_compute: bool = False,
     exploit_data_locality: bool = False,
     enable_mix_spatial_mapping: bool = False,
+    nb_loma_workers: int = 1,
+    loma_branch_and_bound: bool = False,
+    cost_model_cache_path: str | None = None,
+    cost_model_cache_size: int = 100_000,
+    deduplicate_layers: bool = False,
+    n_workers: int = 1,
 ) -> (
     tuple[float, float, list[tuple[CostModelEvaluationABC, Any]]]
     | tuple[float, float, float, float, list[tuple[CostModelEvaluationABC, Any]]]
@@ -45,8 +154,17 @@ def get_hardware_performance_zigzag(
     @param accelerator Filepath to accelerator yaml file.
     @param mapping Filepath to mapping yaml file.
     @param opt Optimization criterion: either `energy`, `latency` or `EDP`.
+    @param reduce How the mappings of a layer are reduced: `minimal` keeps only the best mapping for `opt`, `top_k`
+        keeps the `reduce_top_k` best mappings (see `TopKStage`) and `pareto` keeps a front of at most `reduce_top_k`
+        mappings that are Pareto optimal (see `ParetoFrontStage`). The mappings are ranked on `opt`, then on energy and
+        latency, and the front spans these criteria, e.g. EDP, energy and latency if `opt` is `EDP`. In all cases, the
+        best mapping for `opt` is used for the results. The kept mappings are passed as extra_info of the best CME of
+        every layer.
+    @param reduce_top_k Max nb of mappings kept per layer if `reduce` is `top_k` or `pareto`.
     @param dump_folder Folder where outputs will be saved.
     @param pickle_filename Filename of pickle dump.
+    @param results_table_path Folder of a columnar results table with one row per layer, see `ResultsTable`. Not saved
+        if None.
     @param lpf_limit Determines the number of temporal unrollings that are evaluated.
     @param nb_spatial_mappings_generated Max nb of spatial mappings automatically generated (if not provided in
         mapping).
@@ -54,6 +172,21 @@ def get_hardware_performance_zigzag(
     @param exploit_data_locality Iff true, an attempt will be made to keep data in lower-level memory in between layers
     @param enable_mix_spatial_mapping Wether `mixed` spatial mappings will be generated, i.e. unrolling multiple Layer
         Dimensions in a single Operational Array Dimension.
+    @param nb_loma_workers Number of processes over which the temporal mapping search (LOMA) of each spatial mapping is
+        split. If `reduce` is `minimal`, every worker only returns the best CME for `opt` of its part of the search.
+        Otherwise, the workers return all evaluated CMEs in the serial order. The results are identical to the serial
+        search.
+    @param loma_branch_and_bound Prune the temporal mapping search with lower bounds on the energy of partial loop
+        orderings. Finds the same minimal energy as the exhaustive search. Only supported if `opt` is `energy`.
+    @param cost_model_cache_path Path of a persistent (sqlite) cache of cost model evaluations, shared between runs.
+        Identical evaluations are loaded from the cache instead of recomputed. Disabled if None.
+    @param cost_model_cache_size Max nb of evaluations kept in the cost model cache. The least recently used ones are
+        evicted first.
+    @param deduplicate_layers Iff true, the mapping search runs only once for every set of equivalent layers (same
+        dimensions, precisions, operand links and user mapping). The results are reused for the other layers of the set.
+    @param n_workers Number of processes over which the layers are evaluated (`nb_layer_workers` of `WorkloadStage`).
+        Contrary to `nb_loma_workers`, which splits the temporal mapping search of a single spatial mapping, every
+        process runs the whole mapping search of a layer. The results are identical to the serial evaluation.
     """
     pickle_filename = f"{dump_folder}/list_of_cmes.pickle" if pickle_filename is None else pickle_filename
 
@@ -62,63 +195,31 @@ def get_hardware_performance_zigzag(
     logging_format = "%(asctime)s - %(funcName)s +%(lineno)s - %(levelname)s - %(message)s"
     logging.basicConfig(level=logging_level, format=logging_format)
 
-    match opt:
-        case "energy":
-            opt_stage = MinimalEnergyStage
-        case "latency":
-            opt_stage = MinimalLatencyStage
-        case "EDP":
-            opt_stage = MinimalEDPStage
-        case _:
-            raise NotImplementedError("Optimization criterion 'opt' should be either 'energy' or 'latency' or 'EDP'.")
-
     # Check workload format and based on it select the correct workload parser stage
     workload_parser_stage = (
         ONNXModelParserStage
         if isinstance(workload, ModelProto) or (workload.split(".")[-1] == "onnx")
         else WorkloadParserStage
     )
+    stage_callables, reduce_criteria = get_zigzag_stages(
+        opt=opt,
+        reduce=reduce,
+        workload_parser_stage=workload_parser_stage,
+        save_results_table=results_table_path is not None,
+        in_memory_compute=in_memory_compute,
+        exploit_data_locality=exploit_data_locality,
+        enable_mix_spatial_mapping=enable_mix_spatial_mapping,
+        deduplicate_layers=deduplicate_layers,
+    )
+
+    if loma_branch_and_bound and opt != "energy":
+        raise ValueError("Branch-and-bound LOMA only bounds energy: it requires the optimization criterion 'energy'.")
+    if loma_branch_and_bound and reduce != "minimal":
+        raise ValueError("Branch-and-bound LOMA prunes the non-minimal mappings: it requires reduce 'minimal'.")
 
-    # Add stages to keep whole layers in lower level memory instead of rewriting to DRAM, if possible
-    do_exploint_inter_layer_locality = in_memory_compute or exploit_data_locality or enable_mix_spatial_mapping
     # Whether `mixed` mappings (e.g. `D1: {K:8, C:4}`) can be generated
     do_mix_spatial_mapping_generation = in_memory_compute or enable_mix_spatial_mapping
 
-    stages = [
-        # Parse the ONNX Model into the workload
-        workload_parser_stage,
-        # Parse the accelerator module/passthrough given accelerator
-        AcceleratorParserStage,
-        # Save the summed CME energy and latency to a json
-        SimpleSaveStage,
-        # Save all received CMEs in a list to a pickle file
-        PickleSaveStage,
-        # Sum up the received best CME across all layers of the workload
-        SumStage,
-        # Search the lowest allowed memory level per operand per layer
-        SearchInterLayerDataLocalityStage if do_exploint_inter_layer_locality else None,
-        # Iterate through the different layers in the workload
-        WorkloadStage,
-        # Save the chosen loop ordering and memory hierarchy
-        VisualizationStage,
-        # Remove unused memories
-        ExploitInterLayerDataLocalityStage if do_exploint_inter_layer_locality else None,
-        # Save each processed layer to a json
-        CompleteSaveStage,
-        # Reduce all CMEs, returning minimal energy/latency one
-        opt_stage,
-        # Generate multiple spatial mappings (SM)
-        SpatialMappingGeneratorStage,
-        # Reduce all CMEs, returning minimal energy/latency one
-        opt_stage,
-        # Generate multiple temporal mappings (TM)
-        TemporalMappingGeneratorStage,
-        # Evaluate generated SM and TM through cost model
-        CostModelStage,
-    ]
-
-    stage_callables: list[StageCallable] = [s for s in stages if s is not None]
-
     # Initialize the MainStage as entry point
     mainstage = MainStage(
         list_of_callables=stage_callables,
@@ -127,8 +228,19 @@ def get_hardware_performance_zigzag(
         mapping=mapping,
         dump_folder=dump_folder,
         pickle_filename=pickle_filename,
+        results_table_path=results_table_path,
+        reduce_top_k=reduce_top_k,
+        reduce_criteria=reduce_criteria,
         loma_lpf_limit=lpf_limit,
         loma_show_progress_bar=True,
+        loma_number_of_workers=nb_loma_workers,
+        loma_reduce_criterion=opt,
+        loma_keep_others=reduce != "minimal",
+        loma_branch_and_bound=loma_branch_and_bound,
+        cost_model_cache_path=cost_model_cache_path,
+        cost_model_cache_size=cost_model_cache_size,
+        deduplicate_layers=deduplicate_layers,
+        nb_layer_workers=n_workers,
         nb_mappings_generated=nb_spatial_mappings_generated,
         enable_mix_spatial_mapping_generation=do_mix_spatial_mapping_generation,
         # If we need access the same input data multiple times from the innermost memory level and the data size is
@@ -155,4 +267,3 @@ def get_hardware_performance_zigzag_imc(
 ) -> tuple[float, float, float, float, list[tuple[CostModelEvaluationABC, Any]]]:
     """Overload with type hint"""
     return get_hardware_performance_zigzag(*args, in_memory_compute=True)  # type: ignore
-
@@ -1,12 +1,115 @@
 import logging
 import os
 import subprocess
-from typing import Any
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
 
 import yaml
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # No inter-process locking on platforms without fcntl (Windows)
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+## Parameters that identify a simulated memory in the pool, apart from the memory type
+MemoryPoolKey = tuple[int, int, int, int, int, int, float]
+
+
+class CactiMemoryPool:
+    """! In-process index of a memory pool file with CACTI simulated memories.
+    The pool file is append-only: it is loaded once, after which only the entries appended since the last lookup (by
+    this or other processes) are parsed. The index maps the memory parameters to the entries per memory type, so
+    lookups take constant time. The file is locked while it is read or extended, so that concurrent parsers never see
+    or produce partially written entries.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.items: dict[MemoryPoolKey, dict[str, dict[str, Any]]] = {}
+        ## Number of bytes of the pool file that have been indexed
+        self.offset = 0
+        self.thread_lock = threading.RLock()
+
+    @staticmethod
+    def get_key(
+        size: int, r_bw: int, r_port: int, w_port: int, rw_port: int, bank: int, technology: float
+    ) -> MemoryPoolKey:
+        return (int(size), int(r_bw), int(r_port), int(w_port), int(rw_port), int(bank), float(technology))
+
+    @contextmanager
+    def locked(self, exclusive: bool = False) -> Iterator[None]:
+        """! Lock the pool file for this thread and, if supported, for other processes"""
+        with self.thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a", encoding="UTF-8") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self) -> None:
+        """! Index the entries that were added to the pool file since the last refresh. Must be called with the lock."""
+        if not os.path.exists(self.path):
+            return
+        file_size = os.path.getsize(self.path)
+        if file_size < self.offset:
+            # The file was rewritten: index it from scratch
+            self.items = {}
+            self.offset = 0
+        if file_size == self.offset:
+            return
+
+        with open(self.path, "r", encoding="UTF-8") as fp:
+            fp.seek(self.offset)
+            new_data = fp.read()
+            self.offset = fp.tell()
+
+        memory_pool: None | dict[str, dict[str, Any]] = yaml.full_load(new_data)
+        if memory_pool is None:
+            return
+        for instance in memory_pool.values():
+            key = self.get_key(
+                instance["size_bit"],
+                instance["IO_bus_width"],
+                instance["ex_rd_port"],
+                instance["ex_wr_port"],
+                instance["rd_wr_port"],
+                instance.get("bank_count", -1),
+                instance.get("technology", -1),
+            )
+            # The first simulation of a memory is kept, as with a linear scan of the file
+            self.items.setdefault(key, {}).setdefault(instance["memory_type"], instance)
+
+    def find(self, key: MemoryPoolKey, mem_type: str | None = None) -> dict[str, Any] | None:
+        """! Return the entry for the given parameters (and memory type, if given), or None if it is not in the pool"""
+        with self.locked():
+            self.refresh()
+            instances = self.items.get(key, {})
+            if mem_type is None:
+                return next(iter(instances.values()), None)
+            return instances.get(mem_type)
+
+
+## Memory pools that have been opened in this process, by path
+_memory_pools: dict[str, CactiMemoryPool] = {}
+_memory_pools_lock = threading.Lock()
+
+
+def get_memory_pool(path: str) -> CactiMemoryPool:
+    with _memory_pools_lock:
+        abs_path = os.path.abspath(path)
+        if abs_path not in _memory_pools:
+            _memory_pools[abs_path] = CactiMemoryPool(abs_path)
+        return _memory_pools[abs_path]
+
 
 class CactiParser:
     """!  Class that provides the interface between ZigZag and CACTI."""
@@ -32,36 +135,15 @@ class CactiParser:
         bank: int,
         technology: float,
         mem_pool_path: str = MEM_POOL_PATH,
+        mem_type: str | None = None,
     ) -> bool:
         """! This function checks whether the provided memory configuration was already used in the past.
         @param mem_pool_path  Path to cached cacti simulated memories
+        @param mem_type  Memory type to match. Any memory type matches if None.
         @return Return wether the requested memory item has been simulated before.
         """
-        with open(mem_pool_path, "r") as fp:  # pylint: disable=W1514
-            memory_pool: None | dict[str, dict[str, Any]] = yaml.full_load(fp)
-
-        if memory_pool is not None:
-            for instance in memory_pool:
-                io_bus_width = int(memory_pool[instance]["IO_bus_width"])
-                ex_rd_port = int(memory_pool[instance]["ex_rd_port"])
-                ex_wr_port = int(memory_pool[instance]["ex_wr_port"])
-                rd_wr_port = int(memory_pool[instance]["rd_wr_port"])
-                cache_size = int(memory_pool[instance]["size_bit"])
-                bank_count = int(memory_pool[instance].get("bank_count", -1))
-                tech = float(memory_pool[instance].get("technology", -1))
-
-                if (
-                    (size == cache_size)
-                    and (io_bus_width == r_bw)
-                    and (r_port == ex_rd_port)
-                    and (w_port == ex_wr_port)
-                    and (rw_port == rd_wr_port)
-                    and (bank_count == bank)
-                    and (tech == technology)
-                ):
-                    return True
-
-        return False
+        key = CactiMemoryPool.get_key(size, r_bw, r_port, w_port, rw_port, bank, technology)
+        return get_memory_pool(mem_pool_path).find(key, mem_type) is not None
 
     def create_item(
         self,
@@ -157,64 +239,40 @@ class CactiParser:
             size = new_size
             r_bw = new_r_bw
 
-        if not self.item_exists(
-            size,
-            r_bw,
-            r_port,
-            w_port,
-            rw_port,
-            bank,
-            technology,
-            mem_pool_path,
-        ):
-            self.create_item(
-                mem_type,
-                size,
-                r_bw,
-                r_port,
-                w_port,
-                rw_port,
-                bank,
-                technology,
-                mem_pool_path,
-                cacti_top_path,
-            )
-
-        with open(mem_pool_path, "r", encoding="UTF-8") as fp:
-            memory_pool: None | dict[str, dict[str, Any]] = yaml.full_load(fp)
-
-        if memory_pool is not None:
-            for instance in memory_pool:
-                io_bus_width = int(memory_pool[instance]["IO_bus_width"])
-                area = memory_pool[instance]["area"]
-                bank_count = int(memory_pool[instance]["bank_count"])
-                read_cost = memory_pool[instance]["cost"]["read_word"] * 1000
-                write_cost = memory_pool[instance]["cost"]["write_word"] * 1000
-                ex_rd_port = int(memory_pool[instance]["ex_rd_port"])
-                ex_wr_port = int(memory_pool[instance]["ex_wr_port"])
-                rd_wr_port = int(memory_pool[instance]["rd_wr_port"])
-                cache_size = int(memory_pool[instance]["size_bit"])
-                memory_type = memory_pool[instance]["memory_type"]
-                tech = float(memory_pool[instance].get("technology", -1))
-
-                if (
-                    (mem_type == memory_type)
-                    and (size == cache_size)
-                    and (io_bus_width == r_bw)
-                    and (r_port == ex_rd_port)
-                    and (w_port == ex_wr_port)
-                    and (rw_port == rd_wr_port)
-                    and (tech == technology)
-                    and (bank_count == bank)
-                ):
-                    logger.info(
-                        "Extracted memory costs with CACTI for %s: r_cost = %f, w_cost = %f, area = %f.",
-                        mem_name,
-                        read_cost,
-                        write_cost,
-                        area,
+        memory_pool = get_memory_pool(mem_pool_path)
+        key = CactiMemoryPool.get_key(size, r_bw, r_port, w_port, rw_port, bank, technology)
+        instance = memory_pool.find(key, mem_type)
+        if instance is None:
+            # Check again with the exclusive lock, as another parser might have simulated the memory in the meantime
+            with memory_pool.locked(exclusive=True):
+                memory_pool.refresh()
+                if memory_pool.items.get(key, {}).get(mem_type) is None:
+                    self.create_item(
+                        mem_type,
+                        size,
+                        r_bw,
+                        r_port,
+                        w_port,
+                        rw_port,
+                        bank,
+                        technology,
+                        mem_pool_path,
+                        cacti_top_path,
                     )
-                    return read_cost, write_cost, area
+            instance = memory_pool.find(key, mem_type)
+
+        if instance is not None:
+            area = instance["area"]
+            read_cost = instance["cost"]["read_word"] * 1000
+            write_cost = instance["cost"]["write_word"] * 1000
+            logger.info(
+                "Extracted memory costs with CACTI for %s: r_cost = %f, w_cost = %f, area = %f.",
+                mem_name,
+                read_cost,
+                write_cost,
+                area,
+            )
+            return read_cost, write_cost, area
 
         # should be never reached
         raise ModuleNotFoundError(
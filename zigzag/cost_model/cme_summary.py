@@ -0,0 +1,152 @@
+from typing import Any
+
+from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.datatypes import LayerDim, LayerOperand, UnrollFactor
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.workload.layer_node import LayerNode
+
+# Loops of each memory level of each operand, as in `TemporalMapping.mapping_dic_origin`, in hashable form
+TemporalMappingTuple = tuple[tuple[LayerOperand, tuple[tuple[tuple[LayerDim, UnrollFactor], ...], ...]], ...]
+
+
+def get_cme_area(cme: "CostModelEvaluation | CMESummary") -> float:
+    """! Area of the accelerator the CME was evaluated on: the sum of the memory areas and the operational array
+    area. For IMC CMEs this is the `area_total` computed by the cost model."""
+    if hasattr(cme, "area_total"):
+        return cme.area_total  # type: ignore
+    assert isinstance(cme, CostModelEvaluation)
+    mem_area = sum(mem_level.memory_instance.area for mem_level in cme.mem_level_list)
+    return mem_area + getattr(cme.accelerator.operational_array, "total_area", 0)
+
+
+class MappingFingerprint:
+    """! Inputs of a cost model evaluation, from which the CME can be rebuilt. The accelerator, layer and spatial
+    mappings are shared with the other evaluations of the same layer, only the temporal mapping is stored (compactly)
+    for every evaluation.
+    """
+
+    __slots__ = (
+        "cme_type",
+        "accelerator",
+        "layer",
+        "spatial_mapping",
+        "spatial_mapping_int",
+        "temporal_mapping",
+        "access_same_data_considered_as_no_access",
+    )
+
+    def __init__(
+        self,
+        cme_type: type[CostModelEvaluation],
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+        temporal_mapping: TemporalMappingTuple,
+        access_same_data_considered_as_no_access: bool,
+    ):
+        self.cme_type = cme_type
+        self.accelerator = accelerator
+        self.layer = layer
+        self.spatial_mapping = spatial_mapping
+        self.spatial_mapping_int = spatial_mapping_int
+        self.temporal_mapping = temporal_mapping
+        self.access_same_data_considered_as_no_access = access_same_data_considered_as_no_access
+
+    @staticmethod
+    def from_cme(cme: CostModelEvaluation) -> "MappingFingerprint":
+        temporal_mapping: TemporalMappingTuple = tuple(
+            (layer_op, tuple(tuple(loops) for loops in levels))
+            for layer_op, levels in cme.temporal_mapping.mapping_dic_origin.items()
+        )
+        return MappingFingerprint(
+            type(cme),
+            cme.accelerator,
+            cme.layer,
+            cme.spatial_mapping,
+            cme.spatial_mapping_int,
+            temporal_mapping,
+            cme.access_same_data_considered_as_no_access,
+        )
+
+    def rebuild(self) -> CostModelEvaluation:
+        """! Re-run the cost model evaluation with these inputs"""
+        temporal_mapping = TemporalMapping(
+            {layer_op: [list(loops) for loops in levels] for layer_op, levels in self.temporal_mapping}, self.layer
+        )
+        return self.cme_type(
+            accelerator=self.accelerator,
+            layer=self.layer,
+            spatial_mapping=self.spatial_mapping,
+            spatial_mapping_int=self.spatial_mapping_int,
+            temporal_mapping=temporal_mapping,
+            access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+        )
+
+
+class CMESummary:
+    """! Compact summary of a cost model evaluation: its scalar totals, the memory energy breakdown and the fingerprint
+    of its mapping. Summaries can be kept (or pickled) instead of the full CMEs, which hold the complete mapping and
+    data movement information. The full CME is rebuilt on demand with `get_cme`.
+    """
+
+    __slots__ = (
+        "fingerprint",
+        "energy_total",
+        "mac_energy",
+        "mem_energy",
+        "mem_energy_breakdown",
+        "latency_total0",
+        "latency_total1",
+        "latency_total2",
+        "ideal_cycle",
+        "ideal_temporal_cycle",
+        "mac_spatial_utilization",
+        "mac_utilization2",
+        "area_total",
+        "tclk",
+    )
+
+    def __init__(self, cme: CostModelEvaluation):
+        self.fingerprint = MappingFingerprint.from_cme(cme)
+        self.energy_total: float = cme.energy_total
+        self.mac_energy: float = cme.mac_energy
+        self.mem_energy: float = cme.mem_energy
+        self.mem_energy_breakdown: dict[LayerOperand, tuple[float, ...]] = {
+            layer_op: tuple(energies) for layer_op, energies in cme.mem_energy_breakdown.items()
+        }
+        self.latency_total0: float = cme.latency_total0
+        self.latency_total1: float = cme.latency_total1
+        self.latency_total2: float = cme.latency_total2
+        self.ideal_cycle: float = cme.ideal_cycle
+        self.ideal_temporal_cycle: float = cme.ideal_temporal_cycle
+        self.mac_spatial_utilization: float = cme.mac_spatial_utilization
+        self.mac_utilization2: float = cme.mac_utilization2
+        self.area_total: float = get_cme_area(cme)
+        # Only computed by the IMC cost model
+        self.tclk: float | None = getattr(cme, "tclk", None)
+
+    @property
+    def layer(self) -> LayerNode:
+        return self.fingerprint.layer
+
+    @property
+    def accelerator(self) -> Accelerator:
+        return self.fingerprint.accelerator
+
+    def get_cme(self) -> CostModelEvaluation:
+        """! Rebuild the full cost model evaluation"""
+        return self.fingerprint.rebuild()
+
+    def __str__(self):
+        return f"CMESummary({self.layer}, energy={self.energy_total:.3e}, latency={self.latency_total2:.3e})"
+
+    def __repr__(self):
+        return str(self)
+
+
+def summarize_cme(cme: Any) -> Any:
+    """! Summary of the given CME, or the given object itself if it is not a (layer) cost model evaluation"""
+    return CMESummary(cme) if isinstance(cme, CostModelEvaluation) else cme
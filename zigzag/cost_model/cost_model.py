@@ -2,13 +2,12 @@ import logging
 from abc import ABCMeta, abstractmethod
 from collections import defaultdict
 from functools import lru_cache
-from math import ceil
+from itertools import accumulate
+from math import ceil, lcm
 from typing import TypedDict
 
-import numpy as np
-
 from zigzag.cost_model.port_activity import PortActivity, PortBeginOrEndActivity
-from zigzag.datatypes import ArrayType, Constants, LayerOperand, MemoryOperand
+from zigzag.datatypes import Constants, LayerOperand, MemoryOperand
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.memory_level import MemoryLevel
 from zigzag.hardware.architecture.memory_port import MemoryPort
@@ -28,6 +27,48 @@ class MemoryUtilization(TypedDict):
     shared: dict[LayerOperand, list[float]]
 
 
+class CostModelSharedInputs:
+    """! Inputs of the cost model evaluation that only depend on the accelerator, the layer and the spatial mapping, and
+    not on the temporal mapping. Evaluations of many temporal mappings of the same layer can share one instance instead
+    of deriving these inputs again for every evaluation.
+    """
+
+    def __init__(
+        self,
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+    ):
+        self.accelerator = accelerator
+        self.layer = layer
+        self.spatial_mapping = spatial_mapping
+        self.spatial_mapping_int = spatial_mapping_int
+        self.mem_level_list = accelerator.memory_hierarchy.mem_level_list
+        self.mem_hierarchy_dict = accelerator.mem_hierarchy_dict
+        self.mem_size_dict = accelerator.mem_size_dict
+        self.mem_r_bw_dict, self.mem_w_bw_dict = accelerator.get_memory_bw_dict()
+        self.mem_r_bw_min_dict, self.mem_w_bw_min_dict = accelerator.get_memory_bw_min_dict()
+        self.mem_sharing_tuple = tuple(tuple(i.items()) for i in accelerator.mem_sharing_list)
+        ## The integer spatial mapping, rebuilt from its mapping dict for this layer
+        self.spatial_mapping_int_internal = SpatialMappingInternal(spatial_mapping_int.mapping_dict_origin, layer)
+
+    def matches(
+        self,
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+    ) -> bool:
+        """! Check if these shared inputs were derived from the given (identical) objects"""
+        return (
+            self.accelerator is accelerator
+            and self.layer is layer
+            and self.spatial_mapping is spatial_mapping
+            and self.spatial_mapping_int is spatial_mapping_int
+        )
+
+
 class CostModelEvaluationABC(metaclass=ABCMeta):
     """! Superclass for CostModelEvaluation and CumulativeCME"""
 
@@ -303,12 +344,15 @@ class CostModelEvaluation(CostModelEvaluationABC):
         spatial_mapping_int: SpatialMappingInternal,
         temporal_mapping: TemporalMapping,
         access_same_data_considered_as_no_access: bool = True,
+        shared_inputs: CostModelSharedInputs | None = None,
     ):
         """
         After initialization, the cost model evaluation is run
         @param accelerator the accelerator that includes the core on which to run the
         @param layer the layer to run
         @param access_same_data_considered_as_no_access (optional)
+        @param shared_inputs (optional) the temporal mapping-invariant inputs, derived from the same accelerator,
+        layer and spatial mappings. Computed for this evaluation only if None.
         """
         self.accelerator = accelerator
         self.layer: LayerNode = layer
@@ -317,12 +361,16 @@ class CostModelEvaluation(CostModelEvaluationABC):
         self.temporal_mapping = temporal_mapping
         self.access_same_data_considered_as_no_access = access_same_data_considered_as_no_access
 
-        self.mem_level_list = accelerator.memory_hierarchy.mem_level_list
-        self.mem_hierarchy_dict = accelerator.mem_hierarchy_dict
-        self.mem_size_dict = accelerator.mem_size_dict
-        self.mem_r_bw_dict, self.mem_w_bw_dict = accelerator.get_memory_bw_dict()
-        self.mem_r_bw_min_dict, self.mem_w_bw_min_dict = accelerator.get_memory_bw_min_dict()
-        self.mem_sharing_tuple = tuple(tuple(i.items()) for i in accelerator.mem_sharing_list)
+        if shared_inputs is None:
+            shared_inputs = CostModelSharedInputs(accelerator, layer, spatial_mapping, spatial_mapping_int)
+        assert shared_inputs.matches(accelerator, layer, spatial_mapping, spatial_mapping_int)
+        self.mem_level_list = shared_inputs.mem_level_list
+        self.mem_hierarchy_dict = shared_inputs.mem_hierarchy_dict
+        self.mem_size_dict = shared_inputs.mem_size_dict
+        self.mem_r_bw_dict, self.mem_w_bw_dict = shared_inputs.mem_r_bw_dict, shared_inputs.mem_w_bw_dict
+        self.mem_r_bw_min_dict = shared_inputs.mem_r_bw_min_dict
+        self.mem_w_bw_min_dict = shared_inputs.mem_w_bw_min_dict
+        self.mem_sharing_tuple = shared_inputs.mem_sharing_tuple
         self.memory_operand_links = layer.memory_operand_links
 
         self.cumulative_layer_ids: list[int] = []  # In case the CME results from adding other CMEs together
@@ -340,7 +388,7 @@ class CostModelEvaluation(CostModelEvaluationABC):
         )
         self.mapping_int = Mapping(
             self.accelerator,
-            self.spatial_mapping_dict_int,
+            shared_inputs.spatial_mapping_int_internal,
             self.temporal_mapping,
             self.layer,
             self.access_same_data_considered_as_no_access,
@@ -382,7 +430,9 @@ class CostModelEvaluation(CostModelEvaluationABC):
         Pre-process the port_duty_list to generate input_dict, which looks like:
         - input_dict = {'O1': {'P': 3, 'A': 1, 'PC': 8}, 'O2': {'P': 6, 'A': 2, 'PC': 4},
         'O3': {'P': 12, 'A': 4, 'PC': 2}}
-        # TODO clean up
+
+        The union within the largest period is counted on the periodic intervals directly, instead of on a
+        cycle-by-cycle indicator array, so that the cost does not scale with the period length.
         """
 
         input_dict: dict[str, dict[str, int]] = {}
@@ -405,14 +455,34 @@ class CostModelEvaluation(CostModelEvaluationABC):
                 max_period = values["P"]
                 max_period_operand = op
 
-        indicators: ArrayType = np.zeros((len(input_dict), max_period))
-        for i, op in enumerate(input_dict):
-            # reshape to period of this operand
-            indicators_reshape: ArrayType = indicators.reshape((len(input_dict), -1, input_dict[op]["P"]))
-            # fill in first few time units as used
-            indicators_reshape[i, :, : input_dict[op]["A"]] = 1
+        # Each MUW is periodic: the first A cycles of every period P. Sort on period, so that the hyperperiod of the
+        # first MUWs grows slowly (it is the largest period if every period divides the next one).
+        windows = sorted(
+            # Allowed cycles beyond the period (or negative) are clipped as a slice `[:A]` of the period would be
+            (values["P"], len(range(values["P"])[: values["A"]]))
+            for values in input_dict.values()
+        )
+        hyperperiods = list(accumulate((period for period, _ in windows), lcm))
+
+        @lru_cache(maxsize=None)
+        def nb_cycles_outside_windows(nb_windows: int, end: int) -> int:
+            """! Number of cycles in [0, end) that are not in the first `nb_windows` MUWs"""
+            if nb_windows == 0:
+                return end
+            hyperperiod = hyperperiods[nb_windows - 1]
+            if end > hyperperiod:
+                return (end // hyperperiod) * nb_cycles_outside_windows(
+                    nb_windows, hyperperiod
+                ) + nb_cycles_outside_windows(nb_windows, end % hyperperiod)
+            # Cycles after the MUW in each period of the last window, that are outside the lower windows
+            period, allowed = windows[nb_windows - 1]
+            return sum(
+                nb_cycles_outside_windows(nb_windows - 1, min(end, start + period))
+                - nb_cycles_outside_windows(nb_windows - 1, min(end, start + allowed))
+                for start in range(0, end, period)
+            )
 
-        union = max_period - int((~indicators.any(axis=0)).sum())
+        union = max_period - nb_cycles_outside_windows(len(windows), max_period)
 
         # Multiply with number of periods of largest period (as it was normalized to largest period)
         return union * input_dict[max_period_operand]["PC"]
@@ -0,0 +1,160 @@
+import logging
+from typing import Callable, Iterable
+
+import numpy as np
+from numpy.typing import NDArray
+
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelSharedInputs
+from zigzag.cost_model.cost_model_imc import CostModelEvaluationForIMC
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.hardware.architecture.imc_array import ImcArray
+from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.workload.layer_node import LayerNode
+
+logger = logging.getLogger(__name__)
+
+
+class CostModelBatch:
+    """! Cost model evaluations of many temporal mappings of the same (accelerator, layer, spatial mapping). The
+    temporal mapping-invariant inputs are derived once and shared by all evaluations. Every temporal mapping is still
+    evaluated by a full CME, but only the totals of every evaluation are kept, as arrays indexed like
+    `temporal_mappings`, together with the CMEs of the best temporal mappings. The full CMEs of the other temporal
+    mappings are evaluated again on demand by `get_cme`, and kept from then on.
+    """
+
+    # Keys of the CRITERIA, from the (energy, latency) totals of an evaluation. These are the same comparisons as in
+    # MinimalEnergyStage, MinimalLatencyStage and MinimalEDPStage: the first temporal mapping with the minimal key wins.
+    CRITERIA: dict[str, Callable[[float, float], tuple[float, ...]]] = {
+        "energy": lambda energy, latency: (energy, latency),
+        "latency": lambda energy, latency: (latency, energy),
+        "EDP": lambda energy, latency: (latency * energy,),
+    }
+
+    def __init__(
+        self,
+        *,
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+        access_same_data_considered_as_no_access: bool = True,
+    ):
+        self.access_same_data_considered_as_no_access = access_same_data_considered_as_no_access
+        self.shared_inputs = CostModelSharedInputs(accelerator, layer, spatial_mapping, spatial_mapping_int)
+        is_imc = isinstance(accelerator.operational_array, ImcArray)
+        self.cme_type: type[CostModelEvaluation] = CostModelEvaluationForIMC if is_imc else CostModelEvaluation
+
+        self.temporal_mappings: list[TemporalMapping] = []
+        self.energy_total: NDArray[np.float64] = np.empty(0)
+        self.mac_energy: NDArray[np.float64] = np.empty(0)
+        self.mem_energy: NDArray[np.float64] = np.empty(0)
+        self.latency_total0: NDArray[np.float64] = np.empty(0)
+        self.latency_total1: NDArray[np.float64] = np.empty(0)
+        self.latency_total2: NDArray[np.float64] = np.empty(0)
+        ## Index and key of the best temporal mapping so far, per criterion
+        self.best_indices: dict[str, int] = {}
+        self.best_keys: dict[str, tuple[float, ...]] = {}
+        ## Full CMEs of the best temporal mappings so far, per index
+        self.best_cmes: dict[int, CostModelEvaluation] = {}
+        ## Full CMEs that have been materialized on demand by `get_cme`, per index
+        self.cmes: dict[int, CostModelEvaluation] = {}
+
+    def evaluate(self, temporal_mappings: Iterable[TemporalMapping]) -> None:
+        """! Evaluate the given temporal mappings and append their totals to the arrays of this batch. Only the CMEs
+        of the best temporal mappings for the `CRITERIA` are kept, the others are dropped after evaluation.
+        """
+        totals: list[tuple[float, float, float, float, float, float]] = []
+        for temporal_mapping in temporal_mappings:
+            cme = self.create_cme(temporal_mapping)
+            index = len(self.temporal_mappings)
+            self.temporal_mappings.append(temporal_mapping)
+            totals.append(
+                (
+                    cme.energy_total,
+                    cme.mac_energy,
+                    cme.mem_energy,
+                    cme.latency_total0,
+                    cme.latency_total1,
+                    cme.latency_total2,
+                )
+            )
+            for criterion, key_func in self.CRITERIA.items():
+                key = key_func(cme.energy_total, cme.latency_total2)
+                if criterion not in self.best_keys or key < self.best_keys[criterion]:
+                    self.best_keys[criterion] = key
+                    self.best_indices[criterion] = index
+                    self.best_cmes[index] = cme
+            winners = self.best_indices.values()
+            self.best_cmes = {index: cme for index, cme in self.best_cmes.items() if index in winners}
+
+        if totals:
+            columns = np.array(totals, dtype=np.float64).T
+            self.energy_total = np.concatenate((self.energy_total, columns[0]))
+            self.mac_energy = np.concatenate((self.mac_energy, columns[1]))
+            self.mem_energy = np.concatenate((self.mem_energy, columns[2]))
+            self.latency_total0 = np.concatenate((self.latency_total0, columns[3]))
+            self.latency_total1 = np.concatenate((self.latency_total1, columns[4]))
+            self.latency_total2 = np.concatenate((self.latency_total2, columns[5]))
+        logger.debug("Evaluated %i temporal mappings of %s in a batch.", len(totals), self.layer)
+
+    @property
+    def layer(self) -> LayerNode:
+        return self.shared_inputs.layer
+
+    def __len__(self) -> int:
+        return len(self.temporal_mappings)
+
+    def create_cme(self, temporal_mapping: TemporalMapping) -> CostModelEvaluation:
+        shared = self.shared_inputs
+        return self.cme_type(
+            accelerator=shared.accelerator,
+            layer=shared.layer,
+            spatial_mapping=shared.spatial_mapping,
+            spatial_mapping_int=shared.spatial_mapping_int,
+            temporal_mapping=temporal_mapping,
+            access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+            shared_inputs=shared,
+        )
+
+    def get_best_index(self, criterion: str = "energy") -> int:
+        """! Index of the best temporal mapping for the given criterion ('energy', 'latency' or 'EDP')"""
+        if criterion not in self.CRITERIA:
+            raise ValueError(f"Invalid criterion {criterion}. Must be one of {list(self.CRITERIA.keys())}.")
+        if not self:
+            raise ValueError("No temporal mappings have been evaluated in this batch.")
+        return self.best_indices[criterion]
+
+    def get_cme(self, index: int) -> CostModelEvaluation:
+        """! Full CME of the temporal mapping at the given index. Re-evaluated if it was not kept."""
+        cme = self.best_cmes.get(index, self.cmes.get(index))
+        if cme is None:
+            cme = self.create_cme(self.temporal_mappings[index])
+            self.cmes[index] = cme
+        return cme
+
+    def get_best_cme(self, criterion: str = "energy") -> CostModelEvaluation:
+        return self.get_cme(self.get_best_index(criterion))
+
+
+def evaluate_temporal_mappings(
+    *,
+    accelerator: Accelerator,
+    layer: LayerNode,
+    spatial_mapping: SpatialMappingInternal,
+    spatial_mapping_int: SpatialMappingInternal,
+    temporal_mappings: Iterable[TemporalMapping],
+    access_same_data_considered_as_no_access: bool = True,
+) -> CostModelBatch:
+    """! Evaluate the cost model for all given temporal mappings of the same layer and spatial mapping at once.
+    @return the batch with the energy and latency totals of all temporal mappings, see `CostModelBatch`
+    """
+    batch = CostModelBatch(
+        accelerator=accelerator,
+        layer=layer,
+        spatial_mapping=spatial_mapping,
+        spatial_mapping_int=spatial_mapping_int,
+        access_same_data_considered_as_no_access=access_same_data_considered_as_no_access,
+    )
+    batch.evaluate(temporal_mappings)
+    return batch
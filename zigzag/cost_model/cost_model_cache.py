@@ -0,0 +1,272 @@
+import atexit
+import io
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import weakref
+from hashlib import sha256
+from typing import Any
+
+from zigzag import __version__
+from zigzag.cost_model.cost_model import CostModelEvaluationABC
+from zigzag.hardware.architecture.accelerator import Accelerator
+from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.workload.layer_node import LayerNode
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever a change to the cost model alters the results for identical inputs. All entries stored under a
+# different version are dropped when the cache is opened.
+COST_MODEL_CACHE_VERSION = f"{__version__}-1"
+
+
+# Live objects of the CME that is being loaded from the cache, see `loads_cme`
+_live_objects_on_load = threading.local()
+
+
+def _get_live_object(idx: int) -> Any:
+    return _live_objects_on_load.objects[idx]
+
+
+def dumps_cme(cme: CostModelEvaluationABC, live_objects: list[Any]) -> bytes:
+    """! Pickle the CME, storing references to the given live objects instead of copies. A dispatch table is used
+    rather than `persistent_id`, so that only objects of the live object types are handled in Python.
+    """
+    live_object_ids = {id(obj): idx for idx, obj in enumerate(live_objects)}
+
+    def reduce_live_object(obj: Any):
+        idx = live_object_ids.get(id(obj))
+        if idx is None:
+            return obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+        return _get_live_object, (idx,)
+
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = {type(obj): reduce_live_object for obj in live_objects}  # type: ignore
+    pickler.dump(cme)
+    return buffer.getvalue()
+
+
+def loads_cme(data: bytes, live_objects: list[Any]) -> CostModelEvaluationABC:
+    """! Inverse of `dumps_cme`: the references are re-attached to the given live objects"""
+    _live_objects_on_load.objects = live_objects
+    try:
+        return pickle.loads(data)
+    finally:
+        _live_objects_on_load.objects = None
+
+
+class CostModelCache:
+    """! Persistent, content-addressed cache of cost model evaluations, stored in a sqlite file.
+    An entry is keyed by the hash of the accelerator, the cost-relevant layer attributes, the spatial and temporal
+    mapping and the cost model version. When the cache holds more than `max_entries` entries, the least recently used
+    ones are evicted.
+    """
+
+    ## Number of cache hits after which their access times are written to the database
+    ACCESS_FLUSH_INTERVAL = 1000
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        """
+        @param path: Path of the sqlite file. Parent folders are created if needed.
+        @param max_entries: Maximal number of stored evaluations.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        ## Digests of the accelerators, per id, with a weak reference to the accelerator (to detect id reuse, without
+        ## keeping it alive) and the fingerprint of its state when the digest was computed
+        self.accelerator_digests: dict[int, tuple[weakref.ref[Accelerator], tuple[Any, ...], bytes]] = {}
+        ## Access times of the cache hits that are not yet written to the database
+        self.pending_accesses: dict[str, float] = {}
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.is_open = True
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS cme (key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS cme_last_access ON cme (last_access)")
+        self.invalidate_outdated_entries()
+        self.nb_entries: int = self.connection.execute("SELECT COUNT(*) FROM cme").fetchone()[0]
+        self.connection.commit()
+
+    def invalidate_outdated_entries(self) -> None:
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is not None and row[0] == COST_MODEL_CACHE_VERSION:
+            return
+        if row is not None:
+            logger.info("Cost model cache %s was created by version %s. Clearing it.", self.path, row[0])
+        self.connection.execute("DELETE FROM cme")
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (COST_MODEL_CACHE_VERSION,)
+        )
+
+    def get_accelerator_digest(self, accelerator: Accelerator) -> bytes:
+        """! Hash of the pickled accelerator. The digest is recomputed if the fingerprint of the accelerator changed
+        since it was last computed, e.g. because a memory instance was resized in place."""
+        fingerprint = self.get_accelerator_fingerprint(accelerator)
+        entry = self.accelerator_digests.get(id(accelerator))
+        if entry is None or entry[0]() is not accelerator or entry[1] != fingerprint:
+            digest = sha256(pickle.dumps(accelerator, protocol=pickle.HIGHEST_PROTOCOL)).digest()
+            accelerator_id = id(accelerator)
+            reference = weakref.ref(accelerator, lambda _: self.accelerator_digests.pop(accelerator_id, None))
+            self.accelerator_digests[accelerator_id] = (reference, fingerprint, digest)
+            return digest
+        return entry[2]
+
+    @staticmethod
+    def get_accelerator_fingerprint(accelerator: Accelerator) -> tuple[Any, ...]:
+        """! Cheap summary of the parts of the accelerator that can change during a run: the identity of its
+        components and the attributes of the memory instances."""
+        memory_levels = accelerator.memory_hierarchy.mem_level_list
+        return (
+            id(accelerator.operational_array),
+            id(accelerator.memory_hierarchy),
+            tuple(
+                (id(memory_level.memory_instance), *vars(memory_level.memory_instance).values())
+                for memory_level in memory_levels
+            ),
+        )
+
+    def get_key(
+        self,
+        cme_type: type,
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+        temporal_mapping: TemporalMapping,
+        access_same_data_considered_as_no_access: bool,
+    ) -> str:
+        """! Content hash of all inputs of a cost model evaluation"""
+        key = sha256(COST_MODEL_CACHE_VERSION.encode())
+        key.update(self.get_accelerator_digest(accelerator))
+        key.update(
+            repr(
+                (
+                    cme_type.__name__,
+                    access_same_data_considered_as_no_access,
+                    layer.get_cost_signature(),
+                    spatial_mapping.mapping_dict_origin,
+                    spatial_mapping_int.mapping_dict_origin,
+                    temporal_mapping.mapping_dic_origin,
+                )
+            ).encode()
+        )
+        return key.hexdigest()
+
+    @staticmethod
+    def get_live_objects(
+        accelerator: Accelerator,
+        layer: LayerNode,
+        spatial_mapping: SpatialMappingInternal,
+        spatial_mapping_int: SpatialMappingInternal,
+        temporal_mapping: TemporalMapping,
+    ) -> list[Any]:
+        """! Objects that a CME refers to but that are not owned by it. These are not stored in the cache."""
+        memory_levels = accelerator.memory_hierarchy.mem_level_list
+        return [
+            accelerator,
+            accelerator.operational_array,
+            accelerator.memory_hierarchy,
+            layer,
+            spatial_mapping,
+            spatial_mapping_int,
+            temporal_mapping,
+            *memory_levels,
+            *(memory_level.memory_instance for memory_level in memory_levels),
+        ]
+
+    def get(self, key: str, live_objects: list[Any]) -> CostModelEvaluationABC | None:
+        row = self.connection.execute("SELECT value FROM cme WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # The access times are only used to select the entries to evict, so they are written in batches
+        self.pending_accesses[key] = time.time()
+        if len(self.pending_accesses) >= CostModelCache.ACCESS_FLUSH_INTERVAL:
+            self.flush_accesses()
+            self.connection.commit()
+        return loads_cme(row[0], live_objects)
+
+    def flush_accesses(self) -> None:
+        """! Write the access times of the pending cache hits to the database (without committing)"""
+        if self.pending_accesses:
+            self.connection.executemany(
+                "UPDATE cme SET last_access = ? WHERE key = ?",
+                [(access_time, key) for key, access_time in self.pending_accesses.items()],
+            )
+            self.pending_accesses.clear()
+
+    def put(self, key: str, cme: CostModelEvaluationABC, live_objects: list[Any]) -> None:
+        cursor = self.connection.execute(
+            "INSERT OR REPLACE INTO cme (key, value, last_access) VALUES (?, ?, ?)",
+            (key, dumps_cme(cme, live_objects), time.time()),
+        )
+        self.nb_entries += cursor.rowcount
+        if self.nb_entries > self.max_entries:
+            self.evict()
+        self.flush_accesses()
+        self.connection.commit()
+
+    def evict(self) -> None:
+        """! Remove the least recently used entries until the cache holds at most `max_entries` entries"""
+        self.flush_accesses()
+        self.nb_entries = self.connection.execute("SELECT COUNT(*) FROM cme").fetchone()[0]
+        nb_to_remove = self.nb_entries - self.max_entries
+        if nb_to_remove > 0:
+            self.connection.execute(
+                "DELETE FROM cme WHERE key IN (SELECT key FROM cme ORDER BY last_access ASC LIMIT ?)",
+                (nb_to_remove,),
+            )
+            self.nb_entries -= nb_to_remove
+
+    def close(self) -> None:
+        """! Write the pending access times and close the database connection"""
+        if not self.is_open:
+            return
+        self.flush_accesses()
+        self.connection.commit()
+        self.connection.close()
+        self.is_open = False
+
+    def clear(self) -> None:
+        self.pending_accesses.clear()
+        self.connection.execute("DELETE FROM cme")
+        self.connection.commit()
+        self.nb_entries = 0
+
+
+# One open cache per (process, path): sqlite connections can not be shared with forked worker processes
+_open_caches: dict[tuple[int, str], CostModelCache] = {}
+
+
+def get_cost_model_cache(path: str, max_entries: int = 100_000) -> CostModelCache:
+    """! Return the open cache for the given path, or open it"""
+    cache_id = (os.getpid(), os.path.abspath(path))
+    if cache_id not in _open_caches or not _open_caches[cache_id].is_open:
+        _open_caches[cache_id] = CostModelCache(path, max_entries)
+    cache = _open_caches[cache_id]
+    cache.max_entries = max_entries
+    return cache
+
+
+@atexit.register
+def close_cost_model_caches() -> None:
+    """! Close the caches opened by this process, so that the access times of the last cache hits are saved"""
+    for (pid, _), cache in list(_open_caches.items()):
+        if pid == os.getpid():
+            cache.close()
+    _open_caches.clear()
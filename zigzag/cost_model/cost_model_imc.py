@@ -1,6 +1,6 @@
 import logging
 
-from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelSharedInputs
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.imc_array import ImcArray
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
@@ -39,6 +39,7 @@ class CostModelEvaluationForIMC(CostModelEvaluation):
         spatial_mapping_int: SpatialMappingInternal,
         temporal_mapping: TemporalMapping,
         access_same_data_considered_as_no_access: bool = True,
+        shared_inputs: CostModelSharedInputs | None = None,
     ):
         self.is_imc = True
         assert isinstance(accelerator.operational_array, ImcArray)
@@ -50,6 +51,7 @@ class CostModelEvaluationForIMC(CostModelEvaluation):
             spatial_mapping_int=spatial_mapping_int,
             temporal_mapping=temporal_mapping,
             access_same_data_considered_as_no_access=access_same_data_considered_as_no_access,
+            shared_inputs=shared_inputs,
         )
 
 
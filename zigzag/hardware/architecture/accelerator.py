@@ -46,9 +46,7 @@ class Accelerator:
 
     def get_memory_level(self, mem_op: MemoryOperand, mem_lv: int) -> MemoryLevel:
         """! Returns a specific memory level in the memory hierarchy for the memory operand"""
-        # Sort the nodes topologically and filter out all memories that don't store mem_op
-        memory = [node for node in self.memory_hierarchy.topological_sort() if mem_op in node.operands]
-        return memory[mem_lv]
+        return self.memory_hierarchy.get_memory_level(mem_op, mem_lv)
 
     def recalculate_memory_hierarchy_information(self) -> None:
         self.__generate_memory_hierarchy_dict()
@@ -63,44 +61,18 @@ class Accelerator:
         self.mem_r_bw_min_dict = {}
         self.mem_w_bw_min_dict = {}
         for mem_op in mem_operands:
-            self.mem_hierarchy_dict[mem_op] = [
-                node for node in self.memory_hierarchy.topological_sort() if mem_op in node.operands
-            ]
-            self.mem_size_dict[mem_op] = [
-                node.memory_instance.size
-                for node in self.memory_hierarchy.topological_sort()
-                if mem_op in node.operands
-            ]
-            self.mem_r_bw_dict[mem_op] = [
-                node.memory_instance.r_bw
-                for node in self.memory_hierarchy.topological_sort()
-                if mem_op in node.operands
-            ]
-            self.mem_w_bw_dict[mem_op] = [
-                node.memory_instance.w_bw
-                for node in self.memory_hierarchy.topological_sort()
-                if mem_op in node.operands
-            ]
-            self.mem_r_bw_min_dict[mem_op] = [
-                node.memory_instance.r_bw_min
-                for node in self.memory_hierarchy.topological_sort()
-                if mem_op in node.operands
-            ]
-            self.mem_w_bw_min_dict[mem_op] = [
-                node.memory_instance.w_bw_min
-                for node in self.memory_hierarchy.topological_sort()
-                if mem_op in node.operands
-            ]
+            memory_levels = self.memory_hierarchy.get_memory_levels(mem_op)
+            self.mem_hierarchy_dict[mem_op] = memory_levels
+            self.mem_size_dict[mem_op] = [node.memory_instance.size for node in memory_levels]
+            self.mem_r_bw_dict[mem_op] = [node.memory_instance.r_bw for node in memory_levels]
+            self.mem_w_bw_dict[mem_op] = [node.memory_instance.w_bw for node in memory_levels]
+            self.mem_r_bw_min_dict[mem_op] = [node.memory_instance.r_bw_min for node in memory_levels]
+            self.mem_w_bw_min_dict[mem_op] = [node.memory_instance.w_bw_min for node in memory_levels]
 
     def __generate_mem_sharing_list(self):
         """! Generates a list of dictionary that indicates which operand's which memory levels are sharing the same
         physical memory"""
-        self.mem_sharing_list = []
-        for mem_lv in self.mem_hierarchy_dict.values():
-            for mem in mem_lv:
-                operand_mem_share = mem.mem_level_of_operands
-                if len(operand_mem_share) > 1 and operand_mem_share not in self.mem_sharing_list:
-                    self.mem_sharing_list.append(operand_mem_share)
+        self.mem_sharing_list = self.memory_hierarchy.get_sharing_groups()
 
     def get_top_memory_instance(self, mem_op: MemoryOperand) -> MemoryInstance:
         if mem_op not in self.memory_hierarchy.get_operands():
@@ -1,7 +1,21 @@
 import logging
 import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import sha256
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
+## Costs returned by CACTI: access time (ns), area (mm^2), read cost (pJ/access), write cost (pJ/access)
+CactiCost = tuple[float, float, float, float]
+
+# Bump this whenever a change to `CactiService.run_cacti` alters the costs derived from the CACTI outputs
+CACTI_COST_CACHE_VERSION = "1"
+
 
 class CactiConfig:
     """Configuration for Cacti"""
@@ -400,18 +414,24 @@ class CactiConfig:
             f.write("".join(self.baseline_config))
             f.write("".join(user_config))
 
-    def call_cacti(self, path: str):
-        # os.system('./cacti -infile ./self_gen/cache.cfg')
-        # print('##########################################################################################')
-        # stream = os.popen('./cacti -infile %s' %path)
-        stream = os.popen(f"./cacti -infile {path} &> /dev/null")
-        # stream = os.popen('./cacti -infile %s' %path)
-        output = stream.readlines()
-        for x in output:
-            print(x, end="")
-        return output
-
-    def cacti_auto(self, user_input: list[Any], path: str):
+    def call_cacti(self, path: str, cacti_path: str = "."):
+        """! Run the CACTI binary in `cacti_path` on the given config file. CACTI reads its technology files relative to
+        its working directory, so it is started in `cacti_path`, without changing the working directory of this
+        process. CACTI writes its results to `{path}.out`.
+        """
+        completed = subprocess.run(
+            [os.path.join(os.path.abspath(cacti_path), "cacti"), "-infile", os.path.abspath(path)],
+            cwd=cacti_path,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+        if completed.returncode != 0:
+            raise ChildProcessError(
+                f"CACTI failed with return value {completed.returncode}: {completed.stderr.decode(errors='replace')}"
+            )
+
+    def cacti_auto(self, user_input: list[Any], path: str, cacti_path: str = "."):
         """
         user_input format can be 1 out of these 3:
         user_input = ['default']
@@ -425,7 +445,7 @@ class CactiConfig:
             for value in self.config_options.values():
                 user_config.append(value["string"] + str(value["default"]) + "\n")
             self.write_config(user_config, path)
-            self.call_cacti(path)
+            self.call_cacti(path, cacti_path)
 
         # use user defined value for each user defined parameter
         if user_input[0] == "single":
@@ -436,7 +456,7 @@ class CactiConfig:
                 else:
                     user_config.append(value["string"] + str(value["default"]) + "\n")
             self.write_config(user_config, path)
-            self.call_cacti(path)
+            self.call_cacti(path, cacti_path)
 
         if user_input[0] == "sweep":
             # produce non-sweeping term
@@ -454,7 +474,190 @@ class CactiConfig:
 
             for ii in range(len(user_config)):
                 self.write_config(user_config[ii], path)
-                self.call_cacti(path)
+                self.call_cacti(path, cacti_path)
+
+
+class CactiService:
+    """! Thread-safe interface to CACTI with a persistent result cache.
+    Every CACTI run uses its own temporary folder and the working directory of the process is never changed, so that
+    CACTI can be called concurrently. Identical requests that are in flight are only simulated once, and all results
+    are stored in a sqlite file, keyed on (technology, memory type, size, bandwidth) and the fingerprint of the CACTI
+    setup, so that results of another CACTI binary or configuration are never reused.
+    """
+
+    ## Name of the persistent cache, stored in the `self_gen` folder of CACTI
+    CACHE_FILENAME = "cacti_cost_cache.sqlite"
+
+    def __init__(self, cacti_path: str, cache_path: str | None = None):
+        """
+        @param cacti_path: the location of cacti
+        @param cache_path: path of the persistent result cache. Defaults to `{cacti_path}/self_gen/`
+        """
+        self.cacti_path = os.path.abspath(cacti_path)
+        self.self_gen_path = os.path.join(self.cacti_path, "self_gen")
+        os.makedirs(self.self_gen_path, exist_ok=True)
+        self.cache_path = os.path.join(self.self_gen_path, self.CACHE_FILENAME) if cache_path is None else cache_path
+
+        self.fingerprint = self.get_fingerprint()
+        self.lock = threading.Lock()
+        self.in_flight: dict[str, Future[CactiCost]] = {}
+        self.connection = sqlite3.connect(self.cache_path, timeout=60, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS cacti_cost (key TEXT PRIMARY KEY, access_time REAL, area REAL, r_cost REAL, "
+            "w_cost REAL)"
+        )
+        self.connection.commit()
+
+    def get_fingerprint(self) -> str:
+        """! Hash of the CACTI binary, the baseline configuration and `CACTI_COST_CACHE_VERSION`"""
+        fingerprint = sha256(CACTI_COST_CACHE_VERSION.encode())
+        config = CactiConfig()
+        fingerprint.update(repr((config.baseline_config, config.config_options)).encode())
+        binary_path = os.path.join(self.cacti_path, "cacti")
+        if os.path.isfile(binary_path):
+            with open(binary_path, "rb") as f:
+                fingerprint.update(f.read())
+        return fingerprint.hexdigest()
+
+    def get_key(self, tech_node: float, mem_type: str, mem_size_in_byte: float, bw: float) -> str:
+        return repr((self.fingerprint, float(tech_node), mem_type, float(mem_size_in_byte), float(bw)))
+
+    def get_cost(self, tech_node: float, mem_type: str, mem_size_in_byte: float, bw: float) -> CactiCost:
+        """! Return the CACTI cost of the memory, from the cache or, if it has not been simulated before, by running
+        CACTI. Concurrent calls with the same arguments wait for the same CACTI run.
+        """
+        key = self.get_key(tech_node, mem_type, mem_size_in_byte, bw)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT access_time, area, r_cost, w_cost FROM cacti_cost WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                return tuple(row)  # type: ignore
+            future = self.in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self.in_flight[key] = future
+
+        assert future is not None
+        if not is_owner:
+            return future.result()
+
+        try:
+            cost = self.run_cacti(tech_node, mem_type, mem_size_in_byte, bw)
+        except BaseException as exc:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(exc)
+            raise
+
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO cacti_cost VALUES (?, ?, ?, ?, ?)", (key, *cost))
+            self.connection.commit()
+            del self.in_flight[key]
+        future.set_result(cost)
+        return cost
+
+    def get_costs(
+        self, requests: list[tuple[float, str, float, float]], max_workers: int | None = None
+    ) -> list[CactiCost]:
+        """! Get the costs for many (tech_node, mem_type, mem_size_in_byte, bw) requests concurrently.
+        @param max_workers: number of concurrent CACTI processes. Defaults to the number of cores.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(lambda request: self.get_cost(*request), requests))
+
+    def run_cacti(self, tech_node: float, mem_type: str, mem_size_in_byte: float, bw: float) -> CactiCost:
+        """! Simulate the memory with CACTI 7.0"""
+        logger.info(
+            "Running CACTI for %s of %s bytes with bandwidth %s at %s um.", mem_type, mem_size_in_byte, bw, tech_node
+        )
+        # input parameters definition
+        if tech_node == 0.028:
+            tech = 0.032  # technology: 32 nm (corresponding VDD = 0.9)
+            scaling_factor = 0.9 * 0.9
+        else:
+            tech = tech_node
+            scaling_factor = 1
+        if mem_type == "dram":
+            mem = '"main memory"'
+        elif mem_type == "sram":
+            mem = '"ram"'
+        else:
+            msg = f"mem_type can only be dram or sram. Now it is: {mem_type}"
+            raise ValueError(msg)
+
+        # due to the growth of the area cost estimation from CACTI exceeds 1x when bw > 32, it will be set to 1x.
+        if bw > 32:  # adjust the setting for CACTI
+            rows = mem_size_in_byte * 8 / bw
+            line_size = int(32 / 8)
+            io_bus_width = 32
+            mem_size_in_byte_adjust = rows * 32 / 8
+        else:  # normal case
+            rows = mem_size_in_byte * 8 / bw
+            line_size = int(bw / 8)  # how many bytes on a row
+            io_bus_width = bw
+            mem_size_in_byte_adjust = mem_size_in_byte
+
+        with tempfile.TemporaryDirectory(dir=self.self_gen_path) as run_path:
+            config_path = os.path.join(run_path, "cache.cfg")
+            config = CactiConfig()
+            try:
+                config.cacti_auto(
+                    [
+                        "single",
+                        [
+                            ["technology", "cache_size", "line_size", "IO_bus_width", "mem_type"],
+                            [tech, mem_size_in_byte_adjust, line_size, io_bus_width, mem],
+                        ],
+                    ],
+                    config_path,
+                    self.cacti_path,
+                )
+                with open(f"{config_path}.out", "r", encoding="UTF-8") as f:
+                    raw_result = f.readlines()
+            except (ChildProcessError, FileNotFoundError) as exc:
+                msg = (
+                    f"CACTI failed. [current setting] rows: {rows}, bw: {bw}, mem size (byte): {mem_size_in_byte}. "
+                    "[CACTI minimal requirement] rows: >= 32, bw: >= 8, mem size (byte): >=64"
+                )
+                raise ChildProcessError(msg) from exc
+
+        # The first line holds the attribute names, the last line the values of the chosen organization
+        attribute_list = raw_result[0].split(",")
+        values = raw_result[-1].split(",")
+        result = {attribute: value for attribute, value in zip(attribute_list, values)}
+
+        # get required cost
+        access_time = scaling_factor * float(result[" Access time (ns)"])  # unit: ns
+        if bw > 32:
+            area = scaling_factor * float(result[" Area (mm2)"]) * 2 * bw / 32  # unit: mm2
+            r_cost = scaling_factor * float(result[" Dynamic read energy (nJ)"]) * bw / 32  # unit: nJ
+            w_cost = scaling_factor * float(result[" Dynamic write energy (nJ)"]) * bw / 32  # unit: nJ
+        else:
+            area = scaling_factor * float(result[" Area (mm2)"]) * 2  # unit: mm2
+            r_cost = scaling_factor * float(result[" Dynamic read energy (nJ)"])  # unit: nJ
+            w_cost = scaling_factor * float(result[" Dynamic write energy (nJ)"])  # unit: nJ
+
+        # round the value to avoid too long data representation
+        area = round(area, 7)  # keep 3 valid digits
+        r_cost *= 1000  # unit: pJ/access
+        w_cost *= 1000  # unit: pJ/access
+
+        return access_time, area, r_cost, w_cost
+
+
+# One service per CACTI location, shared by all threads of this process
+_cacti_services: dict[tuple[int, str], CactiService] = {}
+_cacti_services_lock = threading.Lock()
+
+
+def get_cacti_service(cacti_path: str) -> CactiService:
+    service_id = (os.getpid(), os.path.abspath(cacti_path))
+    with _cacti_services_lock:
+        if service_id not in _cacti_services:
+            _cacti_services[service_id] = CactiService(cacti_path)
+        return _cacti_services[service_id]
 
 
 def get_cacti_cost(
@@ -463,8 +666,7 @@ def get_cacti_cost(
     mem_type: str,
     mem_size_in_byte: float,
     bw: float,
-    hd_hash: str = "a",
-) -> tuple[float, float, float, float]:
+) -> CactiCost:
     """
     extract time, area, r_energy, w_energy cost from cacti 7.0
     :param cacti_path:          the location of cacti
@@ -473,105 +675,9 @@ def get_cacti_cost(
     :param mem_type:            memory type (sram or dram)
     :param mem_size_in_byte:    memory size (unit: byte)
     :param bw:                  memory IO bitwidth
-    :param hd_hash:             input file suffix when generating CACTI input file (useful and in avoid of file conflict
-        for multi-processing simulation)
     Attention: for CACTI, the minimum mem_size=64B, minimum_rows=32
     """
-
-    logging_level = logging.CRITICAL
-    logging_format = "%(asctime)s - %(funcName)s +%(lineno)s - %(levelname)s - %(message)s"
-    logging.basicConfig(level=logging_level, format=logging_format)
-
-    # get the current working directory
-    cwd = os.getcwd()
-
-    # change the working directory
-    os.chdir(cacti_path)
-
-    # input parameters definition
-    if tech_node == 0.028:
-        tech = 0.032  # technology: 32 nm (corresponding VDD = 0.9)
-        scaling_factor = 0.9 * 0.9
-    else:
-        tech = tech_node
-        scaling_factor = 1
-    if mem_type == "dram":
-        mem = '"main memory"'
-    elif mem_type == "sram":
-        mem = '"ram"'
-    else:
-        msg = f"mem_type can only be dram or sram. Now it is: {mem_type}"
-        raise ValueError(msg)
-
-    # due to the growth of the area cost estimation from CACTI exceeds 1x when bw > 32, it will be set to 1x.
-    if bw > 32:  # adjust the setting for CACTI
-        rows = mem_size_in_byte * 8 / bw
-        line_size = int(32 / 8)
-        io_bus_width = 32
-        mem_size_in_byte_adjust = rows * 32 / 8
-    else:  # normal case
-        rows = mem_size_in_byte * 8 / bw
-        line_size = int(bw / 8)  # how many bytes on a row
-        io_bus_width = bw
-        mem_size_in_byte_adjust = mem_size_in_byte
-
-    file_path = "./self_gen"  # location for input file (cache.cfg) and output file (cache.cfg.out)
-    os.makedirs(file_path, exist_ok=True)
-
-    config = CactiConfig()
-    config.cacti_auto(
-        [
-            "single",
-            [
-                ["technology", "cache_size", "line_size", "IO_bus_width", "mem_type"],
-                [tech, mem_size_in_byte_adjust, line_size, io_bus_width, mem],
-            ],
-        ],
-        f"{file_path}/cache_{hd_hash}.cfg",
-    )
-    # read out result
-    try:
-        f = open(f"{file_path}/cache_{hd_hash}.cfg.out", "r", encoding="UTF-8")
-    except:  # noqa: E722 # pylint: disable=W0702
-        msg = f"CACTI failed. [current setting] rows: {rows}, bw: {bw}, mem size (byte): {mem_size_in_byte}"
-        logging.critical(msg)
-        msg = "[CACTI minimal requirement] rows: >= 32, bw: >= 8, mem size (byte): >=64"
-        logging.critical(msg)
-        exit()
-    result: dict[str, Any] = {}
-    raw_result = f.readlines()
-    f.close()
-    for ii, each_line in enumerate(raw_result):
-        if ii == 0:
-            attribute_list = each_line.split(",")
-            for each_attribute in attribute_list:
-                result[each_attribute] = []
-        else:
-            for jj, each_value in enumerate(each_line.split(",")):
-                try:
-                    result[attribute_list[jj]].append(float(each_value))  # type: ignore
-                except IndexError:
-                    pass
-    # get required cost
-    access_time = scaling_factor * float(result[" Access time (ns)"][-1])  # unit: ns
-    if bw > 32:
-        area = scaling_factor * float(result[" Area (mm2)"][-1]) * 2 * bw / 32  # unit: mm2
-        r_cost = scaling_factor * float(result[" Dynamic read energy (nJ)"][-1]) * bw / 32  # unit: nJ
-        w_cost = scaling_factor * float(result[" Dynamic write energy (nJ)"][-1]) * bw / 32  # unit: nJ
-    else:
-        area = scaling_factor * float(result[" Area (mm2)"][-1]) * 2  # unit: mm2
-        r_cost = scaling_factor * float(result[" Dynamic read energy (nJ)"][-1])  # unit: nJ
-        w_cost = scaling_factor * float(result[" Dynamic write energy (nJ)"][-1])  # unit: nJ
-
-    # change back the working directory
-    os.chdir(cwd)
-
-    # round the value to avoid too long data representation
-    area = round(area, 7)  # keep 3 valid digits
-    r_cost *= 1000  # unit: pJ/access
-    w_cost *= 1000  # unit: pJ/access
-
-    return access_time, area, r_cost, w_cost
+    return get_cacti_service(cacti_path).get_cost(tech_node, mem_type, mem_size_in_byte, bw)
 
 
 def get_w_cost_per_weight_from_cacti(
@@ -1,5 +1,8 @@
 import logging
 import math
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any
 
 from zigzag.datatypes import OADimension
 from zigzag.hardware.architecture.imc_unit import ImcUnit
@@ -15,6 +18,23 @@ class ImcArray(ImcUnit):
         -- bit_serial_precision must be in the power of 2.
     """
 
+    # Attributes computed by the macro-level characterization, see `characterize`
+    CHARACTERIZATION_ATTRIBUTES: tuple[str, ...] = (
+        "tclk",
+        "tclk_breakdown",
+        "area",
+        "area_breakdown",
+        "cells_w_cost",
+        "tops_peak",
+        "topsw_peak",
+        "topsmm2_peak",
+    )
+    # Max nb of characterizations kept in `characterization_cache`
+    CHARACTERIZATION_CACHE_SIZE = 1_000
+    # Characterizations of the arrays constructed so far, indexed on `get_characterization_key`, from least to most
+    # recently used
+    characterization_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
     def __init__(
         self,
         is_analog_imc: bool,
@@ -36,6 +56,18 @@ class ImcArray(ImcUnit):
             dimension_sizes=dimension_sizes,
             auto_cost_extraction=auto_cost_extraction,
         )
+        self.characterize()
+
+    def characterize(self):
+        """! Compute the macro-level tclk, area and peak performance. Arrays with identical parameters share the
+        characterization, so these are only computed once per configuration (as long as it is kept in the cache)."""
+        key = self.get_characterization_key()
+        cache = ImcArray.characterization_cache
+        if key in cache:
+            cache.move_to_end(key)
+            self.set_characterization(cache[key])
+            return
+
         self.get_tclk()
         self.get_area()
         (
@@ -43,6 +75,34 @@ class ImcArray(ImcUnit):
             self.topsw_peak,
             self.topsmm2_peak,
         ) = self.get_macro_level_peak_performance()
+        cache[key] = self.get_characterization()
+        if len(cache) > self.CHARACTERIZATION_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    def get_characterization_key(self) -> str:
+        """! All parameters that determine the macro-level characterization"""
+        return repr(
+            (
+                type(self).__name__,
+                self.is_aimc,
+                self.bit_serial_precision,
+                self.activation_precision,
+                self.weight_precision,
+                self.adc_resolution,
+                self.cells_size,
+                self.cells_area,
+                self.auto_cost_extraction,
+                sorted((str(oa_dim), size) for oa_dim, size in self.dimension_sizes.items()),
+            )
+        )
+
+    def get_characterization(self) -> dict[str, Any]:
+        return {attr: deepcopy(getattr(self, attr)) for attr in self.CHARACTERIZATION_ATTRIBUTES}
+
+    def set_characterization(self, characterization: dict[str, Any]):
+        # Copy, since some breakdowns are updated in place afterwards
+        for attr, value in characterization.items():
+            setattr(self, attr, deepcopy(value))
 
     """
     I THINK THE ADC COST CAN STAY THE SAME FOR RERAM -> JUST USING NORMAL ADCs
@@ -2,7 +2,9 @@ import logging
 import math
 from typing import Any
 
-from zigzag.datatypes import OADimension
+import numpy as np
+
+from zigzag.datatypes import ArrayType, OADimension
 from zigzag.hardware.architecture.imc_array import ImcArray
 from zigzag.hardware.architecture.imc_unit import ImcUnit
 from zigzag.mapping.mapping import Mapping
@@ -16,11 +18,27 @@ NVM_ARRAY_TYPE_1T1R_PSEUDO_CROSSBAR = "1T1R_pseudo_crossbar"
 NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR = "2T2R_pseudo_crossbar"
 NVM_ARRAY_TYPE_2T2R = "2T2R"
 
+# Fields of the energy breakdown of get_energy_for_a_layer(), in the same order
+ENERGY_BREAKDOWN_FIELDS = ("cells", "wl_drivers", "bl_drivers", "dacs", "adcs", "adders_regular", "adders_pv")
+# Structured dtype of the batched energy breakdown: the breakdown fields and their sum
+ENERGY_BREAKDOWN_DTYPE = np.dtype([(field, np.float64) for field in ENERGY_BREAKDOWN_FIELDS + ("total",)])
+
+
 class ImcNvmArray(ImcArray):
     """
      Class for a Non-Volatile Memory (NVM) Compute-in-Memory (CiM) Array, specifically focusing on ReRAM.
     """
 
+    CHARACTERIZATION_ATTRIBUTES = ImcArray.CHARACTERIZATION_ATTRIBUTES + (
+        "c_wl_ff",
+        "c_blsl_ff",
+        "peak_energy",
+        "peak_energy_breakdown",
+        "tops_peak_bits",
+        "topsw_peak_bits",
+        "topsmm2_peak_bits",
+    )
+
     def __init__(
         self,
         is_analog_imc: bool,
@@ -87,13 +105,22 @@ class ImcNvmArray(ImcArray):
         # but such that the mapping still does what it is expected to do
 
         # Getting the performance characteristics
-        self.get_tclk()
-        self.get_area()
-        (
-            self.tops_peak,
-            self.topsw_peak,
-            self.topsmm2_peak,
-        ) = self.get_macro_level_peak_performance()
+        self.characterize()
+
+    def get_characterization_key(self) -> str:
+        # The read pulse is an output of the characterization (see get_tclk)
+        nvm_params = sorted((name, value) for name, value in self.ReRAM_param.items() if name != "t_read_pulse")
+        return repr((super().get_characterization_key(), nvm_params))
+
+    def get_characterization(self) -> dict[str, Any]:
+        characterization = super().get_characterization()
+        characterization["t_read_pulse"] = self.ReRAM_param["t_read_pulse"]
+        return characterization
+
+    def set_characterization(self, characterization: dict[str, Any]):
+        characterization = dict(characterization)
+        self.ReRAM_param["t_read_pulse"] = characterization.pop("t_read_pulse")
+        super().set_characterization(characterization)
 
     def print_peak_performance(self):
         """
@@ -598,62 +625,199 @@ class ImcNvmArray(ImcArray):
            This is similar to how it is done in the self.get_peak_energy_single_cycle() function,
            but it will be scaled to support the whole layer.
            This function is ONLY valid for AIMC, not for DIMC, as it doesn't make much sense for ReRAM and no validation was done.
+           The energy itself is evaluated by self.get_energy_for_mapped_dims(), for a single layer.
            Energies in dictionary are returned in picoJoules (pJ).
        """
-        # --- 0. Getting General Parameters ---
-        self.energy_breakdown = dict()
-
         # Workload Parameters Extraction
-        (   mapped_rows_total_per_macro,
+        (
+            mapped_rows_total_per_macro,
             _,
             mapped_cols_per_macro,
             macro_activation_times,  # normalized to only one imc macro
         ) = self.get_mapped_oa_dim(layer, self.wl_dim, self.bl_dim)
         self.mapped_rows_total_per_macro = mapped_rows_total_per_macro
+        energy_breakdown = self.get_energy_for_mapped_dims(
+            [mapped_rows_total_per_macro], [mapped_cols_per_macro], [macro_activation_times]
+        )[0]
+        self.energy_breakdown = {field: float(energy_breakdown[field]) for field in ENERGY_BREAKDOWN_FIELDS}
+        self.energy = float(energy_breakdown["total"])
+
+        num_cols_activated_max, reading_array_full_amount, num_cols_activated_partly, reading_array_partly_amount = (
+            self.get_read_cycles(mapped_cols_per_macro)
+        )
+        self.number_of_cycles_for_layer = int(reading_array_partly_amount + reading_array_full_amount)
+
+        # energy of accumulators (adder type: RCA), which is not part of the layer energy
         amount_of_repeating_macro = macro_activation_times * (self.activation_precision / self.bit_serial_precision)
+        if self.bit_serial_precision == self.activation_precision:  # No accumulator needed if no accumulation needs to happen (just 1 input cycle)
+            energy_accumulators = 0
+        else:
+            accumulator_output_precision = self.activation_precision + self.adc_resolution + self.weight_precision
+            # output precision from adders_pv + required shifted bits
+            # but only the same amount as adder_pv trees do actually switch
+            nb_of_1b_adder_accumulator = accumulator_output_precision * (
+                (num_cols_activated_max / (self.weight_precision / self.cells_size_nvm)) * reading_array_full_amount
+                + math.ceil(num_cols_activated_partly / float(self.weight_precision / self.cells_size_nvm))
+                * reading_array_partly_amount
+            )
+            # Assumption: accumulator is placed behind the adders_pv and accumulates for multiple input cycles!
+            nb_of_1b_reg_accumulator = nb_of_1b_adder_accumulator  # number of regs in an accumulator
+            energy_accumulators = (
+                self.get_1b_adder_energy() * nb_of_1b_adder_accumulator
+                + self.get_1b_reg_energy() * nb_of_1b_reg_accumulator
+            )
+        self.peak_energy_breakdown["accumulators"] = energy_accumulators * amount_of_repeating_macro
+
+        return self.energy_breakdown
+
+    def get_read_cycles(
+        self, mapped_cols_per_macro: ArrayType | float
+    ) -> tuple[float, ArrayType | float, ArrayType | float, ArrayType | float]:
+        """
+           Columns activated during one ADC quantization cycle for the mapped columns (in cells, not in weights):
+           (columns activated in a full read, amount of full reads, columns activated in the partial read,
+           amount of partial reads (0 or 1)).
+       """
         mapped_cols_per_macro_real = mapped_cols_per_macro * (self.weight_precision / self.cells_size_nvm)
+        num_cols_activated_max = self.bitline_amount / (
+            self.adc_share_factor * (self.weight_precision / self.cells_size_nvm)
+        )
+        reading_array_full_amount = np.floor(mapped_cols_per_macro_real / num_cols_activated_max)
+        num_cols_activated_partly = np.mod(mapped_cols_per_macro_real, num_cols_activated_max)
+        reading_array_partly_amount = (num_cols_activated_partly != 0) * 1.0
+        return num_cols_activated_max, reading_array_full_amount, num_cols_activated_partly, reading_array_partly_amount
 
-        # Rows and Columns activated:
-        num_rows_activated = mapped_rows_total_per_macro
-        num_cols_activated_max = ((self.bitline_amount /
-                               (self.adc_share_factor * (self.weight_precision / self.cells_size_nvm)))
-                               )  # During one quantization cycle
-        reading_array_full_amount = math.floor(mapped_cols_per_macro_real / num_cols_activated_max)
-        num_cols_activated_partly = mapped_cols_per_macro_real % num_cols_activated_max
-        reading_array_partly_amount = (1 if num_cols_activated_partly != 0 else 0)
+    def get_energy_for_layers(self, layers: list[LayerNode]) -> ArrayType:
+        """
+           Batched version of self.get_energy_for_a_layer() for many layers (or many spatial mappings of a layer).
+           Returns a structured array with ENERGY_BREAKDOWN_DTYPE, one entry per layer.
+           The cost model evaluates one layer at a time and uses the scalar path. This function is meant for quick
+           macro-level comparisons outside of the mapping search, e.g. the MAC energy of all layers of a workload on
+           a swept NVM array: `array.get_energy_for_layers(layers)["total"]`.
+       """
+        mapped_dims = np.array(
+            [self.get_mapped_oa_dim(layer, self.wl_dim, self.bl_dim) for layer in layers], dtype=np.float64
+        ).reshape(-1, 4)
+        return self.get_energy_for_mapped_dims(mapped_dims[:, 0], mapped_dims[:, 2], mapped_dims[:, 3])
+
+    def get_energy_for_mapped_dims(
+        self,
+        mapped_rows_total_per_macro: ArrayType | list[float],
+        mapped_cols_per_macro: ArrayType | list[float],
+        macro_activation_times: ArrayType | list[float],
+    ) -> ArrayType:
+        """
+           Closed-form, vectorized evaluation of self.get_energy_for_a_layer() for arrays of mapped rows, mapped columns
+           and macro activation times (as returned by self.get_mapped_oa_dim()).
+           Returns a structured array with ENERGY_BREAKDOWN_DTYPE, in picoJoules (pJ).
+           Contrary to self.get_energy_for_a_layer(), this function has no side effects on the attributes of the array.
+       """
+        num_rows_activated = np.asarray(mapped_rows_total_per_macro, dtype=np.float64)
+        mapped_cols_per_macro = np.asarray(mapped_cols_per_macro, dtype=np.float64)
+        macro_activation_times = np.asarray(macro_activation_times, dtype=np.float64)
+        energy_breakdown = np.zeros(num_rows_activated.shape, dtype=ENERGY_BREAKDOWN_DTYPE)
+
+        is_2t2r = self.nvm_array_type in (NVM_ARRAY_TYPE_2T2R, NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR)
+        is_pseudo_crossbar = self.nvm_array_type in (
+            NVM_ARRAY_TYPE_1T1R_PSEUDO_CROSSBAR,
+            NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR,
+        )
+        weight_cells = self.weight_precision / self.cells_size_nvm
+        amount_of_repeating_macro = macro_activation_times * (self.activation_precision / self.bit_serial_precision)
+
+        # Rows and Columns activated
+        num_cols_activated_max, reading_array_full_amount, num_cols_activated_partly, reading_array_partly_amount = (
+            self.get_read_cycles(mapped_cols_per_macro)
+        )
         num_all_active_cells_in_op_full = num_rows_activated * num_cols_activated_max
         num_all_active_cells_in_op_partly = num_rows_activated * num_cols_activated_partly
-
-        if (self.nvm_array_type == NVM_ARRAY_TYPE_2T2R
-                or self.nvm_array_type == NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR):  # 2 devices per cell
+        if is_2t2r:
             num_all_active_cells_in_op_full = 2 * num_all_active_cells_in_op_full
             num_all_active_cells_in_op_partly = 2 * num_all_active_cells_in_op_partly
 
-        self.number_of_cycles_for_layer = reading_array_partly_amount  +  reading_array_full_amount
-
-        # WLs and BLs that need to be driven (BLs in this are along the dimension of the ADCs (sometimes called SLs))
+        # WLs and BLs that need to be driven
         num_wl_to_drive = num_rows_activated
-        num_bl_to_drive_full = num_cols_activated_max
+        num_bl_to_drive_full = np.full(num_rows_activated.shape, num_cols_activated_max)
         num_bl_to_drive_partly = num_cols_activated_partly
-        if (self.nvm_array_type == NVM_ARRAY_TYPE_1T1R_PSEUDO_CROSSBAR
-                or self.nvm_array_type == NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR):  # BLs to drive along wl direction
-            num_bl_to_drive_full = num_wl_to_drive / float((reading_array_full_amount + reading_array_partly_amount))
-            num_bl_to_drive_partly = num_wl_to_drive / float((reading_array_full_amount + reading_array_partly_amount))
-        if (self.nvm_array_type == NVM_ARRAY_TYPE_2T2R
-                or self.nvm_array_type == NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR):  # 2 BLs per cell column/row
+        if is_pseudo_crossbar:
+            num_bl_to_drive_full = num_wl_to_drive / (reading_array_full_amount + reading_array_partly_amount)
+            num_bl_to_drive_partly = num_bl_to_drive_full
+        if is_2t2r:
             num_bl_to_drive_full = 2 * num_bl_to_drive_full
             num_bl_to_drive_partly = 2 * num_bl_to_drive_partly
 
-        # self.calculated_driver_info() has already been run (in self.get_area()) during initialization.
-        # Not needed to run again to get the average wl and bl capacitances
         c_wl_avg_f = self.c_wl_ff * (10 ** (-15))  # unit: F
         c_bl_avg_f = self.c_blsl_ff * (10 ** (-15))  # unit: F
 
-        # --- 1. ReRAM Array Read Current Energy ---
-        # Energy from current flowing through selected ReRAM cells during read
+        # 1. ReRAM Array Read Current Energy
+        e_read_one_cell_j = self.get_read_energy_one_cell()
+        total_array_cell_current_energy_j = (
+            num_all_active_cells_in_op_full * e_read_one_cell_j * reading_array_full_amount
+        ) + (num_all_active_cells_in_op_partly * e_read_one_cell_j * reading_array_partly_amount)
+        energy_breakdown["cells"] = total_array_cell_current_energy_j * 1e12 * amount_of_repeating_macro
+
+        # 2. Line Driver Energy (Dynamic CV^2)
+        alpha_switching = 0.5 * 2
+        if is_pseudo_crossbar and self.bit_serial_precision > 1:
+            alpha_switching = 0.75 * 2
+        beta_switching = 1.0 * 2
+        e_wl_drivers_j = alpha_switching * num_wl_to_drive * c_wl_avg_f * (self.ReRAM_param["V_wl_swing_read"] ** 2)
+        energy_breakdown["wl_drivers"] = e_wl_drivers_j * 1e12 * amount_of_repeating_macro
+        e_bl_drivers_j_full = (
+            beta_switching * num_bl_to_drive_full * c_bl_avg_f * (self.ReRAM_param["V_bl_swing_read"] ** 2)
+        )
+        e_bl_drivers_j_partly = (
+            beta_switching * num_bl_to_drive_partly * c_bl_avg_f * (self.ReRAM_param["V_bl_swing_read"] ** 2)
+        )
+        e_bl_drivers_j = (
+            e_bl_drivers_j_full * reading_array_full_amount + e_bl_drivers_j_partly * reading_array_partly_amount
+        )
+        energy_breakdown["bl_drivers"] = e_bl_drivers_j * 1e12 * amount_of_repeating_macro
+
+        # 3. DAC Energy
+        energy_breakdown["dacs"] = self.get_dac_cost()[2] * num_rows_activated * amount_of_repeating_macro
+
+        # 4. ADC Energy
+        adc_energy = self.get_adc_cost()[2]
+        total_adc_energy_pj = (adc_energy * num_cols_activated_max) * reading_array_full_amount + (
+            adc_energy * num_cols_activated_partly
+        ) * reading_array_partly_amount
+        energy_breakdown["adcs"] = total_adc_energy_pj * amount_of_repeating_macro
+
+        # 5. Digital Logic Energy: regular adder trees are only needed for DIMC, which is not modeled, and adder trees
+        # with place values (type: RCA)
+        energy_breakdown["adders_regular"] = 0
+        nb_inputs_of_adder_pv = weight_cells
+        if nb_inputs_of_adder_pv == 1:
+            nb_of_1b_adder_per_tree_pv = 0
+        else:
+            nb_of_1b_adder_per_tree_pv = self.adc_resolution * (nb_inputs_of_adder_pv - 1) + nb_inputs_of_adder_pv * (
+                math.log2(nb_inputs_of_adder_pv) - 0.5
+            )
+        energy_adders_pv_full = (
+            self.get_1b_adder_energy()
+            * nb_of_1b_adder_per_tree_pv
+            * (num_cols_activated_max / nb_inputs_of_adder_pv)
+            * reading_array_full_amount
+        )
+        energy_adders_pv_partly = (
+            self.get_1b_adder_energy()
+            * nb_of_1b_adder_per_tree_pv
+            * np.ceil(num_cols_activated_partly / float(nb_inputs_of_adder_pv))
+            * reading_array_partly_amount
+        )
+        energy_breakdown["adders_pv"] = (energy_adders_pv_full + energy_adders_pv_partly) * amount_of_repeating_macro
 
-        # Energy for one cell to be read (in Joules)
-        # Calculate average cell current for read if not pre-calculated
+        total = np.zeros(num_rows_activated.shape)
+        for field in ENERGY_BREAKDOWN_FIELDS:
+            total = total + energy_breakdown[field]
+        energy_breakdown["total"] = total
+        return energy_breakdown
+
+    def get_read_energy_one_cell(self) -> float:
+        """
+           Energy (in Joules) to read one ReRAM cell during one read pulse.
+       """
         i_cell_avg_read = 0
         if "G_LRS" in self.ReRAM_param and "G_HRS" in self.ReRAM_param:
             if not (self.ReRAM_param["G_LRS"] is None or self.ReRAM_param["G_HRS"] is None):
@@ -664,87 +828,7 @@ class ImcNvmArray(ImcArray):
                 i_cell_avg_read = (self.ReRAM_param["I_LRS"] + self.ReRAM_param["I_HRS"]) / 2.0
         else:
             raise ValueError("Missing LRS/HRS current or conductance in reram_params")
-
-        e_read_one_cell_j = (self.ReRAM_param["V_read"] * i_cell_avg_read * self.ReRAM_param["t_read_pulse"])
-
-        # Total energy for all active cells (in Joules)
-        total_array_cell_current_energy_j = ((num_all_active_cells_in_op_full * e_read_one_cell_j
-                                             * reading_array_full_amount)
-                                            + (num_all_active_cells_in_op_partly * e_read_one_cell_j
-                                             * reading_array_partly_amount))
-        self.energy_breakdown["cells"] = total_array_cell_current_energy_j * 1e12 * amount_of_repeating_macro  # Convert J to pJ
-
-        # --- 2. Line Driver Energy (Dynamic CV^2) ---
-        alpha_switching = 0.5 * 2  # charging and discharging after full computation
-        if ((self.nvm_array_type == NVM_ARRAY_TYPE_1T1R_PSEUDO_CROSSBAR
-             or self.nvm_array_type == NVM_ARRAY_TYPE_2T2R_PSEUDO_CROSSBAR) and
-            (self.bit_serial_precision > 1)):
-            alpha_switching = 0.75 * 2  # bitlines do most weighting rather than the wordlines
-        beta_switching = 1.0 * 2  # charging and discharging after one cycle
-
-        # WL Driver Energy -> Once at the start energy
-        e_wl_drivers_j = (alpha_switching * num_wl_to_drive *
-                          c_wl_avg_f * (self.ReRAM_param["V_wl_swing_read"] ** 2)) # just once until new inputs
-        self.energy_breakdown["wl_drivers"] = e_wl_drivers_j * 1e12 * amount_of_repeating_macro
-        # BL Driver Energy -> Every time a new BL will be used
-        e_bl_drivers_j_full = (beta_switching * num_bl_to_drive_full *
-                          c_bl_avg_f * (self.ReRAM_param["V_bl_swing_read"] ** 2))
-        e_bl_drivers_j_partly = (beta_switching * num_bl_to_drive_partly *
-                               c_bl_avg_f * (self.ReRAM_param["V_bl_swing_read"] ** 2))
-        e_bl_drivers_j = (e_bl_drivers_j_full * reading_array_full_amount +
-                          e_bl_drivers_j_partly * reading_array_partly_amount)
-        self.energy_breakdown["bl_drivers"] = e_bl_drivers_j * 1e12 * amount_of_repeating_macro
-
-        # --- 3. DAC Energy ---
-        total_dac_energy_pj = self.get_dac_cost()[2] * num_rows_activated
-        self.energy_breakdown["dacs"] = total_dac_energy_pj * amount_of_repeating_macro
-
-        # --- 4. ADC Energy ---
-        total_adc_energy_pj_full = self.get_adc_cost()[2] * num_cols_activated_max
-        total_adc_energy_pj_partly = self.get_adc_cost()[2] * num_cols_activated_partly
-        total_adc_energy_pj = (total_adc_energy_pj_full  * reading_array_full_amount
-                            + total_adc_energy_pj_partly * reading_array_partly_amount)
-        self.energy_breakdown["adcs"] = total_adc_energy_pj * amount_of_repeating_macro
-
-        # --- 5. Digital Logic Energy (Adders, Accumulators etc.) ---
-        self.energy_breakdown["adders_regular"] = 0
-
-        # energy of adder trees with place values (type: RCA) (AIMC case)
-        nb_inputs_of_adder_pv = self.weight_precision / self.cells_size_nvm  # amount of bitlines that give input
-        input_precision_pv = self.adc_resolution
-        if nb_inputs_of_adder_pv == 1:  # No adders_pv needed if no combining because of no multiple bitlines make a single output
-            nb_of_1b_adder_per_tree_pv = 0
-        else:
-            nb_of_1b_adder_per_tree_pv = input_precision_pv * (nb_inputs_of_adder_pv - 1) + nb_inputs_of_adder_pv * (
-                    math.log2(nb_inputs_of_adder_pv) - 0.5)
-        # Assumption: adders_pv are placed after ADCs and before accumulators, combining multiple ADC outputs to one!
-        energy_adders_pv_full = (self.get_1b_adder_energy() * nb_of_1b_adder_per_tree_pv
-                                * (num_cols_activated_max / nb_inputs_of_adder_pv)  * reading_array_full_amount)
-        energy_adders_pv_partly = (self.get_1b_adder_energy() * nb_of_1b_adder_per_tree_pv
-                                * (math.ceil(num_cols_activated_partly / float(nb_inputs_of_adder_pv))) * reading_array_partly_amount)
-        energy_adders_pv = energy_adders_pv_full + energy_adders_pv_partly
-        self.energy_breakdown["adders_pv"] = energy_adders_pv * amount_of_repeating_macro
-
-        # energy of accumulators (adder type: RCA)
-        if self.bit_serial_precision == self.activation_precision:  # No accumulator needed if no accumulation needs to happen (just 1 input cycle)
-            energy_accumulators = 0
-        else:
-            accumulator_output_precision = self.activation_precision + self.adc_resolution + self.weight_precision
-            # output precision from adders_pv + required shifted bits
-            # but only the same amount as adder_pv trees do actually switch
-            nb_of_1b_adder_accumulator = (accumulator_output_precision
-                * ((num_cols_activated_max / (self.weight_precision/self.cells_size_nvm) )
-                    * reading_array_full_amount
-                +   math.ceil((num_cols_activated_partly / float(self.weight_precision/self.cells_size_nvm)))
-                    * reading_array_partly_amount))
-            # Assumption: accumulator is placed behind the adders_pv and accumulates for multiple input cycles!
-            nb_of_1b_reg_accumulator = nb_of_1b_adder_accumulator  # number of regs in an accumulator
-            energy_accumulators = (self.get_1b_adder_energy() * nb_of_1b_adder_accumulator
-                                   + self.get_1b_reg_energy() * nb_of_1b_reg_accumulator)
-        self.peak_energy_breakdown["accumulators"] = energy_accumulators * amount_of_repeating_macro
-
-        self.energy = sum([v for v in self.energy_breakdown.values()])
-        return self.energy_breakdown
+        return self.ReRAM_param["V_read"] * i_cell_avg_read * self.ReRAM_param["t_read_pulse"]
 
     def __jsonrepr__(self):
         return json_repr_handler({"operational_unit: ImcNvmArray, dimensions": self.dimension_sizes})
\ No newline at end of file
@@ -1,5 +1,7 @@
 from collections import defaultdict
-from typing import Any
+from typing import Any, Iterator
+
+from typeguard import typeguard_ignore  # type: ignore
 
 from zigzag.datatypes import MemoryOperand
 from zigzag.hardware.architecture.memory_instance import MemoryInstance
@@ -9,6 +11,74 @@ from zigzag.hardware.architecture.operational_array import OperationalArrayABC
 from zigzag.utils import DiGraphWrapper, json_repr_handler
 
 
+class MemoryHierarchyIndex:
+    """! Lookup tables of a memory hierarchy, derived once from its graph. The tables are frozen: the index is rebuilt
+    (instead of updated) when a memory level is added to the hierarchy.
+    """
+
+    __slots__ = (
+        "topological_order",
+        "levels_per_operand",
+        "operand_top_level",
+        "operator_top_levels",
+        "top_memories",
+        "inner_memories",
+        "outer_memories",
+        "sharing_groups",
+    )
+
+    def __init__(self, memory_hierarchy: "MemoryHierarchy"):
+        ## Memory levels in bottom-up (topological) order
+        self.topological_order: tuple[MemoryLevel, ...] = tuple(DiGraphWrapper.topological_sort(memory_hierarchy))
+        ## Memory levels of each memory operand, innermost level first
+        self.levels_per_operand: dict[MemoryOperand, tuple[MemoryLevel, ...]] = {
+            mem_op: tuple(node for node in self.topological_order if mem_op in node.operands)
+            for mem_op in memory_hierarchy.nb_levels
+        }
+
+        ## Highest memory level of each memory operand, see `MemoryHierarchy.get_operand_top_level`
+        self.operand_top_level: dict[MemoryOperand, MemoryLevel] = {}
+        for mem_op, nb_levels in memory_hierarchy.nb_levels.items():
+            for mem in reversed(memory_hierarchy.mem_level_list):
+                if mem.mem_level_of_operands.get(mem_op) == nb_levels - 1:
+                    self.operand_top_level[mem_op] = mem
+                    break
+
+        # 'The' level of a MemoryLevel is the largest level it has across its assigned operands
+        level_to_mems: defaultdict[int, list[MemoryLevel]] = defaultdict(list)
+        operand_level_to_mems: dict[MemoryOperand, defaultdict[int, list[MemoryLevel]]] = {
+            mem_op: defaultdict(list) for mem_op in memory_hierarchy.nb_levels
+        }
+        for node in memory_hierarchy.node_list:
+            level = max(node.mem_level_of_operands.values())
+            level_to_mems[level].append(node)
+            for mem_op in node.operands:
+                operand_level_to_mems[mem_op][level].append(node)
+        ## Memory levels on the top level of each memory operand, and this top level
+        self.operator_top_levels: dict[MemoryOperand, tuple[tuple[MemoryLevel, ...], int]] = {}
+        for mem_op, operand_levels in operand_level_to_mems.items():
+            top_level = max(operand_levels.keys(), default=-1)
+            self.operator_top_levels[mem_op] = (tuple(operand_levels[top_level]), top_level)
+        ## Memory levels on the top level of the hierarchy, and this top level
+        top_level = max(level_to_mems.keys(), default=-1)
+        self.top_memories: tuple[tuple[MemoryLevel, ...], int] = (tuple(level_to_mems[top_level]), top_level)
+
+        self.inner_memories: tuple[MemoryLevel, ...] = tuple(
+            node for node, in_degree in memory_hierarchy.in_degree() if in_degree == 0
+        )
+        self.outer_memories: tuple[MemoryLevel, ...] = tuple(
+            node for node, out_degree in memory_hierarchy.out_degree() if out_degree == 0
+        )
+
+        ## Levels of the memory operands that share the same physical memory, one dict per shared memory
+        self.sharing_groups: list[dict[MemoryOperand, int]] = []
+        for levels in self.levels_per_operand.values():
+            for mem in levels:
+                operand_mem_share = mem.mem_level_of_operands
+                if len(operand_mem_share) > 1 and operand_mem_share not in self.sharing_groups:
+                    self.sharing_groups.append(operand_mem_share)
+
+
 class MemoryHierarchy(DiGraphWrapper[MemoryLevel]):
     """! Class that represents a memory hierarchy as a directed networkx graph.
     The memory hierarchy graph is directed, with the root nodes representing the lowest level
@@ -43,6 +113,8 @@ class MemoryHierarchy(DiGraphWrapper[MemoryLevel]):
         self.nb_levels: dict[MemoryOperand, int] = {}
         self.mem_level_list: list[MemoryLevel] = []
         self.memory_level_id = 0
+        # Lookup tables of the hierarchy, built on first use and invalidated by `add_memory`
+        self.__index: MemoryHierarchyIndex | None = None
 
     def add_memory(
         self,
@@ -104,12 +176,29 @@ class MemoryHierarchy(DiGraphWrapper[MemoryLevel]):
             # Add an edge from this sink node to the current node
             self.add_edge(sink_node, memory_level)
 
+        self.__index = None
+
+    @property
+    def index(self) -> MemoryHierarchyIndex:
+        """! Lookup tables of this memory hierarchy"""
+        if self.__index is None:
+            self.__index = MemoryHierarchyIndex(self)
+        return self.__index
+
+    @typeguard_ignore
+    def topological_sort(self) -> Iterator[MemoryLevel]:
+        """! Returns the memory levels in bottom-up order."""
+        return iter(self.index.topological_order)
+
     def get_memory_levels(self, mem_op: MemoryOperand) -> list[MemoryLevel]:
         """! Returns a list of memories in the memory hierarchy for the memory operand.
         The first entry in the returned list is the innermost memory level.
         """
-        # Sort the nodes topologically and filter out all memories that don't store mem_op
-        return [node for node in self.topological_sort() if mem_op in node.operands]
+        return list(self.index.levels_per_operand.get(mem_op, ()))
+
+    def get_memory_level(self, mem_op: MemoryOperand, mem_lv: int) -> MemoryLevel:
+        """! Returns the memory level of the memory operand at the given level, 0 being the innermost level."""
+        return self.index.levels_per_operand[mem_op][mem_lv]
 
     def get_operands(self) -> set[MemoryOperand]:
         """! Returns all the memory operands this memory hierarchy graph contains as a set."""
@@ -117,43 +206,39 @@ class MemoryHierarchy(DiGraphWrapper[MemoryLevel]):
 
     def get_inner_memories(self) -> list[MemoryLevel]:
         """! Returns the inner-most memory levels for all memory operands."""
-        return [node for node, in_degree in self.in_degree() if in_degree == 0]
+        return list(self.index.inner_memories)
 
     def get_outer_memories(self) -> list[MemoryLevel]:
         """! Returns the outer-most memory levels for all memory operands."""
-        return [node for node, out_degree in self.out_degree() if out_degree == 0]
+        return list(self.index.outer_memories)
 
     def get_top_memories(self) -> tuple[list[MemoryLevel], int]:
         """! Returns the 'top'-most MemoryLevels, where 'the' level of MemoryLevel is considered to be the largest
         level it has across its assigned operands
         @return (list_of_memories_on_top_level, top_level)
         """
-        level_to_mems: defaultdict[int, list[MemoryLevel]] = defaultdict(lambda: [])
-        for node in self.node_list:
-            level_to_mems[max(node.mem_level_of_operands.values())].append(node)
-        top_level = max(level_to_mems.keys())
-        return level_to_mems[top_level], top_level
+        top_memories, top_level = self.index.top_memories
+        return list(top_memories), top_level
 
     def get_operator_top_level(self, operand: MemoryOperand) -> tuple[list[MemoryLevel], int]:
         """! Finds the highest level of memories that have the given operand assigned to it, and returns the MemoryLevel
         instance on this level that have the operand assigned to it.
         'The' level of a MemoryLevel is considered to be the largest level it has across its assigned operands.
         """
-        level_to_mems: dict[int, list[MemoryLevel]] = defaultdict(lambda: [])
-        for node in self.node_list:
-            if operand in node.operands:
-                level_to_mems[max(node.mem_level_of_operands.values())].append(node)
-        top_level = max(level_to_mems.keys()) if level_to_mems else -1
-        return level_to_mems[top_level], top_level
+        top_memories, top_level = self.index.operator_top_levels.get(operand, ((), -1))
+        return list(top_memories), top_level
 
     def get_operand_top_level(self, operand: MemoryOperand) -> MemoryLevel:
         """! Finds the highest level of memory that have the given operand assigned to, and returns the MemoryLevel"""
-        top_lv = self.nb_levels[operand] - 1
-        for mem in reversed(self.mem_level_list):
-            if operand in mem.mem_level_of_operands.keys():
-                if mem.mem_level_of_operands[operand] == top_lv:
-                    return mem
-        raise ValueError(f"Operand {operand} not found in any of the memory instances.")
+        operand_top_level = self.index.operand_top_level
+        if operand not in operand_top_level:
+            raise ValueError(f"Operand {operand} not found in any of the memory instances.")
+        return operand_top_level[operand]
+
+    def get_sharing_groups(self) -> list[dict[MemoryOperand, int]]:
+        """! Returns the levels of the memory operands that share the same physical memory, one dict per memory level
+        that is shared by multiple operands."""
+        return list(self.index.sharing_groups)
 
     def __jsonrepr__(self):
         """! JSON Representation of this object to save it to a json file."""
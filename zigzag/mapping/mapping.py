@@ -1,4 +1,6 @@
 import math
+from itertools import accumulate
+from operator import mul
 
 import zigzag.mapping.mapping_assist_funcs as mapping_assist_funcs
 from zigzag.datatypes import Constants, LayerDim, LayerOperand, UnrollFactor
@@ -135,9 +137,10 @@ class Mapping:
         # True for yes, there is.
         output_arch_level = self.spatial_mapping.arch_level[output_operand]
         output_ir_flag = [False] * output_arch_level
+        output_ir_dims = frozenset(loop_dim_relevancy.get_ir_layer_dims(output_operand))
         for level, current_level_loops in enumerate(self.combined_mapping_dict_1s1t_reform[output_operand]):
             for loop_type, loop_dim in current_level_loops:
-                if loop_type in loop_dim_relevancy.get_ir_layer_dims(output_operand) and loop_dim > 1:
+                if loop_type in output_ir_dims and loop_dim > 1:
                     output_ir_flag[level] = True
                     break
         # reversely check from current level to the top level whether there is ir loop shows up in the middle,
@@ -164,92 +167,33 @@ class Mapping:
         self.data_precision_dict = data_precision_dict
 
     def gen_r_ir_loop_list(self):
-        """! Given the combined mapping, generate r/ir loop size list at each level for each operand
-        # TODO cleanup
-        """
-        combined_mapping = self.combined_mapping_dict_1s1t_reform
-        combined_mapping2 = self.combined_mapping_dict_1s2t_reform
+        """! Given the combined mapping, generate r/ir loop size list at each level for each operand"""
         relevancy_table = self.layer_node.pr_decoupled_relevancy_info
-        r_loop_size_per_level = {
-            op: [
-                math.prod(
-                    [
-                        lp_dim
-                        for lp_type, lp_dim in combined_mapping[op][lv]
-                        if lp_type in relevancy_table.get_r_layer_dims(op)
-                    ]
-                )
-                for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
-        }
-        r_loop_size_per_level2 = {
-            op: [
-                math.prod(
-                    [
-                        lp_dim
-                        for lp_type, lp_dim in combined_mapping2[op][lv]
-                        if lp_type in relevancy_table.get_r_layer_dims(op)
-                    ]
-                )
-                for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
-        }
-        ir_loop_size_per_level = {
-            op: [
-                math.prod(
-                    [
-                        lp_dim
-                        for lp_type, lp_dim in combined_mapping[op][lv]
-                        if lp_type in relevancy_table.get_ir_layer_dims(op)
-                    ]
-                )
-                for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
-        }
-        ir_loop_size_per_level2 = {
-            op: [
-                math.prod(
-                    [
-                        lp_dim
-                        for lp_type, lp_dim in combined_mapping2[op][lv]
-                        if lp_type in relevancy_table.get_ir_layer_dims(op)
-                    ]
-                )
-                for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
-        }
+        r_loop_size_per_level: dict[LayerOperand, list[UnrollFactor]] = {}
+        r_loop_size_per_level2: dict[LayerOperand, list[UnrollFactor]] = {}
+        ir_loop_size_per_level: dict[LayerOperand, list[UnrollFactor]] = {}
+        ir_loop_size_per_level2: dict[LayerOperand, list[UnrollFactor]] = {}
+        for op in self.operand_list:
+            r_dims = frozenset(relevancy_table.get_r_layer_dims(op))
+            ir_dims = frozenset(relevancy_table.get_ir_layer_dims(op))
+            nb_levels = self.spatial_mapping.arch_level[op]
+            r_loop_size_per_level[op], ir_loop_size_per_level[op] = self.calc_r_ir_loop_size_per_level(
+                self.combined_mapping_dict_1s1t_reform[op][:nb_levels], r_dims, ir_dims
+            )
+            r_loop_size_per_level2[op], ir_loop_size_per_level2[op] = self.calc_r_ir_loop_size_per_level(
+                self.combined_mapping_dict_1s2t_reform[op][:nb_levels], r_dims, ir_dims
+            )
 
         # current and below levels (cabl) r loop size
         r_loop_size_cabl = {
-            op: [
-                round(math.prod(r_loop_size_per_level[op][0 : lv + 1]))
-                for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
+            op: [round(size) for size in accumulate(r_loop_size_per_level[op], mul)] for op in self.operand_list
         }
         r_loop_size_cabl2 = {
-            op: [
-                round(math.prod(r_loop_size_per_level2[op][0 : lv + 1]))
-                for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
-        }
-        # current and below levels (cabl) ir loop size
-        ir_loop_size_cabl = {
-            op: [math.prod(ir_loop_size_per_level[op][0 : lv + 1]) for lv in range(self.spatial_mapping.arch_level[op])]
-            for op in self.operand_list
+            op: [round(size) for size in accumulate(r_loop_size_per_level2[op], mul)] for op in self.operand_list
         }
         # current and below levels (cabl) ir loop size
-        ir_loop_size_cabl2 = {
-            op: [
-                math.prod(ir_loop_size_per_level2[op][0 : lv + 1]) for lv in range(self.spatial_mapping.arch_level[op])
-            ]
-            for op in self.operand_list
-        }
+        ir_loop_size_cabl = {op: list(accumulate(ir_loop_size_per_level[op], mul)) for op in self.operand_list}
+        ir_loop_size_cabl2 = {op: list(accumulate(ir_loop_size_per_level2[op], mul)) for op in self.operand_list}
         # current and above levels (caal) ir loop size, only for output operand for calculating psum backflow access
         # count
         output_operand = self.layer_node.output_operand
@@ -270,6 +214,25 @@ class Mapping:
         self.ir_loop_size_cabl2 = ir_loop_size_cabl2
         self.output_ir_loop_size_caal = output_ir_loop_size_caal
 
+    @staticmethod
+    def calc_r_ir_loop_size_per_level(
+        levels: list[list[tuple[LayerDim, UnrollFactor]]], r_dims: frozenset[LayerDim], ir_dims: frozenset[LayerDim]
+    ) -> tuple[list[UnrollFactor], list[UnrollFactor]]:
+        """! Products of the r loop sizes and of the ir loop sizes at each level, in a single pass over the loops"""
+        r_loop_size_per_level: list[UnrollFactor] = []
+        ir_loop_size_per_level: list[UnrollFactor] = []
+        for loops in levels:
+            r_loop_size = 1
+            ir_loop_size = 1
+            for loop_type, loop_size in loops:
+                if loop_type in r_dims:
+                    r_loop_size *= loop_size
+                if loop_type in ir_dims:
+                    ir_loop_size *= loop_size
+            r_loop_size_per_level.append(r_loop_size)
+            ir_loop_size_per_level.append(ir_loop_size)
+        return r_loop_size_per_level, ir_loop_size_per_level
+
     def calc_data_size(self):
         """! Based on the r loop size list, calculate the data size held by each architectural level."""
         # data_elem_per_level_unrolled: data size held inside of each unrolled unit at each architectural level
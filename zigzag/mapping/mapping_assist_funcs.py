@@ -1,160 +1,132 @@
+import weakref
 from math import prod
 from typing import TypeAlias
 
 from zigzag.datatypes import LayerDim, LayerOperand, PrLoop, UnrollFactor
-from zigzag.utils import pickle_deepcopy
 from zigzag.workload.layer_attributes import LayerDimSizes
 from zigzag.workload.layer_node import LayerNode
 
 SpatialMappingPerMemLvl: TypeAlias = dict[LayerOperand, list[list[tuple[LayerDim, UnrollFactor | float]]]]
 
 
-def decouple_pr_loop(mapping_dict: SpatialMappingPerMemLvl, layer_node: "LayerNode") -> SpatialMappingPerMemLvl:
-    """! This function decouples the pr loops into data size (r loops) and data reuse (ir loops).
-    It also provides a transferred mapping dictionary in which the pr loops are replaced by r and ir loops.
-    # TODO cleanup
+class PrLoopDecoupler:
+    """! Decouples the pr loops of the mappings of one layer into r and ir loops, see `decouple_pr_loop`. The operand
+    loop lookups are built once per layer and the pr data dimension sizes are memoized, as the same partial pr loop
+    products recur in the mappings of a layer.
     """
 
-    relevancy_info = layer_node.loop_relevancy_info
-    r_ir_operand_loop_lut: dict[LayerOperand, list[LayerDim]] = {
-        layer_op: relevancy_info.get_r_layer_dims(layer_op) + relevancy_info.get_ir_layer_dims(layer_op)
-        for layer_op in layer_node.layer_operands
-    }
-    pr_operand_loop_lut: dict[LayerOperand, PrLoop] = {
-        layer_op: relevancy_info.get_pr_layer_dims(layer_op)
-        for layer_op in layer_node.layer_operands
-        if len(relevancy_info.get_pr_layer_dims(layer_op)) > 0
-    }
-
-    pr_operand_list = list(pr_operand_loop_lut.keys())
-    mapping_dict_reform: SpatialMappingPerMemLvl = pickle_deepcopy(mapping_dict)
-
-    # current and below level pr data size
-    cabl_pr_data_size: dict[LayerOperand, dict[LayerDim, list[list[float]]]] = {}
-    # current and below level pr data reuse
-    cabl_pr_data_reuse: dict[LayerOperand, dict[LayerDim, list[list[float]]]] = dict()
-
-    # each single pr loop data size
-    per_pr_data_size: dict[LayerOperand, dict[LayerDim, list[list[float]]]] = dict()
-    # each single pr loop data reuse
-    per_pr_data_reuse: dict[LayerOperand, dict[LayerDim, list[list[float]]]] = dict()
-
-    for operand in pr_operand_list:
-        # initialize current and below level pr loop size
-        cabl_pr_lp_size: dict[LayerDim, dict[LayerDim, UnrollFactor]] = {
-            pr_data_dim: {pr_loop_dim: 1 for pr_loop_dim in pr_operand_loop_lut[operand][pr_data_dim]}
-            for pr_data_dim in pr_operand_loop_lut[operand]
-        }
-
-        # initialize current and below level pr data size
-        cabl_pr_data_size[operand] = {
-            pr_data_dim: [[] for _ in range(len(mapping_dict[operand]))] for pr_data_dim in pr_operand_loop_lut[operand]
-        }
-
-        # initialize current and below level pr data reuse
-        cabl_pr_data_reuse[operand] = {
-            pr_data_dim: [[] for _ in range(len(mapping_dict[operand]))] for pr_data_dim in pr_operand_loop_lut[operand]
+    def __init__(self, layer_node: LayerNode):
+        ## Weak reference, so that the decoupler stored per layer in `_pr_loop_decouplers` does not keep it alive
+        self.layer_node: LayerNode = weakref.proxy(layer_node)
+        relevancy_info = layer_node.loop_relevancy_info
+        ## Relevant and irrelevant (i.e. not pr) loop dimensions of each operand
+        self.r_ir_dims: dict[LayerOperand, frozenset[LayerDim]] = {
+            layer_op: frozenset(relevancy_info.get_r_layer_dims(layer_op) + relevancy_info.get_ir_layer_dims(layer_op))
+            for layer_op in layer_node.layer_operands
         }
-
-        # initialize per pr loop data size
-        per_pr_data_size[operand] = {
-            pr_data_dim: [[] for _ in range(len(mapping_dict[operand]))] for pr_data_dim in pr_operand_loop_lut[operand]
+        ## Pr loop dimensions of each pr data dimension, for each operand with pr loops
+        self.pr_loops: dict[LayerOperand, PrLoop] = {
+            layer_op: relevancy_info.get_pr_layer_dims(layer_op)
+            for layer_op in layer_node.layer_operands
+            if len(relevancy_info.get_pr_layer_dims(layer_op)) > 0
         }
-
-        # initialize per pr loop data reuse
-        per_pr_data_reuse[operand] = {
-            pr_data_dim: [[] for _ in range(len(mapping_dict[operand]))]
-            for pr_data_dim in pr_operand_loop_lut[operand].keys()
+        ## Pr data dimensions that each pr loop dimension contributes to, for each operand with pr loops
+        self.pr_data_dims: dict[LayerOperand, dict[LayerDim, list[LayerDim]]] = {}
+        for layer_op, pr_loop in self.pr_loops.items():
+            self.pr_data_dims[layer_op] = {}
+            for pr_data_dim, pr_loop_dims in pr_loop.items():
+                for pr_loop_dim in pr_loop_dims:
+                    self.pr_data_dims[layer_op].setdefault(pr_loop_dim, []).append(pr_data_dim)
+        ## r and ir versions of the pr data dimensions
+        self.r_versions: dict[LayerDim, LayerDim] = {}
+        self.ir_versions: dict[LayerDim, LayerDim] = {}
+        for pr_loop in self.pr_loops.values():
+            for pr_data_dim in pr_loop:
+                self.r_versions[pr_data_dim] = pr_data_dim.create_r_version()
+                self.ir_versions[pr_data_dim] = pr_data_dim.create_ir_version()
+        ## Size of each pr data dimension, by the sizes of its pr loop dimensions
+        self.pr_data_dim_sizes: dict[tuple[LayerDim, tuple[UnrollFactor, ...]], UnrollFactor] = {}
+
+    def get_pr_data_dim_size(self, pr_data_dim: LayerDim, pr_loop_sizes: dict[LayerDim, UnrollFactor]) -> UnrollFactor:
+        """! Size of the pr data dimension, given the (current and below level) sizes of its pr loop dimensions"""
+        key = (pr_data_dim, tuple(pr_loop_sizes.values()))
+        if key not in self.pr_data_dim_sizes:
+            self.pr_data_dim_sizes[key] = self.layer_node.calc_tensor_dim(pr_data_dim, LayerDimSizes(pr_loop_sizes))
+        return self.pr_data_dim_sizes[key]
+
+    def decouple(self, mapping_dict: SpatialMappingPerMemLvl) -> SpatialMappingPerMemLvl:
+        """! Return the mapping in which every pr loop is replaced by an r loop (the growth of the pr data dimension
+        size) followed by an ir loop (the data reuse along the pr data dimension)."""
+        mapping_dict_reform: SpatialMappingPerMemLvl = {
+            layer_op: [list(loops) for loops in levels] for layer_op, levels in mapping_dict.items()
         }
-
-        # update the cabl_pr_lp_size by multiply pr loop size across architectural level
-        for level, loop_list in enumerate(mapping_dict[operand]):
-            for loop_type, loop_size in loop_list:
-                if loop_type in r_ir_operand_loop_lut[operand]:
-                    continue
-                for pr_data_dim in pr_operand_loop_lut[operand].keys():
-                    if any(lp_type == loop_type for lp_type in pr_operand_loop_lut[operand][pr_data_dim]):
-                        cabl_pr_lp_size[pr_data_dim][loop_type] *= loop_size
-
+        for operand, pr_loop in self.pr_loops.items():
+            r_ir_dims = self.r_ir_dims[operand]
+            pr_data_dims = self.pr_data_dims[operand]
+            # current and below level pr loop size
+            cabl_pr_lp_size: dict[LayerDim, dict[LayerDim, UnrollFactor]] = {
+                pr_data_dim: {pr_loop_dim: 1 for pr_loop_dim in pr_loop_dims}
+                for pr_data_dim, pr_loop_dims in pr_loop.items()
+            }
+            # current and below level pr data size and data reuse of the previous pr loop
+            previous_data_size: dict[LayerDim, UnrollFactor] = {pr_data_dim: 1 for pr_data_dim in pr_loop}
+            previous_data_reuse: dict[LayerDim, UnrollFactor] = {pr_data_dim: 1 for pr_data_dim in pr_loop}
+
+            levels_reform: list[list[tuple[LayerDim, UnrollFactor | float]]] = []
+            for loop_list in mapping_dict[operand]:
+                loops_reform: list[tuple[LayerDim, UnrollFactor | float]] = []
+                for loop in loop_list:
+                    loop_type, loop_size = loop
+                    if loop_type in r_ir_dims or loop_type not in pr_data_dims:
+                        loops_reform.append(loop)
+                        continue
+                    for nb_replaced, pr_data_dim in enumerate(pr_data_dims[loop_type]):
                         # compute pr related data dimension size and data dimension reuse at current and below joint
-                        # levels based on pr_funcs (dynamic functions extracted in LayerNode). Each pr loop is decoupled
-                        # into r and ir loops.
-                        pr_loop_combined_to_r = layer_node.calc_tensor_dim(
-                            pr_data_dim, LayerDimSizes(cabl_pr_lp_size[pr_data_dim])
+                        # levels based on pr_funcs (dynamic functions extracted in LayerNode). Each pr loop is
+                        # decoupled into r and ir loops.
+                        pr_loop_sizes = cabl_pr_lp_size[pr_data_dim]
+                        pr_loop_sizes[loop_type] *= loop_size
+                        pr_loop_combined_to_r = self.get_pr_data_dim_size(pr_data_dim, pr_loop_sizes)
+                        pr_loop_combined_to_ir = prod(pr_loop_sizes.values()) / pr_loop_combined_to_r
+                        # replace the pr loop in the mapping by r loop
+                        # NOTE: A pr loop of multiple pr data dimensions has its ir loop replaced by the r loop of the
+                        # next pr data dimension.
+                        if nb_replaced > 0:
+                            loops_reform.pop()
+                        loops_reform.append(
+                            (self.r_versions[pr_data_dim], pr_loop_combined_to_r / previous_data_size[pr_data_dim])
                         )
-                        pr_loop_combined_to_ir = prod(cabl_pr_lp_size[pr_data_dim].values()) / pr_loop_combined_to_r
-                        cabl_pr_data_size[operand][pr_data_dim][level].append(pr_loop_combined_to_r)
-                        cabl_pr_data_reuse[operand][pr_data_dim][level].append(pr_loop_combined_to_ir)
+                        # insert ir loop after the r loop
+                        # NOTE: Here we insert the ir loop after/above the r loop, which indicates that we ignore the
+                        # input FIFO effect during current level feeds data to below level. We could also insert the
+                        # ir loop before/below the r loop, which leads to more energy-efficient mapping if the
+                        # innermost ir loop merging down is enabled.
+                        loops_reform.append(
+                            (self.ir_versions[pr_data_dim], pr_loop_combined_to_ir / previous_data_reuse[pr_data_dim])
+                        )
+                        previous_data_size[pr_data_dim] = pr_loop_combined_to_r
+                        previous_data_reuse[pr_data_dim] = pr_loop_combined_to_ir
+                levels_reform.append(loops_reform)
+            mapping_dict_reform[operand] = levels_reform
 
-        # compute pr related data dimension size and data dimension reuse at each level for each pr loop
-        # based on cabl_pr_data_size/cabl_pr_data_reuse """
-        for pr_data_dim in cabl_pr_data_size[operand].keys():
-            data_size_list = cabl_pr_data_size[operand][pr_data_dim]
-            data_reuse_list = cabl_pr_data_reuse[operand][pr_data_dim]
-            previous_data_size = 1
-            previous_data_data_reuse = 1
-            for level, va_list in enumerate(data_size_list):
-                for idx in range(len(va_list)):
-                    per_pr_data_size[operand][pr_data_dim][level].append(
-                        data_size_list[level][idx] / previous_data_size
-                    )
-                    per_pr_data_reuse[operand][pr_data_dim][level].append(
-                        data_reuse_list[level][idx] / previous_data_data_reuse
-                    )
-                    previous_data_size = data_size_list[level][idx]
-                    previous_data_data_reuse = data_reuse_list[level][idx]
+        return mapping_dict_reform
 
-        mapping_dict_reform[operand] = replace_pr_loop_in_mapping(
-            mapping_dict[operand],
-            per_pr_data_size[operand],
-            per_pr_data_reuse[operand],
-            pr_operand_loop_lut[operand],
-            r_ir_operand_loop_lut[operand],
-        )
 
-    return mapping_dict_reform
+## Pr loop decoupler of every layer, dropped together with the layer
+_pr_loop_decouplers: "weakref.WeakKeyDictionary[LayerNode, PrLoopDecoupler]" = weakref.WeakKeyDictionary()
 
 
-def replace_pr_loop_in_mapping(
-    single_operand_mapping: list[list[tuple[LayerDim, UnrollFactor]]],
-    per_pr_data_size: dict[LayerDim, list[list[float]]],
-    per_pr_data_reuse: dict[LayerDim, list[list[float]]],
-    pr_operand_loop_lut: PrLoop,
-    r_ir_operand_loop_lut: list[LayerDim],
-) -> list[list[tuple[LayerDim, UnrollFactor]]]:
-    """! This function replaces all pr loops in a mapping of a single operand with r and ir loops."""
-    mapping_new: list[list[tuple[LayerDim, UnrollFactor]]] = pickle_deepcopy(single_operand_mapping)
+def get_pr_loop_decoupler(layer_node: LayerNode) -> PrLoopDecoupler:
+    """! Return the pr loop decoupler of the given layer (shared by all mappings of the layer)"""
+    decoupler = _pr_loop_decouplers.get(layer_node)
+    if decoupler is None:
+        decoupler = PrLoopDecoupler(layer_node)
+        _pr_loop_decouplers[layer_node] = decoupler
+    return decoupler
 
-    for level, loop_list in enumerate(single_operand_mapping):
-        # Introduce the current level pr loop index to distinguish different pr loops at the same architectural level
-        cl_pr_lp_idx_local = {pr_data_dim: 0 for pr_data_dim in pr_operand_loop_lut.keys()}
-        cl_pr_lp_idx_global = 0
-        for idx, (loop_type, _) in enumerate(loop_list):
-            if loop_type in r_ir_operand_loop_lut:
-                continue
-            for pr_data_dim in pr_operand_loop_lut.keys():
-                if any(lp_type == loop_type for lp_type in pr_operand_loop_lut[pr_data_dim]):
-                    # replace the pr loop in the mapping by r loop
-                    pr_idx_local = cl_pr_lp_idx_local[pr_data_dim]
-                    pr_idx_global = cl_pr_lp_idx_global
-                    mapping_new[level][idx + pr_idx_global] = (
-                        pr_data_dim.create_r_version(),
-                        per_pr_data_size[pr_data_dim][level][pr_idx_local],
-                    )
-                    # insert ir loop after the r loop
-                    # NOTE: Here we insert the ir loop after/above the r loop, which indicates that we ignore the input
-                    # FIFO effect during current level feeds data to below level. We could also insert the ir loop
-                    # before/below the r loop, which leads to more energy-efficient mapping if the innermost ir loop
-                    # merging down is enabled.
-                    mapping_new[level].insert(
-                        idx + pr_idx_global + 1,
-                        (
-                            pr_data_dim.create_ir_version(),
-                            per_pr_data_reuse[pr_data_dim][level][pr_idx_local],
-                        ),
-                    )
-                    # update the pr loop index
-                    cl_pr_lp_idx_local[pr_data_dim] += 1
-                    cl_pr_lp_idx_global += 1
 
-    return mapping_new
+def decouple_pr_loop(mapping_dict: SpatialMappingPerMemLvl, layer_node: "LayerNode") -> SpatialMappingPerMemLvl:
+    """! This function decouples the pr loops into data size (r loops) and data reuse (ir loops).
+    It also provides a transferred mapping dictionary in which the pr loops are replaced by r and ir loops.
+    """
+    return get_pr_loop_decoupler(layer_node).decouple(mapping_dict)
@@ -0,0 +1,94 @@
+from zigzag.cost_model.cost_model import CostModelEvaluationABC
+from zigzag.cost_model.cost_model_imc import CostModelEvaluationForIMC
+from zigzag.datatypes import LayerDim, LayerOperand, UnrollFactor
+from zigzag.opt.loma.memory_allocator import MemoryAllocator
+from zigzag.workload.layer_node import LayerNode
+
+# Loops allocated to the lowest memory levels of an operand and the loops merged down into them, which fix the energy
+# of these levels
+LevelsSignature = tuple[
+    int, tuple[tuple[tuple[LayerDim, UnrollFactor], ...], ...], tuple[tuple[LayerDim, UnrollFactor], ...]
+]
+
+
+class LomaEnergyBound:
+    """! Lower bound on the energy of all orderings that start with the same (innermost) loops, for branch-and-bound
+    LOMA.
+
+    The memory allocator reports how many leading loops of an ordering fix the loops allocated to each memory level.
+    The energy spent in the lowest memory levels of an operand, and in the transfers from the next level to these
+    levels, only depends on the loops of these levels (after merging the innermost irrelevant loops of each level down
+    to the level below), so it is identical for every ordering that allocates the same loops there. This energy is
+    learned from the evaluated orderings and summed over the operands to bound the energy of partial orderings. The
+    bound is exact by construction: it never exceeds the energy that the cost model computes for any ordering with the
+    given leading loops.
+    """
+
+    def __init__(self, layer: LayerNode):
+        self.layer = layer
+        self.ir_dims = {
+            layer_op: set(layer.loop_relevancy_info.get_ir_layer_dims(layer_op)) for layer_op in layer.layer_operands
+        }
+        ## Energy of the lowest memory levels of each operand, for each allocation of these levels
+        self.level_energies: dict[LayerOperand, dict[LevelsSignature, float]] = {
+            layer_op: {} for layer_op in layer.layer_operands
+        }
+        ## Energy that is the same for all orderings: the MAC energy, except for IMC (which depends on the mapping)
+        self.fixed_energy = 0.0
+
+    def get_signatures(
+        self, allocator: MemoryAllocator, nb_fixed_loops: int
+    ) -> dict[LayerOperand, list[LevelsSignature]]:
+        """! For each operand, the signatures of the sets of lowest memory levels whose energy is fixed by the first
+        `nb_fixed_loops` loops of the allocated ordering, from the largest to the smallest set.
+        The memory levels below level m are fixed if their loops are fixed and if the loops that are merged down into
+        them are known. These are the irrelevant loops that directly follow them in the ordering, up to the first
+        relevant loop: wherever these are allocated, they end up at the top of level m - 1, and the relevant loop stops
+        the merge-down of the loops above it.
+        """
+        ordering = allocator.ordering
+        signatures: dict[LayerOperand, list[LevelsSignature]] = {}
+        for mem_op, nb_required_loops in allocator.nb_required_loops.items():
+            layer_op = allocator.mem_to_layer_op[mem_op]
+            levels = allocator.temporal_mapping_dict[layer_op]
+            ir_dims = self.ir_dims[layer_op]
+            nb_fixed_levels = len([nb for nb in nb_required_loops if nb <= nb_fixed_loops])
+            signatures[layer_op] = []
+            nb_loops_below = sum(len(loops) for loops in levels[:nb_fixed_levels])
+            for nb_levels in reversed(range(min(nb_fixed_levels, len(levels) - 1) + 1)):
+                # Find the first relevant loop above these levels
+                idx = nb_loops_below
+                while idx < nb_fixed_loops and ordering[idx][0] in ir_dims:
+                    idx += 1
+                if idx < nb_fixed_loops:
+                    lower_levels = tuple(tuple(loops) for loops in levels[:nb_levels])
+                    merged_loops = tuple(ordering[nb_loops_below:idx])
+                    signatures[layer_op].append((nb_levels, lower_levels, merged_loops))
+                if nb_levels > 0:
+                    nb_loops_below -= len(levels[nb_levels - 1])
+        return signatures
+
+    def record(self, allocator: MemoryAllocator, cme: CostModelEvaluationABC) -> None:
+        """! Learn the energy of the lowest memory levels from the evaluation of a full ordering"""
+        if not isinstance(cme, CostModelEvaluationForIMC):
+            self.fixed_energy = cme.mac_energy
+        for layer_op, signatures in self.get_signatures(allocator, len(allocator.ordering)).items():
+            for signature in signatures:
+                if signature not in self.level_energies[layer_op]:
+                    nb_levels = signature[0]
+                    # The data transfers between level m and the levels below only depend on the levels below
+                    transfers_to_below = cme.mem_energy_breakdown_further[layer_op][nb_levels]
+                    self.level_energies[layer_op][signature] = (
+                        sum(cme.mem_energy_breakdown[layer_op][:nb_levels])
+                        + transfers_to_below.rd_out_to_low
+                        + transfers_to_below.wr_in_by_low
+                    )
+
+    def get_bound(self, allocator: MemoryAllocator, nb_fixed_loops: int) -> float:
+        """! Lower bound on the energy of all orderings that start with the first `nb_fixed_loops` loops of the
+        allocated ordering"""
+        bound = self.fixed_energy
+        for layer_op, signatures in self.get_signatures(allocator, nb_fixed_loops).items():
+            level_energies = self.level_energies[layer_op]
+            bound += next((level_energies[sig] for sig in signatures if sig in level_energies), 0.0)
+        return bound
@@ -1,17 +1,22 @@
 import logging
 import operator
-from math import factorial
+from itertools import islice
+from math import ceil, factorial
 from typing import Any, Generator
 
 import numpy as np
 from sympy.ntheory import factorint  # type: ignore
 from tqdm import tqdm
 
+from zigzag.cost_model.cost_model import CostModelEvaluationABC
 from zigzag.datatypes import LayerDim, UnrollFactor
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.opt.loma.energy_bound import LomaEnergyBound
+from zigzag.opt.loma.loop import LoopEncoding
 from zigzag.opt.loma.memory_allocator import (
+    LoopPrefixTrie,
     MemoryAllocator,
     MemoryHierarchyTooSmallException,
     MemoryTooSmallException,
@@ -19,7 +24,6 @@ from zigzag.opt.loma.memory_allocator import (
 from zigzag.opt.loma.multipermute import (
     PermutationConstraint,
     StaticPositionsAndSizesConstraint,
-    constrainded_permutations,
     permutations,
 )
 from zigzag.workload.layer_node import LayerNode
@@ -44,6 +48,9 @@ class LomaEngine:
     See https://ieeexplore.ieee.org/document/9458493 for more details.
     """
 
+    ## Relative margin by which the energy bound of a partial ordering must exceed the best energy to prune it
+    BOUND_TOLERANCE = 1e-9
+
     def __init__(
         self,
         *,
@@ -87,25 +94,16 @@ class LomaEngine:
         @return Generator that yields all temporal mappings
         """
         # TODO: add the criterion(s) as inputs to this function.
-        self.temporal_loop_dim_size = self.get_temporal_loops()  # get all the temporal loops to be scheduled
-        self.update_min_lpf_factor(self.temporal_loop_dim_size)
-        self.get_prime_factors()  # convert these to LPFs (loop prime factors)
+        self.prepare()
 
         pbar = tqdm(total=self.nb_permutations) if self.show_progress_bar else None
 
         yielded = False
         for ordering in self.ordering_generator():
-            allocator = MemoryAllocator(self.accelerator, self.layer, self.spatial_mapping, ordering)  # type: ignore
-            # using try catch here because in the depth-first mode the highest level might not be big enough
-            try:
-                temporal_mapping = allocator.run()  # allocate this ordering to the memories
+            temporal_mapping = self.allocate(ordering)
+            if temporal_mapping is not None:
                 yielded = True
                 yield temporal_mapping
-            except MemoryHierarchyTooSmallException:
-                pass
-            except MemoryTooSmallException:
-                # Skip the ordering that crashed due to ordering (or spatial unrolling) not fitting in memory
-                pass
             if pbar is not None:
                 pbar.update(1)
 
@@ -113,14 +111,173 @@ class LomaEngine:
             pbar.close()
 
         if not yielded:
-            raise NoValidLoopOrderingFoundException(
-                f"No valid loop ordering was found for layer {self.layer}. Please make sure the data layout is "
-                f"compatible with the architecture. Common causes of this error are: \n"
-                f"- The spatial mapping is incompatible with the operational array dimensions\n"
-                f"- The layer does not fit within the full memory hierarchy\n"
-                f"- A single operand does not fit within the lowest memory level\n"
-                f"- One of the layer dimensions cannot be split up in appropriate divisors\n"
+            raise NoValidLoopOrderingFoundException(self.no_valid_ordering_message())
+
+    def run_branch_and_bound(self) -> Generator[TemporalMapping, None, None]:
+        """! Runs the LomaEngine as a depth-first branch-and-bound search that minimizes energy.
+        The orderings are built from the innermost loop outwards. A partial ordering is dropped, together with all its
+        completions, if it does not fit in the memories or if the energy of the memory levels it fixes already exceeds
+        the lowest energy found so far (see LomaEnergyBound). The evaluation of each yielded temporal mapping must be
+        reported with `report_cme` before the next one is requested.
+        The minimal energy (and, amongst the orderings with minimal energy, the minimal latency) is the same as for an
+        exhaustive search. The orderings are visited in a different order than `run`.
+        @return Generator that yields the temporal mappings that could not be pruned
+        """
+        self.prepare()
+        self.energy_bound = LomaEnergyBound(self.layer)
+        self.best_energy: float | None = None
+        self.last_allocation: tuple[list[int], MemoryAllocator, TemporalMapping | None] | None = None
+        self.nb_evaluated = 0
+        self.nb_pruned = 0
+
+        values = list(dict.fromkeys(self.loop_ids))
+        counts = [self.loop_ids.count(value) for value in values]
+
+        yielded = False
+        for temporal_mapping in self.branch_and_bound([], values, counts):
+            yielded = True
+            yield temporal_mapping
+
+        logger.info(
+            "Branch-and-bound LOMA evaluated %i of %s orderings (%i subtrees pruned).",
+            self.nb_evaluated,
+            f"{self.nb_permutations:,}",
+            self.nb_pruned,
+        )
+        if not yielded:
+            raise NoValidLoopOrderingFoundException(self.no_valid_ordering_message())
+
+    def branch_and_bound(
+        self, prefix: list[int], values: list[int], counts: list[int]
+    ) -> Generator[TemporalMapping, None, None]:
+        """! Visit all orderings that start with the given (innermost) loops, except for the pruned ones.
+        @param prefix: the loop ids of the leading loops
+        @param values: the loop ids of the distinct LPFs
+        @param counts: the number of unused LPFs of each value
+        """
+        # The first completion of this prefix in the search order
+        ordering = prefix + [value for value, count in zip(values, counts) for _ in range(count)]
+        allocator, temporal_mapping = self.allocate_ordering(ordering)
+
+        if len(prefix) == len(ordering):
+            if temporal_mapping is not None and self.is_valid(ordering):
+                self.nb_evaluated += 1
+                yield temporal_mapping
+            return
+
+        if temporal_mapping is None:
+            # The allocation failed in a memory level that is fixed by this prefix
+            nb_required_loops = allocator.nb_required_loops_failure
+            if nb_required_loops is not None and nb_required_loops <= len(prefix):
+                self.nb_pruned += 1
+                return
+        elif self.best_energy is not None:
+            bound = self.energy_bound.get_bound(allocator, len(prefix))
+            # Tolerate rounding differences, so that orderings that tie with the best one are never pruned
+            if bound > self.best_energy * (1 + LomaEngine.BOUND_TOLERANCE):
+                self.nb_pruned += 1
+                return
+
+        for idx, value in enumerate(values):
+            if counts[idx] == 0:
+                continue
+            counts[idx] -= 1
+            yield from self.branch_and_bound(prefix + [value], values, counts)
+            counts[idx] += 1
+
+    def report_cme(self, cme: CostModelEvaluationABC) -> None:
+        """! Report the evaluation of the temporal mapping last yielded by `run_branch_and_bound`"""
+        assert self.last_allocation is not None
+        _, allocator, _ = self.last_allocation
+        self.energy_bound.record(allocator, cme)
+        if self.best_energy is None or cme.energy_total < self.best_energy:
+            self.best_energy = cme.energy_total
+
+    def allocate_ordering(self, ordering: list[int]) -> tuple[MemoryAllocator, TemporalMapping | None]:
+        """! Allocate an ordering (of loop ids), reusing the previous allocation if the ordering is the same."""
+        if self.last_allocation is None or self.last_allocation[0] != ordering:
+            allocator = MemoryAllocator(
+                self.accelerator,
+                self.layer,
+                self.spatial_mapping,
+                ordering,
+                size_cache=self.size_cache,
+                loop_encoding=self.loop_encoding,
             )
+            try:
+                temporal_mapping = allocator.run()
+            except (MemoryHierarchyTooSmallException, MemoryTooSmallException):
+                temporal_mapping = None
+            self.last_allocation = (ordering, allocator, temporal_mapping)
+        return self.last_allocation[1], self.last_allocation[2]
+
+    def run_orderings(self, orderings: list[list[int]]) -> Generator[TemporalMapping, None, None]:
+        """! Runs the LomaEngine on the given orderings (of loop ids), e.g. a chunk of `get_ordering_chunks`.
+        `prepare` must have been called first.
+        @return Generator that yields the temporal mappings of the orderings that fit in the memories, in order
+        """
+        for ordering in orderings:
+            temporal_mapping = self.allocate(ordering)
+            if temporal_mapping is not None:
+                yield temporal_mapping
+
+    def get_ordering_chunks(self, nb_chunks: int) -> Generator[list[list[int]], None, None]:
+        """! Split the orderings of `ordering_generator` in at most `nb_chunks` contiguous, non-empty chunks.
+        The permutations are generated only once: every chunk continues where the previous one stopped, so that the
+        chunks, concatenated in order, visit the orderings in the same order as `run`. `prepare` must have been
+        called first.
+        """
+        chunk_size = max(1, ceil(self.nb_permutations / max(1, nb_chunks)))
+        orderings = self.ordering_generator()
+        while chunk := list(islice(orderings, chunk_size)):
+            yield chunk
+
+    def prepare(self) -> None:
+        """! Compute the temporal loops and their (limited) loop prime factors to permute."""
+        self.temporal_loop_dim_size = self.get_temporal_loops()  # get all the temporal loops to be scheduled
+        self.update_min_lpf_factor(self.temporal_loop_dim_size)
+        self.get_prime_factors()  # convert these to LPFs (loop prime factors)
+        # The orderings are permuted and allocated as lists of small integer loop ids
+        self.loop_encoding = LoopEncoding(self.lpfs)
+        self.loop_ids = self.loop_encoding.encode(self.lpfs)
+        # Tile sizes of the loop prefixes, shared by the allocations of all orderings
+        self.size_cache = LoopPrefixTrie()
+
+    def is_valid(self, ordering: list[int]) -> bool:
+        """! Check the constraints on an ordering of loop ids"""
+        decoded_ordering = self.loop_encoding.decode(ordering)
+        return all(constr.is_valid(decoded_ordering) for constr in self.constraints)
+
+    def allocate(self, ordering: list[int]) -> TemporalMapping | None:
+        """! Allocate a single ordering (of loop ids) to the memory hierarchy.
+        @return The resulting temporal mapping, or None if the ordering does not fit in the memories
+        """
+        allocator = MemoryAllocator(
+            self.accelerator,
+            self.layer,
+            self.spatial_mapping,
+            ordering,
+            size_cache=self.size_cache,
+            loop_encoding=self.loop_encoding,
+        )
+        # using try catch here because in the depth-first mode the highest level might not be big enough
+        try:
+            return allocator.run()  # allocate this ordering to the memories
+        except MemoryHierarchyTooSmallException:
+            return None
+        except MemoryTooSmallException:
+            # Skip the ordering that crashed due to ordering (or spatial unrolling) not fitting in memory
+            return None
+
+    def no_valid_ordering_message(self) -> str:
+        return (
+            f"No valid loop ordering was found for layer {self.layer}. Please make sure the data layout is "
+            f"compatible with the architecture. Common causes of this error are: \n"
+            f"- The spatial mapping is incompatible with the operational array dimensions\n"
+            f"- The layer does not fit within the full memory hierarchy\n"
+            f"- A single operand does not fit within the lowest memory level\n"
+            f"- One of the layer dimensions cannot be split up in appropriate divisors\n"
+        )
 
     def get_temporal_loops(self):
         """! Get all loops that have to be temporally scheduled given layer and spatial mapping.
@@ -340,9 +497,9 @@ class LomaEngine:
         logger.debug("Limited layer %s to %i lpfs.", self.layer, len(self.lpfs))
         return
 
-    def ordering_generator(self) -> Generator[list[tuple[LayerDim, int]], None, None]:
-        """! Generator that yields all orderings of the temporal loops."""
+    def ordering_generator(self) -> Generator[list[int], None, None]:
+        """! Generator that yields all orderings of the temporal loops, as lists of loop ids."""
         if self.has_constraints:
-            return constrainded_permutations(self.lpfs, self.constraints)  # type:ignore
+            return (ordering for ordering in permutations(self.loop_ids) if self.is_valid(ordering))
         else:
-            return permutations(self.lpfs)
+            return permutations(self.loop_ids)
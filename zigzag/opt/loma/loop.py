@@ -1,4 +1,6 @@
-from zigzag.datatypes import LayerDim, UnrollFactor
+from typing import Iterable, Sequence
+
+from zigzag.datatypes import LayerDim, UnrollFactor, UnrollFactorInt
 
 
 class Loop:
@@ -15,3 +17,28 @@ class Loop:
 
     def __repr__(self):
         return str(self)
+
+
+class LoopEncoding:
+    """! Encoding of the temporal loops of a mapping search as small integer loop ids, so that the orderings can be
+    permuted, compared and hashed without touching `LayerDim` objects. The ids are assigned in sorted order of the
+    (layer dim, size) loops: comparing ids is equivalent to comparing the loops, so permutations of ids are visited in
+    the same order as permutations of the loops.
+    """
+
+    def __init__(self, loops: Iterable[tuple[LayerDim, UnrollFactorInt]]):
+        ## Distinct loops, indexed by loop id
+        self.loops: list[tuple[LayerDim, UnrollFactorInt]] = sorted(set(loops))  # type: ignore
+        self.loop_ids = {loop: loop_id for loop_id, loop in enumerate(self.loops)}
+        ## Distinct layer dims of the loops, indexed by dim id
+        self.dims: list[LayerDim] = sorted(set(layer_dim for layer_dim, _ in self.loops))
+        dim_ids = {layer_dim: dim_id for dim_id, layer_dim in enumerate(self.dims)}
+        ## Dim id and size of each loop, indexed by loop id
+        self.dim_ids: tuple[int, ...] = tuple(dim_ids[layer_dim] for layer_dim, _ in self.loops)
+        self.sizes: tuple[UnrollFactorInt, ...] = tuple(size for _, size in self.loops)
+
+    def encode(self, ordering: Iterable[tuple[LayerDim, UnrollFactorInt]]) -> list[int]:
+        return [self.loop_ids[loop] for loop in ordering]
+
+    def decode(self, loop_ids: Sequence[int]) -> list[tuple[LayerDim, UnrollFactorInt]]:
+        return [self.loops[loop_id] for loop_id in loop_ids]
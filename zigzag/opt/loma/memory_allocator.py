@@ -1,5 +1,6 @@
 from collections import defaultdict
-from math import prod
+from itertools import product
+from typing import Sequence
 
 import numpy as np
 
@@ -15,7 +16,7 @@ from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.memory_level import MemoryLevel
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping, TemporalMappingDict
-from zigzag.opt.loma.loop import Loop
+from zigzag.opt.loma.loop import LoopEncoding
 from zigzag.workload.layer_attributes import LayerDimSizes
 from zigzag.workload.layer_node import LayerNode
 
@@ -28,20 +29,103 @@ class MemoryTooSmallException(Exception):
     """Indicates that some memory instance is too small to support this temporal ordering"""
 
 
+class LoopPrefixNode:
+    """! Node of a `LoopPrefixTrie`, which represents the orderings that start with a given prefix of (innermost)
+    temporal loops."""
+
+    __slots__ = ("children", "dim_sizes", "tensor_sizes")
+
+    def __init__(self, dim_sizes: dict[int, UnrollFactor]):
+        self.children: dict[int, LoopPrefixNode] = {}
+        ## Product of the sizes of the loops in the prefix, for each dim id
+        self.dim_sizes = dim_sizes
+        ## Size (in bits) of the operand tile spanned by the loops in the prefix and the spatial loops below a memory
+        ## level, for each (layer operand, memory level, precision)
+        self.tensor_sizes: dict[tuple[LayerOperand, int, int], UnrollFactor] = {}
+
+    def add_child(self, loop_id: int, loop_encoding: LoopEncoding) -> "LoopPrefixNode":
+        dim_id = loop_encoding.dim_ids[loop_id]
+        dim_sizes = self.dim_sizes.copy()
+        dim_sizes[dim_id] = dim_sizes.get(dim_id, 1) * loop_encoding.sizes[loop_id]  # type: ignore
+        child = LoopPrefixNode(dim_sizes)
+        self.children[loop_id] = child
+        return child
+
+
+class LoopPrefixTrie:
+    """! Cache of the operand tile sizes that MemoryAllocators compute for the prefixes of their ordering. The tile
+    sizes of a prefix are the same for all orderings that start with it, so orderings that share a prefix (as
+    consecutive LOMA permutations do) only compute them once. A trie can only be shared by allocators for the same
+    accelerator, layer, spatial mapping and loop encoding.
+    The trie is emptied before it would exceed `max_nb_nodes` prefixes. The allocators keep the nodes of their own
+    ordering, so they can still use them after the trie is emptied.
+    """
+
+    def __init__(self, max_nb_nodes: int = 100_000):
+        """
+        @param max_nb_nodes: Max nb of (non-empty) prefixes cached in the trie
+        """
+        self.max_nb_nodes = max_nb_nodes
+        self.root = LoopPrefixNode({})
+        self.nb_nodes = 0
+        ## Product of the sizes of the spatial loops below each memory level, per (layer operand, memory level). None if
+        ## some of these loops have a fractional size, see `MemoryAllocator.get_spatial_dim_sizes`.
+        self.spatial_dim_sizes: dict[tuple[LayerOperand, int], dict[LayerDim, UnrollFactor] | None] = {}
+
+    def get_path(self, loop_ids: Sequence[int], loop_encoding: LoopEncoding) -> list[LoopPrefixNode]:
+        """! Return the nodes of all prefixes of the ordering, from the empty prefix to the full ordering"""
+        # Empty the trie if the prefixes of this ordering might not fit anymore
+        if self.nb_nodes + len(loop_ids) > self.max_nb_nodes:
+            self.clear()
+        path = [self.root]
+        for loop_id in loop_ids:
+            child = path[-1].children.get(loop_id)
+            if child is None:
+                child = path[-1].add_child(loop_id, loop_encoding)
+                self.nb_nodes += 1
+            path.append(child)
+        return path
+
+    def clear(self) -> None:
+        """! Remove all cached prefixes"""
+        self.root = LoopPrefixNode({})
+        self.nb_nodes = 0
+
+
 class MemoryAllocator:
-    """! Class that handles allocation of a loop ordering to the memories in the hierarchy."""
+    """! Class that handles allocation of a loop ordering to the memories in the hierarchy.
+    Internally, the loops are represented by their ids in a `LoopEncoding`. They are only converted back to
+    (layer dim, size) tuples in the resulting temporal mapping.
+    """
 
     def __init__(
         self,
         accelerator: Accelerator,
         layer: LayerNode,
         spatial_mapping: SpatialMappingInternal,
-        ordering: list[tuple[LayerDim, UnrollFactorInt]],
+        ordering: Sequence[tuple[LayerDim, UnrollFactorInt]] | Sequence[int],
+        size_cache: LoopPrefixTrie | None = None,
+        loop_encoding: LoopEncoding | None = None,
     ):
+        """
+        @param ordering: Temporal loops from innermost to outermost, as (layer dim, size) tuples, or as loop ids if
+          `loop_encoding` is given.
+        @param size_cache: Trie in which the operand tile sizes of the prefixes of the ordering are cached, shared with
+          the allocators of other orderings of the same search. If None, the sizes are only cached for this ordering.
+        @param loop_encoding: Encoding of the loop ids in `ordering`, shared by the orderings of the same search.
+        """
         self.accelerator = accelerator
         self.layer = layer
         self.spatial_mapping = spatial_mapping
-        self.ordering = ordering
+        if loop_encoding is None:
+            loop_encoding = LoopEncoding(ordering)  # type: ignore
+            self.loop_ids: list[int] = loop_encoding.encode(ordering)  # type: ignore
+        else:
+            self.loop_ids = list(ordering)  # type: ignore
+        self.loop_encoding = loop_encoding
+        self.ordering = loop_encoding.decode(self.loop_ids)
+        self.size_cache = size_cache if size_cache is not None else LoopPrefixTrie()
+        self.prefix_nodes = self.size_cache.get_path(self.loop_ids, loop_encoding)
 
         # Initialize operands (having local copies speeds up the code)
         self.layer_and_mem_ops = self.layer.memory_operand_links.layer_and_mem_ops()
@@ -55,15 +139,9 @@ class MemoryAllocator:
         }
         self.precision[Constants.FINAL_OUTPUT_MEM_OP] = self.layer.operand_precision.final_output_precision
 
-        # Initialize the unallocated loops with the ordering for each operand
-        self.unallocated = {mem_op: [Loop(dim, size) for (dim, size) in self.ordering] for mem_op in self.mem_ops}
-
-        # Initialize the allocated loops with the spatial mapping at the operand level for each operand
-        self.allocated: dict[MemoryOperand, list[Loop]] = {}
-        for layer_op, mem_op in self.layer_and_mem_ops:
-            self.allocated[mem_op] = [
-                Loop(dim, size, "spatial") for (dim, size) in self.spatial_mapping.get_unrolling(op=layer_op, level=0)
-            ]
+        # Initialize the unallocated loops with the ordering for each operand. The allocated temporal loops are the
+        # leading loops of the ordering.
+        self.unallocated = {mem_op: self.loop_ids.copy() for mem_op in self.mem_ops}
 
         # Initialize the level of memory hierarchy for each layer operand at 1 (first memory level).
         # This information is required to fetch the correct spatial loops after we have allocated temporal loops.
@@ -74,24 +152,82 @@ class MemoryAllocator:
         # The sublists represent the memory levels for that operand and contain the loops allocated to that level.
         self.temporal_mapping_dict: TemporalMappingDict = {layer_op: [] for layer_op in self.layer_ops}
 
-    def run(self):
+        # For each mem op and each memory level allocated so far: the number of leading (innermost) loops of the
+        # ordering that fix the loops allocated up to and including that level. Any ordering that starts with these
+        # loops results in the same allocation of those levels. Used to bound the cost of partial orderings.
+        self.nb_required_loops: dict[MemoryOperand, list[int]] = {mem_op: [] for mem_op in self.mem_ops}
+        # Idem for the exception raised by the allocation, if any
+        self.nb_required_loops_failure: int | None = None
+        # State after each allocated memory node, to resume the allocation of another ordering, see `run`:
+        # (nb of leading loops that fix the allocation up to this node, for each mem op: (nb of allocated levels, nb of
+        # allocated temporal loops))
+        self.checkpoints: list[tuple[int, dict[MemoryOperand, tuple[int, int]]]] = []
+
+    def run(self, previous: "MemoryAllocator | None" = None):
         """! Run the memory allocation process.
         Start by the lowest memory hierarchy level and allocate as much loops as possible
         for the different operands. The spatial unrolling has to be taken into account at
         each memory level in the hierarchy.
+        @param previous: Allocator that ran on another ordering of the same loops (for the same accelerator, layer and
+          spatial mapping). The memory nodes of which the allocation only depends on the leading loops that both
+          orderings share are not allocated again, but copied from this allocator.
         """
 
         # self.nodes contains the different memory nodes in bottom-up fashion
         memory_hierarchy = self.accelerator.memory_hierarchy
         top_levels = {mem_op: memory_hierarchy.get_operand_top_level(mem_op) for mem_op in self.mem_ops}
-        for node in memory_hierarchy.topological_sort():
+        nodes = list(memory_hierarchy.topological_sort())
+        nb_resumed_nodes = self.resume(previous) if previous is not None else 0
+        for node in nodes[nb_resumed_nodes:]:
             self.allocate_node(node, top_levels)
+            self.checkpoints.append(
+                (
+                    max((nbs[-1] for nbs in self.nb_required_loops.values() if nbs), default=0),
+                    {
+                        mem_op: (
+                            len(self.nb_required_loops[mem_op]),
+                            len(self.loop_ids) - len(self.unallocated[mem_op]),
+                        )
+                        for mem_op in self.mem_ops
+                    },
+                )
+            )
 
         # After all the nodes have been allocated, we can create the TemporalMapping
         # object from the dictionary we have built
         temporal_mapping = TemporalMapping(self.temporal_mapping_dict, self.layer)
         return temporal_mapping
 
+    def resume(self, previous: "MemoryAllocator") -> int:
+        """! Copy the allocation of the lowest memory nodes from the given allocator, for as far as it only depends on
+        the leading loops that the orderings share. Return the number of copied memory nodes.
+        """
+        nb_shared_loops = 0
+        if previous.loop_encoding is self.loop_encoding:
+            shared_loops = zip(self.loop_ids, previous.loop_ids)
+        else:
+            shared_loops = zip(self.ordering, previous.ordering)  # type: ignore
+        for loop, previous_loop in shared_loops:
+            if loop != previous_loop:
+                break
+            nb_shared_loops += 1
+        nb_resumed_nodes = 0
+        for nb_required_loops, _ in previous.checkpoints:
+            if nb_required_loops > nb_shared_loops:
+                break
+            nb_resumed_nodes += 1
+        if nb_resumed_nodes == 0:
+            return 0
+
+        self.checkpoints = previous.checkpoints[:nb_resumed_nodes]
+        for mem_op, (nb_levels, nb_temporal_loops) in self.checkpoints[-1][1].items():
+            layer_op = self.mem_to_layer_op[mem_op]
+            self.unallocated[mem_op] = self.unallocated[mem_op][nb_temporal_loops:]
+            self.temporal_mapping_dict[layer_op] = previous.temporal_mapping_dict[layer_op][:nb_levels]
+            self.nb_required_loops[mem_op] = previous.nb_required_loops[mem_op][:nb_levels]
+            self.mem_level[layer_op] = 1 + nb_levels
+        return nb_resumed_nodes
+
     def allocate_node(self, node: MemoryLevel, top_levels: dict[MemoryOperand, MemoryLevel]):
         """! Allocate a single memory node with the best loops that remain in the unallocated loop ordering.
         @param node: The MemoryLevel to which we will allocate loops.
@@ -106,47 +242,62 @@ class MemoryAllocator:
         # Get the capacity of this memory node (in bits)
         mem_capacity = node.memory_instance.size
 
+        # Number of leading loops that fix the allocation of the lower levels of these mem_ops
+        nb_required_loops_below = max(
+            (self.nb_required_loops[mem_op][-1] for mem_op in filtered_mem_ops if self.nb_required_loops[mem_op]),
+            default=0,
+        )
+
         # For all the mem_ops, find the max amount of unallocated loops we could allocate
-        all_sizes = {mem_op: self.calc_size_slices(mem_op, mem_capacity) for mem_op in filtered_mem_ops}
+        try:
+            all_sizes = {mem_op: self.calc_size_slices(mem_op, mem_capacity) for mem_op in filtered_mem_ops}
+        except MemoryTooSmallException:
+            self.nb_required_loops_failure = nb_required_loops_below
+            raise
+
+        # The sizes only depend on the loops up to the first slice that overflows the memory. If none overflows, the
+        # sizes depend on all loops.
+        nb_required_loops = nb_required_loops_below
+        for mem_op, sizes in all_sizes.items():
+            nb_unallocated = len(self.unallocated[mem_op])
+            if len(sizes) <= nb_unallocated:
+                nb_required_loops = max(nb_required_loops, len(self.loop_ids) - nb_unallocated + len(sizes))
+            else:
+                nb_required_loops = len(self.loop_ids)
 
         # Now that we have this for all the mem_ops, call function that finds the best
         # combination of loops to minimize the number of accesses to the level above
-        best_loop_idxs = self.find_best_loop_combination(filtered_mem_ops, all_sizes, node, top_levels)
+        try:
+            best_loop_idxs = self.find_best_loop_combination(filtered_mem_ops, all_sizes, node, top_levels)
+        except MemoryTooSmallException:
+            self.nb_required_loops_failure = nb_required_loops
+            raise
 
         for best_loop_idx, mem_op in zip(best_loop_idxs, filtered_mem_ops):
             # Now that we have the combination of loop_idx for each mem_op, add them
             # to the allocated loops and remove them from the unallocated loops
-            loops_to_allocate = self.unallocated[mem_op][:best_loop_idx].copy()
-            self.allocated[mem_op] += loops_to_allocate
+            loops_to_allocate = self.unallocated[mem_op][:best_loop_idx]
             del self.unallocated[mem_op][:best_loop_idx]
 
             # Add the loops to allocate to the level-by-level temporal_mapping_dict
             # The key of this dict is the layer_op and not the mem_op
             layer_op = self.mem_to_layer_op[mem_op]
-            self.temporal_mapping_dict[layer_op].append([(loop.layer_dim, loop.size) for loop in loops_to_allocate])
-
-            # This memory node that stores one or more mem_ops might be
-            # spatially unrolled, add these spatially unrolled loops to
-            # the list of allocated loops now, so that the next memory nodes
-            # correctly see this spatial unrolling.
-            # For this we require the level of memory we are evaluating for this op.
-            mem_level_op = self.mem_level[layer_op]
-            spatial_loops = self.spatial_mapping.get_unrolling(op=layer_op, level=mem_level_op)
-            for loop_dim, loop_size in spatial_loops:
-                spatial_loop = Loop(layer_dim=loop_dim, size=loop_size, loop_type="spatial")
-                self.allocated[mem_op].append(spatial_loop)
+            self.temporal_mapping_dict[layer_op].append(self.loop_encoding.decode(loops_to_allocate))
 
             # Check if this node (i.e. MemoryLevel) is the highest level of memory hierarchy.
             # If this is the case and we haven't allocated all loops, raise an exception.
             if node == top_levels[mem_op] and self.unallocated[mem_op]:  # if top level and unallocated not empty
+                self.nb_required_loops_failure = nb_required_loops
                 raise MemoryHierarchyTooSmallException(
                     f"Highest MemoryLevel for {mem_op} = {node} too small to store all loops."
                 )
 
+            self.nb_required_loops[mem_op].append(nb_required_loops)
+
             # Increment the mem_level we are currently at for this layer_op by 1
             self.mem_level[layer_op] += 1
 
-    def get_precision(self, mem_op: MemoryOperand, layer_op: LayerOperand, unallocated_loops: list[Loop]):
+    def get_precision(self, mem_op: MemoryOperand, layer_op: LayerOperand, unallocated_loops: list[int]):
         """Get the precision at which this tensor will have to be stored in the MemoryLevel node.
         For output it can be either the partial sum precision, or the final sum precision.
         This depends on if all the irrelevant loops were allocated in a previous MemoryLevel.
@@ -157,13 +308,14 @@ class MemoryAllocator:
             unallocated_spatial_dims = [
                 dim for dim, _ in self.spatial_mapping.get_unrolling_all(layer_op, self.mem_level[layer_op])
             ]
-            unallocated_temporal_dims = [unallocated_loop.layer_dim for unallocated_loop in unallocated_loops]
-            unallocated_dims = unallocated_spatial_dims + unallocated_temporal_dims
+            ir_dim_ids = {dim_id for dim_id, dim in enumerate(self.loop_encoding.dims) if dim in ir_dims}
+            dim_ids = self.loop_encoding.dim_ids
 
             # If there is still an irrelevant unallocated loop dimension, pick the full precision
             precision = (
                 self.precision[Constants.OUTPUT_MEM_OP]
-                if any([dim in ir_dims for dim in unallocated_dims])
+                if any(dim in ir_dims for dim in unallocated_spatial_dims)
+                or any(dim_ids[loop_id] in ir_dim_ids for loop_id in unallocated_loops)
                 else self.precision[Constants.FINAL_OUTPUT_MEM_OP]
             )
         else:
@@ -179,21 +331,21 @@ class MemoryAllocator:
         @param db_support Double buffering support of this node
         """
         layer_op = self.mem_to_layer_op[mem_op]
-        allocated_loops = self.allocated[mem_op]
         unallocated_loops = self.unallocated[mem_op]
         sizes: list[UnrollFactor] = []
         precision = self.get_precision(mem_op, layer_op, unallocated_loops)
 
+        # The temporal loops allocated so far are the leading loops of the ordering
+        nb_allocated_temporal = len(self.loop_ids) - len(unallocated_loops)
+        spatial_dim_sizes = self.get_spatial_dim_sizes(layer_op)
+
         # If this memory supports double buffering get the size it would take to allocate everything
         if db_support:
-            all_loops = allocated_loops + unallocated_loops[: len(unallocated_loops) + 1]
-            all_loops_size = self.calc_loops_size(all_loops, layer_op, precision)
+            all_loops_size = self.calc_slice_size(layer_op, len(self.loop_ids), spatial_dim_sizes, precision)
 
         # Go through all slices (includes empty slice)
         for i in range(len(unallocated_loops) + 1):
-            unallocated_slice = unallocated_loops[:i]
-            loops = allocated_loops + unallocated_slice
-            size = self.calc_loops_size(loops, layer_op, precision)
+            size = self.calc_slice_size(layer_op, nb_allocated_temporal + i, spatial_dim_sizes, precision)
             # double size allocated if the node uses double buffering
             if db_support:
                 if len(unallocated_loops[i:]) > 0 and size < all_loops_size:  # type: ignore
@@ -202,33 +354,93 @@ class MemoryAllocator:
                 sizes.append(size)
             else:
                 if i == 0:  # This means we can't even store the already allocated loops
+                    spatial_loops = [
+                        self.spatial_mapping.get_unrolling(op=layer_op, level=level)
+                        for level in range(self.mem_level[layer_op])
+                    ]
                     raise MemoryTooSmallException(
-                        f"Memory capacity overflow for mem_op {mem_op}. loops={loops} size={size} "
-                        f"mem_capacity={mem_capacity}"
+                        f"Memory capacity overflow for mem_op {mem_op}. "
+                        f"temporal loops={self.ordering[:nb_allocated_temporal]} "
+                        f"spatial loops={spatial_loops} size={size} mem_capacity={mem_capacity}"
                     )
                 break  # Stop as soon as we have added a loop that overflows the memory
         return sizes
 
-    def calc_loops_size(
+    def calc_slice_size(
         self,
-        loops: list[Loop],
         layer_op: LayerOperand,
+        nb_temporal_loops: int,
+        spatial_dim_sizes: dict[LayerDim, UnrollFactor] | None,
         precision: int,
     ) -> UnrollFactor:
-        """! Calculate the 'mem_op' tensor size required for all the loops in 'loops'.
-        @param loops: The loops we want to calculate the size for.
-        @para layer_op: The layer operand we are calculating the size for.
-        @param precision: number of bits for this layer operand.
+        """! Calculate the tensor size required for the given nb of leading temporal loops of the ordering and the
+        spatial loops below the current memory level of 'layer_op'.
+        @param spatial_dim_sizes: see `get_spatial_dim_sizes`
         """
+        if spatial_dim_sizes is None:
+            return self.calc_loops_size(layer_op, nb_temporal_loops, precision)
+        return self.calc_prefix_size(layer_op, self.prefix_nodes[nb_temporal_loops], spatial_dim_sizes, precision)
 
-        # First we compute the size of all loop dimensions present in this layer given the loops in 'loops'.
+    def calc_prefix_size(
+        self,
+        layer_op: LayerOperand,
+        prefix_node: LoopPrefixNode,
+        spatial_dim_sizes: dict[LayerDim, UnrollFactor],
+        precision: int,
+    ) -> UnrollFactor:
+        """! Calculate the tensor size required for the temporal loops of the given prefix of the ordering and the
+        spatial loops below the current memory level of 'layer_op'. The size is cached in the prefix node.
+        @param spatial_dim_sizes: Product of the sizes of the spatial loops below the current memory level, per dim.
+        """
+        key = (layer_op, self.mem_level[layer_op], precision)
+        size = prefix_node.tensor_sizes.get(key)
+        if size is None:
+            all_dim_sizes: dict[LayerDim, UnrollFactor] = defaultdict(lambda: 1, spatial_dim_sizes)
+            for dim_id, dim_size in prefix_node.dim_sizes.items():
+                all_dim_sizes[self.loop_encoding.dims[dim_id]] *= dim_size
+            size = self.layer.calc_tensor_size(layer_op, LayerDimSizes(all_dim_sizes)) * precision
+            prefix_node.tensor_sizes[key] = size
+        return size
+
+    def calc_loops_size(self, layer_op: LayerOperand, nb_temporal_loops: int, precision: int) -> UnrollFactor:
+        """! Calculate the tensor size required for the given nb of leading temporal loops of the ordering and the
+        spatial loops below the current memory level of 'layer_op', without caching. The loop sizes are multiplied in
+        allocation order: the spatial loops of each memory level on top of the temporal loops allocated below it, then
+        the unallocated temporal loops.
+        """
         all_dim_sizes: dict[LayerDim, UnrollFactor] = defaultdict(lambda: 1)
-        for loop in loops:
-            all_dim_sizes[loop.layer_dim] *= loop.size
-
-        tensor_size = self.layer.calc_tensor_size(layer_op, LayerDimSizes(all_dim_sizes))
-        tensor_size_bits = tensor_size * precision
-        return tensor_size_bits
+        allocated_levels = self.temporal_mapping_dict[layer_op]
+        for level in range(self.mem_level[layer_op]):
+            if level > 0:
+                for layer_dim, size in allocated_levels[level - 1]:
+                    all_dim_sizes[layer_dim] *= size
+            for layer_dim, size in self.spatial_mapping.get_unrolling(op=layer_op, level=level):
+                all_dim_sizes[layer_dim] *= size
+        nb_allocated_temporal = sum(len(loops) for loops in allocated_levels)
+        for layer_dim, size in self.ordering[nb_allocated_temporal:nb_temporal_loops]:
+            all_dim_sizes[layer_dim] *= size
+        return self.layer.calc_tensor_size(layer_op, LayerDimSizes(all_dim_sizes)) * precision
+
+    def get_spatial_dim_sizes(self, layer_op: LayerOperand) -> dict[LayerDim, UnrollFactor] | None:
+        """! Product of the sizes of the spatial loops below the current memory level of 'layer_op', per dim. The
+        memory nodes that store 'layer_op' may be spatially unrolled, so these loops are part of the tile of all the
+        memory levels above.
+        Returns None if some of these loops have a fractional size: the (floating point) tile sizes then depend on the
+        order in which the loop sizes are multiplied, so they are not cached in the trie but computed in allocation
+        order, see `calc_loops_size`."""
+        key = (layer_op, self.mem_level[layer_op])
+        if key not in self.size_cache.spatial_dim_sizes:
+            spatial_dim_sizes: dict[LayerDim, UnrollFactor] | None = {}
+            for level in range(self.mem_level[layer_op]):
+                for layer_dim, size in self.spatial_mapping.get_unrolling(op=layer_op, level=level):
+                    if size != int(size):
+                        spatial_dim_sizes = None
+                        break
+                    spatial_dim_sizes[layer_dim] = spatial_dim_sizes.get(layer_dim, 1) * size  # type: ignore
+                if spatial_dim_sizes is None:
+                    break
+            self.size_cache.spatial_dim_sizes[key] = spatial_dim_sizes
+        return self.size_cache.spatial_dim_sizes[key]
 
     def find_best_loop_combination(
         self,
@@ -265,31 +477,30 @@ class MemoryAllocator:
             # Thus: accesses = # total iterations / (# allocated iterations / size)
             # Thus: accesses = (# total iterations / # allocated iterations) * size
             # Thus: accesses = # unallocated iterations * size
+            # Number of iterations of the unallocated loops from each index onwards
+            unallocated_iterations_from = [1] * (len(self.unallocated[mem_op]) + 1)
+            for j in reversed(range(len(self.unallocated[mem_op]))):
+                loop_size = self.loop_encoding.sizes[self.unallocated[mem_op][j]]
+                unallocated_iterations_from[j] = loop_size * unallocated_iterations_from[j + 1]
             for i, size in enumerate(all_sizes[mem_op]):
                 # slice of unallocated loops for this operand size
-                unallocated_loops = self.unallocated[mem_op][(i + loop_idx_offsets[mem_op]) :]
-                unallocated_iterations = prod((unallocated_loop.size for unallocated_loop in unallocated_loops))
+                unallocated_iterations = unallocated_iterations_from[i + loop_idx_offsets[mem_op]]
                 if node == top_levels[mem_op]:
                     accesses = 0
                 else:
                     accesses = unallocated_iterations * size
                 all_accesses[mem_op].append(accesses)
 
-        all_max_nb_loops = {mem_op: len(all_sizes[mem_op]) for mem_op in mem_ops}
-        all_max_nb_loops_list = list(all_max_nb_loops.values())
+        # Go through the combinations in mixed-radix order, with the loop index of the last mem_op varying fastest
+        sizes_per_op = [all_sizes[mem_op] for mem_op in mem_ops]
+        accesses_per_op = [all_accesses[mem_op] for mem_op in mem_ops]
+        offsets_per_op = [loop_idx_offsets[mem_op] for mem_op in mem_ops]
         best_loop_idxs = [0 for _ in mem_ops]
         best_accesses = np.inf
-        nb_combinations = prod(len(sizes) for sizes in all_sizes.values())
-        for i in range(nb_combinations):
+        for i, loop_idxs in enumerate(product(*(range(len(sizes)) for sizes in sizes_per_op))):
             size_comb = 0
-            accesses_comb = 0
-            current_loop_idxs: list[int] = []
-            for mem_op_idx, mem_op in enumerate(mem_ops):
-                this_max_nb_loops = all_max_nb_loops_list[mem_op_idx]
-                current_loop_idx = (i // prod(all_max_nb_loops_list[mem_op_idx + 1 :])) % this_max_nb_loops
-                current_loop_idxs.append(current_loop_idx + loop_idx_offsets[mem_op])
-                size_comb += all_sizes[mem_op][current_loop_idx]
-                accesses_comb += all_accesses[mem_op][current_loop_idx]
+            for sizes, loop_idx in zip(sizes_per_op, loop_idxs):
+                size_comb += sizes[loop_idx]
             if size_comb > mem_capacity:
                 if i == 0:
                     raise MemoryTooSmallException(
@@ -297,7 +508,10 @@ class MemoryAllocator:
                         unrolling."""
                     )
                 continue
+            accesses_comb = 0
+            for accesses, loop_idx in zip(accesses_per_op, loop_idxs):
+                accesses_comb += accesses[loop_idx]
             if accesses_comb <= best_accesses:
                 best_accesses = accesses_comb
-                best_loop_idxs = current_loop_idxs
+                best_loop_idxs = [loop_idx + offset for loop_idx, offset in zip(loop_idxs, offsets_per_op)]
         return best_loop_idxs
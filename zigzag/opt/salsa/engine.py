@@ -28,22 +28,97 @@
 """
 
 import logging
+import math
 import random
-from copy import deepcopy
+from queue import Empty
 from typing import Any
 
+import multiprocessing_on_dill as multiprocessing  # type: ignore
 import numpy as np
 from multiprocessing_on_dill import Queue  # type: ignore
 from sympy.ntheory import factorint  # type: ignore
 
+from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.datatypes import LayerDim
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
-from zigzag.opt.salsa.state import SalsaState
+from zigzag.opt.loma.loop import LoopEncoding
+from zigzag.opt.salsa.state import SalsaEvaluator, SalsaState
 from zigzag.workload.layer_node import LayerNode
 
 logger = logging.getLogger(__name__)
 
+# Timeout (in seconds) of the waits on the worker processes of parallel tempering, after which their liveness is checked
+WORKER_POLL_INTERVAL = 1.0
+# (iteration, optimization criterion of the current state, optimization criterion of the best state) of a chain
+TracePoint = tuple[int, float, float]
+# Temperature, nb of iterations and, optionally, the (ordering, optimization criterion) to restart from, per chain
+ChainCommand = tuple[float, int, tuple[list[int], float] | None]
+# Current ordering and its optimization criterion, best ordering and its optimization criterion, new trace points
+ChainReport = tuple[list[int], float, list[int], float, list[TracePoint]]
+
+
+class SalsaChain:
+    """! Markov chain of the parallel tempering mode of SALSA. The chain anneals at the temperature that the engine
+    assigns to it for every round."""
+
+    def __init__(self, evaluator: SalsaEvaluator, ordering: list[int], seed: Any):
+        self.evaluator = evaluator
+        self.rng = np.random.default_rng(seed)
+        # Initialize the chain with a random starting point
+        start_ordering = list(ordering)
+        self.rng.shuffle(start_ordering)  # type: ignore
+        self.current_state = SalsaState(evaluator, start_ordering)
+        self.best_state = self.current_state
+        self.nb_iterations = 0
+
+    def anneal(self, temperature: float, nb_iterations: int) -> list[TracePoint]:
+        """! Run the given nb of iterations at a fixed temperature and return the trace of these iterations"""
+        trace: list[TracePoint] = []
+        for _ in range(nb_iterations):
+            # Get the index of the loops to swap
+            i = int(self.rng.integers(0, len(self.current_state.ordering)))
+            j = int(self.rng.integers(0, len(self.current_state.ordering)))
+            next_state = self.current_state.swap(i, j)
+
+            x = self.rng.random()  # x belongs to [0, 1]
+            # probability of accepting the next state (clipped to 1, which does not overflow at low temperatures)
+            p = math.exp(min(0.0, ((self.current_state.opt_criterion / next_state.opt_criterion) - 1) / temperature))
+            if x < p:
+                self.current_state = next_state
+                if self.current_state.opt_criterion < self.best_state.opt_criterion:
+                    self.best_state = self.current_state
+
+            self.nb_iterations += 1
+            trace.append((self.nb_iterations, self.current_state.opt_criterion, self.best_state.opt_criterion))
+        return trace
+
+    def run_command(self, command: ChainCommand) -> ChainReport:
+        """! Restart from the given state, if any, anneal and report the current and best state"""
+        temperature, nb_iterations, restart = command
+        if restart is not None:
+            ordering, opt_criterion = restart
+            self.current_state = SalsaState(self.evaluator, ordering, opt_criterion)
+        trace = self.anneal(temperature, nb_iterations)
+        return (
+            self.current_state.ordering,
+            self.current_state.opt_criterion,
+            self.best_state.ordering,
+            self.best_state.opt_criterion,
+            trace,
+        )
+
+
+def run_salsa_chains(engine: "SalsaEngine", seeds: dict[int, Any], commands: Queue, reports: Queue):
+    """! Worker process of parallel tempering SALSA: run the given chains, one round per received command, until None
+    is received."""
+    evaluator = engine.create_evaluator()
+    chains = {
+        chain_id: SalsaChain(evaluator, engine.temporal_mapping_loop_ids, seed) for chain_id, seed in seeds.items()
+    }
+    while (round_commands := commands.get()) is not None:
+        reports.put({chain_id: chains[chain_id].run_command(command) for chain_id, command in round_commands.items()})
+
 
 class SalsaEngine:
     """! Class that handles optimization of temporal mapping given a:
@@ -86,6 +161,18 @@ class SalsaEngine:
         self.opt_criterion_name = kwargs.get("salsa_opt_criterion", "energy")
         self.lpf_limit = kwargs.get("loma_lpf_limit", 4)
 
+        # Parallel tempering related inputs
+        self.nb_chains = kwargs.get("salsa_number_of_chains", 4)
+        self.min_temperature = kwargs.get(
+            "salsa_min_temperature", self.start_temperature * (0.995**self.iteration_number)
+        )
+        self.exchange_interval = kwargs.get("salsa_exchange_interval", 50)
+        self.patience = kwargs.get("salsa_patience", max(1, self.iteration_number // 4))
+        self.seed = kwargs.get("salsa_seed", None)
+        self.memo_size = kwargs.get("salsa_memo_size", 100_000)
+        ## Convergence trace of each chain of the last parallel tempering run
+        self.convergence_traces: list[list[TracePoint]] = []
+
     def run(self, cme_queue: Queue):
         """! Call the necessary methods, start the processes and collect the best temporal mapping found during the
         run."""
@@ -97,33 +184,15 @@ class SalsaEngine:
     def run_simulated_annealing_opt(self, cme_queue):
         """! Run a simulated annealing optimization on the loop ordering using a loma memory allocation strategy."""
         temperature = self.start_temperature
-        start_ordering = self.temporal_mapping_lpf  # tmo stands for temporal mapping ordering
+        start_ordering = self.temporal_mapping_loop_ids  # tmo stands for temporal mapping ordering
 
         # Initialize the algorithm with a random starting point
         random.shuffle(start_ordering)
 
         # Initialize variables to store current, next and best state
-        best_state = SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            start_ordering,
-            self.opt_criterion_name,
-        )
-        current_state = SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            start_ordering,
-            self.opt_criterion_name,
-        )
-        next_state = SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            start_ordering,
-            self.opt_criterion_name,
-        )
+        evaluator = self.create_evaluator()
+        best_state = SalsaState(evaluator, start_ordering)
+        current_state = best_state
 
         for it in range(self.iteration_number):
             temperature = self.start_temperature * (0.995**it)
@@ -141,12 +210,171 @@ class SalsaEngine:
 
             if x < p:
                 # Replace the current state by the next state and compare the energy with the best state
-                current_state = deepcopy(next_state)
+                current_state = next_state
 
                 if current_state.opt_criterion < best_state.opt_criterion:
-                    best_state = deepcopy(current_state)
+                    best_state = current_state
+
+        cme_queue.put(evaluator.get_cme(best_state.ordering))
+
+    def get_temperature_ladder(self) -> list[float]:
+        """! Temperatures of the chains, geometrically spaced from the coldest to the hottest one"""
+        if self.nb_chains == 1:
+            return [self.min_temperature]
+        ratio = (self.start_temperature / self.min_temperature) ** (1 / (self.nb_chains - 1))
+        return [self.min_temperature * ratio**k for k in range(self.nb_chains)]
+
+    def run_parallel_tempering(self, nb_processes: int = 1) -> CostModelEvaluation:
+        """! Run `salsa_number_of_chains` chains at a ladder of temperatures, distributed over the given nb of
+        processes, and return the cost model evaluation of the best ordering found by any chain.
+        Every `salsa_exchange_interval` iterations, the chains at adjacent temperatures swap their states following the
+        Metropolis criterion, and the coldest chain restarts from the best state found so far if it is worse. The run
+        stops once the best state did not improve during `salsa_patience` iterations, or after
+        `salsa_iteration_number` iterations per chain. The results only depend on `salsa_seed`, not on the nb of
+        processes.
+        """
+        self.get_temporal_loops()
+        self.get_prime_factors()
 
-        cme_queue.put(best_state.cme)
+        seed_sequences = np.random.SeedSequence(self.seed).spawn(self.nb_chains + 1)
+        rng = np.random.default_rng(seed_sequences[-1])
+        temperatures = self.get_temperature_ladder()
+        nb_processes = max(1, min(nb_processes, self.nb_chains))
+        chain_ids_per_process = [list(range(self.nb_chains))[p::nb_processes] for p in range(nb_processes)]
+
+        # Chain that runs at each temperature, from the coldest to the hottest one
+        chain_at_temperature = list(range(self.nb_chains))
+        current_costs: list[float] = [0.0] * self.nb_chains
+        self.convergence_traces = [[] for _ in range(self.nb_chains)]
+        best_ordering: list[int] = []
+        best_cost = math.inf
+        restart: tuple[list[int], float] | None = None
+        nb_iterations = 0
+        nb_iterations_without_improvement = 0
+        nb_rounds = 0
+
+        chains: list[SalsaChain] = []
+        commands: list[Queue] = []
+        reports: Queue | None = None
+        workers: list[multiprocessing.Process] = []  # type: ignore
+        if nb_processes == 1:
+            evaluator = self.create_evaluator()
+            chains = [SalsaChain(evaluator, self.temporal_mapping_loop_ids, seed) for seed in seed_sequences[:-1]]
+        else:
+            commands = [multiprocessing.Queue() for _ in range(nb_processes)]  # type: ignore
+            reports = multiprocessing.Queue()  # type: ignore
+            workers = [
+                multiprocessing.Process(  # type: ignore
+                    target=run_salsa_chains,
+                    args=(self, {c: seed_sequences[c] for c in chain_ids}, commands[p], reports),
+                )
+                for p, chain_ids in enumerate(chain_ids_per_process)
+            ]
+            for worker in workers:
+                worker.start()
+
+        try:
+            while nb_iterations < self.iteration_number:
+                nb_round_iterations = min(self.exchange_interval, self.iteration_number - nb_iterations)
+                round_commands: dict[int, ChainCommand] = {
+                    chain_id: (temperatures[t], nb_round_iterations, restart if t == 0 else None)
+                    for t, chain_id in enumerate(chain_at_temperature)
+                }
+                round_reports: dict[int, ChainReport] = {}
+                if nb_processes == 1:
+                    for chain_id, command in round_commands.items():
+                        round_reports[chain_id] = chains[chain_id].run_command(command)
+                else:
+                    for p, chain_ids in enumerate(chain_ids_per_process):
+                        commands[p].put({chain_id: round_commands[chain_id] for chain_id in chain_ids})  # type: ignore
+                    round_reports = self.collect_reports(reports, workers)
+                nb_iterations += nb_round_iterations
+                nb_rounds += 1
+
+                # Collect the traces and the best state of all chains
+                improved = False
+                for chain_id in range(self.nb_chains):
+                    _, current_costs[chain_id], chain_best_ordering, chain_best_cost, trace = round_reports[chain_id]
+                    self.convergence_traces[chain_id] += trace
+                    if chain_best_cost < best_cost:
+                        best_ordering, best_cost = chain_best_ordering, chain_best_cost
+                        improved = True
+                if improved:
+                    nb_iterations_without_improvement = 0
+                else:
+                    nb_iterations_without_improvement += nb_round_iterations
+                if nb_iterations_without_improvement >= self.patience:
+                    logger.info(
+                        "SALSA stopped after %i iterations per chain: no improvement during %i iterations.",
+                        nb_iterations,
+                        nb_iterations_without_improvement,
+                    )
+                    break
+
+                # Swap the states of the chains at adjacent temperatures (alternately the even and odd pairs) by
+                # swapping their temperatures. The log of the optimization criterion acts as the energy of the states.
+                for t in range(nb_rounds % 2, self.nb_chains - 1, 2):
+                    colder, hotter = chain_at_temperature[t], chain_at_temperature[t + 1]
+                    delta = (1 / temperatures[t] - 1 / temperatures[t + 1]) * (
+                        math.log(current_costs[colder]) - math.log(current_costs[hotter])
+                    )
+                    if rng.random() < math.exp(min(0.0, delta)):
+                        chain_at_temperature[t], chain_at_temperature[t + 1] = hotter, colder
+
+                # Publish the best state to the coldest chain
+                restart = (best_ordering, best_cost) if current_costs[chain_at_temperature[0]] > best_cost else None
+        finally:
+            self.stop_workers(commands, workers)
+
+        # No state with a finite optimization criterion was visited (e.g. if `salsa_iteration_number` is 0)
+        if not best_ordering:
+            logger.warning("SALSA did not find any valid ordering, falling back to the initial ordering.")
+            best_ordering = list(self.temporal_mapping_loop_ids)
+
+        evaluator = self.create_evaluator()
+        return evaluator.get_cme(best_ordering)
+
+    @staticmethod
+    def collect_reports(
+        reports: Queue, workers: list[multiprocessing.Process]  # type: ignore
+    ) -> dict[int, ChainReport]:
+        """! Collect the reports of one round from all worker processes. Raise an exception if a worker process died,
+        e.g. because it raised an exception, instead of waiting for its report forever."""
+        round_reports: dict[int, ChainReport] = {}
+        nb_reports = 0
+        while nb_reports < len(workers):
+            try:
+                round_reports.update(reports.get(timeout=WORKER_POLL_INTERVAL))  # type: ignore
+                nb_reports += 1
+            except Empty:
+                dead_workers = [worker for worker in workers if not worker.is_alive()]
+                if dead_workers:
+                    raise RuntimeError(
+                        f"SALSA worker process exited with code {dead_workers[0].exitcode} before reporting."
+                    )
+        return round_reports
+
+    @staticmethod
+    def stop_workers(commands: list[Queue], workers: list[multiprocessing.Process]) -> None:  # type: ignore
+        """! Stop the worker processes, and terminate the ones that do not stop in time"""
+        for command_queue, worker in zip(commands, workers):
+            if worker.is_alive():
+                command_queue.put(None)  # type: ignore
+        for worker in workers:
+            worker.join(timeout=WORKER_POLL_INTERVAL)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    def create_evaluator(self) -> SalsaEvaluator:
+        return SalsaEvaluator(
+            self.accelerator,
+            self.layer,
+            self.spatial_mapping,
+            self.opt_criterion_name,
+            self.loop_encoding,
+            memo_size=self.memo_size,
+        )
 
     def get_temporal_loops(self):
         """! Get all loops that have to be temporally scheduled given layer and spatial mapping."""
@@ -208,3 +436,7 @@ class SalsaEngine:
                 loop_size = temporal_loop_pfs[loop_type]
                 for _ in range(temporal_loop_pf_counts[loop_type][i]):
                     self.temporal_mapping_lpf.append((loop_type, loop_size[i]))
+
+        # The orderings are annealed and allocated as lists of small integer loop ids
+        self.loop_encoding = LoopEncoding(self.temporal_mapping_lpf)
+        self.temporal_mapping_loop_ids = self.loop_encoding.encode(self.temporal_mapping_lpf)
@@ -26,65 +26,173 @@
 #   limitations under the License.
 #
 
-from copy import deepcopy
+from collections import OrderedDict
+from typing import Any
 
-from zigzag.cost_model.cost_model import CostModelEvaluation
-from zigzag.datatypes import LayerDim, UnrollFactorInt
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelSharedInputs
+from zigzag.datatypes import LayerDim, LayerOperand, UnrollFactorInt
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
-from zigzag.opt.loma.memory_allocator import MemoryAllocator
+from zigzag.mapping.temporal_mapping import TemporalMapping
+from zigzag.opt.loma.loop import LoopEncoding
+from zigzag.opt.loma.memory_allocator import LoopPrefixTrie, MemoryAllocator
 from zigzag.workload.layer_node import LayerNode
 
+# Loops allocated to each memory level of each operand
+Allocation = tuple[tuple[LayerOperand, tuple[tuple[tuple[LayerDim, UnrollFactorInt], ...], ...]], ...]
 
-class SalsaState:
-    """! State of SALSA, storing an ordering, his temporal mapping and his energy value."""
+
+class SalsaEvaluator:
+    """! Evaluates the optimization criterion of the orderings visited by SALSA, incrementally.
+    A swap only changes the allocation of the memory levels from the first swapped loop upwards: the allocation of the
+    lower memory levels is copied from the previously allocated ordering. Orderings that end up with an allocation that
+    was evaluated before (e.g. because the swap did not move loops across memory levels) reuse its cost. The costs are
+    memoized in least recently used caches of `memo_size` entries, and the allocators of the `allocator_memo_size`
+    most recently used orderings are kept to resume the allocation of their swapped orderings.
+    """
 
     def __init__(
         self,
         accelerator: Accelerator,
         layer: LayerNode,
         spatial_mapping: SpatialMappingInternal,
-        ordering: list[tuple[LayerDim, UnrollFactorInt]],
         opt_criterion_name: str,
+        loop_encoding: LoopEncoding,
+        memo_size: int = 100_000,
+        allocator_memo_size: int = 1_000,
     ):
+        """
+        @param loop_encoding: Encoding of the loop ids of the evaluated orderings
+        @param memo_size: Max nb of orderings, and of allocations, of which the cost is memoized. Also the max nb of loop
+          prefixes of which the tile sizes are cached.
+        @param allocator_memo_size: Max nb of orderings of which the memory allocator is kept
+        """
         assert opt_criterion_name in ("energy", "latency")  # TODO make this an enum?
-        self.ordering = ordering
         self.accelerator = accelerator
         self.layer = layer
         self.spatial_mapping = spatial_mapping
-        self.memory_hierarchy = self.accelerator.memory_hierarchy
         self.opt_criterion_name = opt_criterion_name
+        self.loop_encoding = loop_encoding
+        self.memo_size = memo_size
+        self.allocator_memo_size = allocator_memo_size
+        ## Optimization criterion of the evaluated orderings and allocations, from least to most recently used
+        self.ordering_costs: OrderedDict[tuple[int, ...], float] = OrderedDict()
+        self.allocation_costs: OrderedDict[Allocation, float] = OrderedDict()
+        ## Allocators of the evaluated orderings, from which the next allocations are resumed, from least to most
+        # recently used
+        self.allocators: OrderedDict[tuple[int, ...], MemoryAllocator] = OrderedDict()
+        ## Tile sizes of the loop prefixes, shared by the allocations of all orderings
+        self.size_cache = LoopPrefixTrie(max_nb_nodes=memo_size)
+        ## Temporal mapping-invariant cost model inputs, shared by the evaluations of all orderings
+        self.cost_model_inputs = CostModelSharedInputs(accelerator, layer, spatial_mapping, spatial_mapping)
+
+    def allocate(
+        self,
+        ordering: list[int],
+        previous_ordering: list[int] | None = None,
+    ) -> tuple[MemoryAllocator, TemporalMapping]:
+        """! Allocate the ordering to the memories.
+        @param previous_ordering: Evaluated ordering from which the memory allocation is resumed, if any.
+        """
+        previous = self.get_allocator(previous_ordering) if previous_ordering is not None else None
+        allocator = MemoryAllocator(
+            self.accelerator,
+            self.layer,
+            self.spatial_mapping,
+            ordering,
+            size_cache=self.size_cache,
+            loop_encoding=self.loop_encoding,
+        )
+        temporal_mapping = allocator.run(previous=previous)
+        self.memoize(self.allocators, tuple(ordering), allocator, self.allocator_memo_size)
+        return allocator, temporal_mapping
 
-        allocator = MemoryAllocator(self.accelerator, self.layer, self.spatial_mapping, ordering)
+    def get_allocator(self, ordering: list[int]) -> MemoryAllocator | None:
+        """! Return the allocator of the given ordering, if it is kept"""
+        ordering_key = tuple(ordering)
+        allocator = self.allocators.get(ordering_key)
+        if allocator is not None:
+            self.allocators.move_to_end(ordering_key)
+        return allocator
 
-        self.temporal_mapping = allocator.run()  # allocate this ordering to the memories
+    def get_cme(self, ordering: list[int]) -> CostModelEvaluation:
+        """! Evaluate the cost model for the given ordering"""
+        _, temporal_mapping = self.allocate(ordering)
+        return self.evaluate_temporal_mapping(temporal_mapping)
 
-        self.cme = CostModelEvaluation(
+    def evaluate_temporal_mapping(self, temporal_mapping: TemporalMapping) -> CostModelEvaluation:
+        """! Run the cost model on an allocated ordering"""
+        return CostModelEvaluation(
             accelerator=self.accelerator,
             layer=self.layer,
             spatial_mapping=self.spatial_mapping,
             spatial_mapping_int=self.spatial_mapping,  # TODO the int version is missing?
-            temporal_mapping=self.temporal_mapping,
+            temporal_mapping=temporal_mapping,
+            shared_inputs=self.cost_model_inputs,
         )
 
+    def evaluate(
+        self,
+        ordering: list[int],
+        previous_ordering: list[int] | None = None,
+    ) -> float:
+        """! Return the optimization criterion (to be minimized) of the given ordering.
+        @param previous_ordering: Evaluated ordering from which the memory allocation is resumed, if any.
+        """
+        ordering_key = tuple(ordering)
+        cost = self.ordering_costs.get(ordering_key)
+        if cost is not None:
+            self.ordering_costs.move_to_end(ordering_key)
+            # The allocation of the next swap of this ordering is resumed from its allocator
+            if self.get_allocator(ordering) is None:
+                self.allocate(ordering, previous_ordering)
+            return cost
+
+        allocator, temporal_mapping = self.allocate(ordering, previous_ordering)
+        allocation: Allocation = tuple(
+            (layer_op, tuple(tuple(loops) for loops in levels))
+            for layer_op, levels in allocator.temporal_mapping_dict.items()
+        )
+        cost = self.allocation_costs.get(allocation)
+        if cost is None:
+            cme = self.evaluate_temporal_mapping(temporal_mapping)
+            cost = cme.energy_total if self.opt_criterion_name == "energy" else cme.latency_total0
+            self.memoize(self.allocation_costs, allocation, cost)
+        else:
+            self.allocation_costs.move_to_end(allocation)
+
+        self.memoize(self.ordering_costs, ordering_key, cost)
+        return cost
+
+    def memoize(self, memo: OrderedDict[Any, Any], key: Any, value: Any, memo_size: int | None = None) -> None:
+        """! Store the value in the memo, evicting the least recently used entry if the memo is full
+        @param memo_size: Max nb of entries of the memo. Defaults to `self.memo_size`
+        """
+        memo[key] = value
+        if len(memo) > (self.memo_size if memo_size is None else memo_size):
+            memo.popitem(last=False)
+
+
+class SalsaState:
+    """! State of SALSA, storing an ordering and its optimization criterion value."""
+
+    def __init__(
+        self,
+        evaluator: SalsaEvaluator,
+        ordering: list[int],
+        opt_criterion: float | None = None,
+        previous_ordering: list[int] | None = None,
+    ):
+        self.evaluator = evaluator
+        self.ordering = ordering
         # The optimization criterion will be minimized
-        if self.opt_criterion_name == "energy":
-            self.opt_criterion = self.cme.energy_total
-        elif self.opt_criterion_name == "latency":
-            self.opt_criterion = self.cme.latency_total0
+        self.opt_criterion = evaluator.evaluate(ordering, previous_ordering) if opt_criterion is None else opt_criterion
 
     def swap(self, i: int, j: int) -> "SalsaState":
         """! Swap between the element at position i and j in the ordering and return the new resulting state."""
+        if self.ordering[i] == self.ordering[j]:
+            return SalsaState(self.evaluator, self.ordering, self.opt_criterion)
 
-        swapped_ordering = deepcopy(self.ordering)
-        temp = swapped_ordering[i]
-        swapped_ordering[i] = swapped_ordering[j]
-        swapped_ordering[j] = temp
-
-        return SalsaState(
-            self.accelerator,
-            self.layer,
-            self.spatial_mapping,
-            swapped_ordering,
-            self.opt_criterion_name,
-        )
+        swapped_ordering = list(self.ordering)
+        swapped_ordering[i], swapped_ordering[j] = swapped_ordering[j], swapped_ordering[i]
+        return SalsaState(self.evaluator, swapped_ordering, previous_ordering=self.ordering)
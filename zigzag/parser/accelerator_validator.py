@@ -1,9 +1,12 @@
 import logging
+from functools import lru_cache
 from math import log2
 from typing import Any
 
 from cerberus import Validator  # type: ignore
 
+from zigzag.parser.compiled_schema import CompiledSchema
+
 logger = logging.getLogger(__name__)
 
 
@@ -268,12 +271,23 @@ class AcceleratorValidator:
     }
 
     def __init__(self, data: Any):
-        """Initialize Validator object, assign schema and store normalize user-given data"""
-        self.validator = Validator()
-        self.validator.schema = AcceleratorValidator.SCHEMA  # type: ignore
-        self.data: dict[str, Any] = self.validator.normalized(data)  # type: ignore
+        """Store the normalized user-given data. Data that passes the compiled schema is normalized without cerberus,
+        other data is normalized by a cerberus Validator, which reports the schema errors in `validate`."""
+        self.validator: Validator | None = None
+        self.data: dict[str, Any] = AcceleratorValidator.get_compiled_schema().normalize(data)  # type: ignore
+        self.passed_compiled_schema = self.data is not None
+        if not self.passed_compiled_schema:
+            self.validator = Validator()
+            self.validator.schema = AcceleratorValidator.SCHEMA  # type: ignore
+            self.data = self.validator.normalized(data)  # type: ignore
         self.is_valid = True
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_compiled_schema() -> CompiledSchema:
+        """! The SCHEMA, compiled once for the fast validation path"""
+        return CompiledSchema(AcceleratorValidator.SCHEMA)
+
     def invalidate(self, extra_msg: str):
         self.is_valid = False
         logger.critical("User-defined accelerator is invalid. %s", extra_msg)
@@ -283,10 +297,11 @@ class AcceleratorValidator:
         return true iff valid.
         """
         # Validate according to schema
-        validate_success = self.validator.validate(self.data)  # type: ignore
-        errors = self.validator.errors  # type: ignore
-        if not validate_success:
-            self.invalidate(f"The following restrictions apply: {errors}")
+        if not self.passed_compiled_schema:
+            validate_success = self.validator.validate(self.data)  # type: ignore
+            errors = self.validator.errors  # type: ignore
+            if not validate_success:
+                self.invalidate(f"The following restrictions apply: {errors}")
 
         # Extra validation rules outside of schema
         self.is_imc = self.data["operational_array"]["is_imc"]
@@ -0,0 +1,149 @@
+import re
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable
+
+# Types of the cerberus `type` rule, with the same semantics (e.g. cerberus accepts ints as floats)
+TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int),
+    "float": lambda value: isinstance(value, (float, int)),
+    "boolean": lambda value: isinstance(value, bool),
+    "dict": lambda value: isinstance(value, Mapping),
+    "list": lambda value: isinstance(value, Sequence) and not isinstance(value, str),
+}
+
+# Rules that are handled by the compiled schema. Schemas with other rules are not compiled.
+SUPPORTED_RULES = {
+    "type",
+    "required",
+    "nullable",
+    "default",
+    "regex",
+    "allowed",
+    "min",
+    "minlength",
+    "maxlength",
+    "schema",
+    "valuesrules",
+}
+
+
+class FastPathMiss(Exception):
+    """! The document can not be handled by the compiled schema: it is invalid or it needs the full cerberus
+    validation."""
+
+
+class CompiledSchema:
+    """! Cerberus schema compiled to a tree of plain Python checks, to validate and normalize documents that are valid
+    without the overhead of cerberus. Only the rules in `SUPPORTED_RULES` are handled, with the same semantics as
+    cerberus (defaults are filled in for missing fields and for None values of non-nullable fields, unknown fields are
+    not allowed).
+    The compiled schema never reports errors: any document that does not pass all checks is a miss, which should be
+    handled by the full cerberus validator to get the same normalization and error messages as before.
+    """
+
+    def __init__(self, schema: dict[str, Any]):
+        try:
+            self.normalize_document: Callable[[Any], Any] | None = self.compile_mapping(schema)
+        except NotImplementedError:
+            self.normalize_document = None
+
+    def normalize(self, document: Any) -> dict[str, Any] | None:
+        """! Return the validated and normalized copy of the document, or None if the document is a miss"""
+        if self.normalize_document is None:
+            return None
+        try:
+            return self.normalize_document(document)
+        except (FastPathMiss, TypeError):
+            return None
+
+    def compile_mapping(self, schema: dict[str, Any]) -> Callable[[Any], dict[str, Any]]:
+        fields: dict[str, tuple[dict[str, Any], Callable[[Any], Any]]] = {
+            field: (rules, self.compile_rules(rules)) for field, rules in schema.items()
+        }
+
+        def normalize_mapping(document: Any) -> dict[str, Any]:
+            if not isinstance(document, Mapping):
+                raise FastPathMiss
+            normalized: dict[str, Any] = {}
+            for field, value in document.items():
+                if field not in fields:
+                    raise FastPathMiss
+                rules, check = fields[field]
+                if value is None and not rules.get("nullable", False) and "default" in rules:
+                    value = rules["default"]
+                normalized[field] = check(value)
+            # Cerberus appends the defaults of the missing fields in schema order
+            for field, (rules, check) in fields.items():
+                if field in normalized:
+                    continue
+                if "default" in rules:
+                    normalized[field] = check(rules["default"])
+                elif rules.get("required", False):
+                    raise FastPathMiss
+            return normalized
+
+        return normalize_mapping
+
+    def compile_rules(self, rules: dict[str, Any]) -> Callable[[Any], Any]:
+        if not set(rules) <= SUPPORTED_RULES:
+            raise NotImplementedError(f"Unsupported rules {set(rules) - SUPPORTED_RULES}")
+
+        nullable: bool = rules.get("nullable", False)
+        type_name = rules.get("type")
+        if type_name is not None and (not isinstance(type_name, str) or type_name not in TYPE_CHECKS):
+            raise NotImplementedError(f"Unsupported type {type_name}")
+        type_check = TYPE_CHECKS[type_name] if type_name is not None else None
+        regex = None
+        if "regex" in rules:
+            # Cerberus requires the full string to match
+            regex = re.compile(rules["regex"] if rules["regex"].endswith("$") else rules["regex"] + "$")
+        allowed = rules.get("allowed")
+        min_value = rules.get("min")
+        min_length = rules.get("minlength")
+        max_length = rules.get("maxlength")
+
+        normalize_container: Callable[[Any], Any] | None = None
+        if "schema" in rules:
+            if type_name == "dict":
+                normalize_container = self.compile_mapping(rules["schema"])
+            elif type_name == "list":
+                check_item = self.compile_rules(rules["schema"])
+                normalize_container = lambda value: [check_item(item) for item in value]  # noqa: E731
+            else:
+                raise NotImplementedError("Rule `schema` without container type")
+        elif "valuesrules" in rules:
+            if type_name != "dict":
+                raise NotImplementedError("Rule `valuesrules` without dict type")
+            check_value = self.compile_rules(rules["valuesrules"])
+            normalize_container = lambda value: {key: check_value(val) for key, val in value.items()}  # noqa: E731
+        elif type_name == "dict":
+            normalize_container = dict
+        elif type_name == "list":
+            normalize_container = list
+
+        def check(value: Any) -> Any:
+            if value is None:
+                if nullable:
+                    return None
+                raise FastPathMiss
+            if type_check is not None and not type_check(value):
+                raise FastPathMiss
+            if regex is not None and isinstance(value, str) and not regex.match(value):
+                raise FastPathMiss
+            if allowed is not None:
+                if isinstance(value, str) or not isinstance(value, Sequence):
+                    if value not in allowed:
+                        raise FastPathMiss
+                elif any(item not in allowed for item in value):
+                    raise FastPathMiss
+            # Values that can not be compared (ignored by cerberus) raise a TypeError, which is a miss as well
+            if min_value is not None and value < min_value:
+                raise FastPathMiss
+            if min_length is not None and len(value) < min_length:
+                raise FastPathMiss
+            if max_length is not None and len(value) > max_length:
+                raise FastPathMiss
+            return normalize_container(value) if normalize_container is not None else value
+
+        return check
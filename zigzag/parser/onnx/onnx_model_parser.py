@@ -9,6 +9,7 @@ from zigzag.parser.onnx.gemm_parser import GemmParser
 from zigzag.parser.onnx.matmul_parser import MatMulParser
 from zigzag.parser.onnx.onnx_operator_parser import ONNXOperatorParser
 from zigzag.parser.onnx.utils import (
+    OnnxModelIndex,
     parse_dynamic_onnx_model,
     parse_onnx_model_from_path,
 )
@@ -75,10 +76,12 @@ class ONNXModelParser:
         same file
         model = onnx.load('path/to/the/model.onnx')  # reload the inferred model
 
-        Saves for each node_id the inputs and outputs tensor names
+        Saves for each node_id the inputs and outputs tensor names. The tensor types, initializers and producing nodes
+        are indexed once and shared with all operator parsers.
         """
         nodes_inputs: dict[int, Any] = {}
         nodes_outputs: dict[int, Any] = {}
+        model_index = OnnxModelIndex(self.onnx_model)
 
         # Workload Graph
         workload = ONNXWorkload()
@@ -86,6 +89,7 @@ class ONNXModelParser:
         for node_id, node in enumerate(self.onnx_model.graph.node):  # type: ignore
             nodes_inputs[node_id] = node.input
             nodes_outputs[node_id] = node.output
+            model_index.add_node_outputs(node_id, node.output)
 
             parser_class = self.get_parser_class(node)
             parser = parser_class(
@@ -94,6 +98,7 @@ class ONNXModelParser:
                 nodes_outputs=nodes_outputs,
                 onnx_model=self.onnx_model,
                 mapping_data=self.mapping_data,
+                model_index=model_index,
             )
 
             node_obj = parser.run()
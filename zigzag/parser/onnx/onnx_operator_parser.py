@@ -4,7 +4,7 @@ from typing import Any
 from onnx import ModelProto, NodeProto
 
 from zigzag.hardware.architecture.accelerator import Accelerator
-from zigzag.parser.onnx.utils import get_attribute_ints_with_name, get_onnx_tensor_type
+from zigzag.parser.onnx.utils import OnnxModelIndex, get_attribute_ints_with_name, get_onnx_tensor_type
 from zigzag.workload.layer_node_abc import LayerNodeABC
 
 
@@ -25,13 +25,23 @@ class ONNXOperatorParser(metaclass=ABCMeta):
         *,
         mapping_data: list[dict[str, Any]] | None = None,
         accelerator: Accelerator | None = None,
+        model_index: OnnxModelIndex | None = None,
     ) -> None:
+        """
+        @param model_index: Index of the model, shared by the parsers of all nodes. The nodes in `nodes_outputs` must
+        have been added to it. If None, an index is built for this parser only.
+        """
         self.node_id = node_id
         self.node = node
         self.nodes_outputs = nodes_outputs
         self.onnx_model = onnx_model
         self.mapping_data = mapping_data
         self.accelerator = accelerator
+        if model_index is None:
+            model_index = OnnxModelIndex(onnx_model)
+            for n, outputs in nodes_outputs.items():
+                model_index.add_node_outputs(n, outputs)
+        self.model_index = model_index
 
     @abstractmethod
     def run(self) -> LayerNodeABC: ...
@@ -42,9 +52,9 @@ class ONNXOperatorParser(metaclass=ABCMeta):
         output_name = self.node.output[0]
         weight_name = self.get_weight_name(self.node)
 
-        input_elem_type = get_onnx_tensor_type(input_name, self.onnx_model).elem_type
-        output_elem_type = get_onnx_tensor_type(output_name, self.onnx_model).elem_type
-        weight_elem_type = get_onnx_tensor_type(weight_name, self.onnx_model).elem_type
+        input_elem_type = get_onnx_tensor_type(input_name, self.onnx_model, self.model_index).elem_type
+        output_elem_type = get_onnx_tensor_type(output_name, self.onnx_model, self.model_index).elem_type
+        weight_elem_type = get_onnx_tensor_type(weight_name, self.onnx_model, self.model_index).elem_type
 
         return input_elem_type, output_elem_type, weight_elem_type
 
@@ -64,12 +74,7 @@ class ONNXOperatorParser(metaclass=ABCMeta):
 
     def get_node_predecessors(self) -> list[int]:
         """Compute node input sources"""
-        predecessors: list[int] = []
-        for node_input in self.node.input:
-            for n in self.nodes_outputs:
-                if node_input in self.nodes_outputs[n]:
-                    predecessors.append(n)
-        return predecessors
+        return self.model_index.get_node_predecessors(self.node)
 
     def get_operand_source_user_format(self, predecessors: list[int]):
         """Set input source and indicate constant operands"""
@@ -4,7 +4,17 @@ from enum import Enum, auto
 from typing import Any, List
 
 import onnx
-from onnx import AttributeProto, GraphProto, ModelProto, NodeProto, TypeProto, compose, helper, numpy_helper
+from onnx import (
+    AttributeProto,
+    GraphProto,
+    ModelProto,
+    NodeProto,
+    TensorProto,
+    TypeProto,
+    compose,
+    helper,
+    numpy_helper,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -149,7 +159,48 @@ class OnnxTensorType:
         return OnnxTensorType(shape, elem_type, category)
 
 
-def get_onnx_tensor_type(name: str, model: ModelProto):
+class OnnxModelIndex:
+    """! Name-based indexes of an ONNX model, built once per model so that lookups don't scan the graph.
+    - tensor types of the graph inputs, outputs, value infos and initializers (in that order of precedence)
+    - initializers
+    - ids of the nodes that produce each tensor, for the nodes added so far
+    """
+
+    def __init__(self, model: ModelProto):
+        self.tensor_types: dict[str, OnnxTensorType] = {}
+        self.initializers: dict[str, TensorProto] = {}
+        self.producers: dict[str, list[int]] = {}
+
+        for init in model.graph.initializer:
+            self.initializers.setdefault(init.name, init)
+        # Index in order of precedence: the first tensor found with a given name is kept
+        for input_value in model.graph.input:
+            self.add_tensor_type(input_value.name, input_value.type.tensor_type, OnnxTensorCategory.INPUT)
+        for output in model.graph.output:
+            self.add_tensor_type(output.name, output.type.tensor_type, OnnxTensorCategory.OUTPUT)
+        for value_info in model.graph.value_info:
+            self.add_tensor_type(value_info.name, value_info.type.tensor_type, OnnxTensorCategory.HIDDEN)
+        for name, init in self.initializers.items():
+            if name not in self.tensor_types:
+                # initializers are represented a bit differently from other tensors
+                self.tensor_types[name] = OnnxTensorType(list(init.dims), init.data_type, OnnxTensorCategory.CONSTANT)
+
+    def add_tensor_type(self, name: str, tensor_type: TypeProto.Tensor, category: OnnxTensorCategory) -> None:
+        if name not in self.tensor_types:
+            self.tensor_types[name] = OnnxTensorType.from_tensor_type(tensor_type, category)
+
+    def add_node_outputs(self, node_id: int, outputs: Any) -> None:
+        """! Register the given node as producer of its output tensors. Nodes must be added in order of id."""
+        for output_name in outputs:
+            self.producers.setdefault(output_name, []).append(node_id)
+
+    def get_node_predecessors(self, node: NodeProto) -> list[int]:
+        """! Ids of the added nodes that produce the inputs of the given node, in order of input"""
+        return [producer for node_input in node.input for producer in self.producers.get(node_input, [])]
+
+
+def find_onnx_tensor_type(name: str, model: ModelProto) -> OnnxTensorType | None:
+    """! Scan the model for the type of the tensor with the given name"""
     for input_value in model.graph.input:
         if input_value.name == name:
             return OnnxTensorType.from_tensor_type(input_value.type.tensor_type, OnnxTensorCategory.INPUT)
@@ -167,20 +218,30 @@ def get_onnx_tensor_type(name: str, model: ModelProto):
             # initializers are represented a bit differently from other tensors
             return OnnxTensorType(list(init.dims), init.data_type, OnnxTensorCategory.CONSTANT)
 
-    raise KeyError(
-        f""
-        f"Could not find type for value {name} in model. "
-        f"Make sure you are loading in an inferred model, "
-        f"see https://github.com/onnx/onnx/blob/main/docs/PythonAPIOverview.md#running-shape-inference-on-an-onnx-model"
-    )
+    return None
+
+
+def get_onnx_tensor_type(name: str, model: ModelProto, model_index: OnnxModelIndex | None = None) -> OnnxTensorType:
+    """! Return the type of the tensor with the given name. The model is only scanned if no index is given."""
+    tensor_type = model_index.tensor_types.get(name) if model_index is not None else find_onnx_tensor_type(name, model)
+    if tensor_type is None:
+        raise KeyError(
+            f""
+            f"Could not find type for value {name} in model. "
+            f"Make sure you are loading in an inferred model, "
+            f"see https://github.com/onnx/onnx/blob/main/docs/PythonAPIOverview.md#running-shape-inference-on-an-onnx-model"
+        )
+    return tensor_type
 
 
-def get_node_input_output_dimension_shapes(node: NodeProto, model: ModelProto):
+def get_node_input_output_dimension_shapes(
+    node: NodeProto, model: ModelProto, model_index: OnnxModelIndex | None = None
+):
     # assumed it is the first input, don't see a way to otherwise know
     input_name = node.input[0]
-    input_shape = get_onnx_tensor_type(input_name, model).shape
+    input_shape = get_onnx_tensor_type(input_name, model, model_index).shape
 
     output_name = node.output[0]
-    output_shape = get_onnx_tensor_type(output_name, model).shape
+    output_shape = get_onnx_tensor_type(output_name, model, model_index).shape
 
     return input_shape, output_shape
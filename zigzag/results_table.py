@@ -0,0 +1,134 @@
+import json
+import logging
+import math
+import os
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelEvaluationABC, CumulativeCME
+from zigzag.cost_model.cost_model_imc import CostModelEvaluationForIMC
+
+logger = logging.getLogger(__name__)
+
+# Value of every column in a single row of a results table
+ResultsRow = dict[str, float | str]
+
+METADATA_FILENAME = "columns.json"
+
+
+def get_cme_row(cme: CostModelEvaluationABC, **config: float | str) -> ResultsRow:
+    """! Flatten the results of a cost model evaluation into a row of a results table.
+    @param config Extra columns that identify the configuration of the evaluation, e.g. the swept hardware parameters.
+    """
+    row: ResultsRow = dict(config)
+    if isinstance(cme, CostModelEvaluation):
+        row["accelerator"] = cme.accelerator.name
+        row["layer"] = cme.layer.name
+        row["layer_id"] = cme.layer.id
+        row["spatial_mapping"] = str(cme.spatial_mapping_int)
+        row["temporal_mapping"] = str(cme.temporal_mapping)
+    elif isinstance(cme, CumulativeCME):
+        row["layer"] = "overall"
+
+    row["energy_total"] = cme.energy_total
+    row["operational_energy"] = cme.mac_energy
+    row["memory_energy"] = cme.mem_energy
+    for layer_op, energies in cme.mem_energy_breakdown.items():
+        for mem_lv, energy in enumerate(energies):
+            row[f"memory_energy.{layer_op}.{mem_lv}"] = energy
+    row["latency_total"] = cme.latency_total2
+    row["computation"] = cme.latency_total0
+    row["data_onloading"] = cme.latency_total1 - cme.latency_total0
+    row["data_offloading"] = cme.latency_total2 - cme.latency_total1
+    row["mac_utilization"] = cme.mac_utilization2
+
+    if isinstance(cme, CostModelEvaluationForIMC):
+        for name, energy in cme.mac_energy_breakdown.items():
+            row[f"operational_energy.{name}"] = energy
+        row["tclk"] = cme.tclk
+        row["area_total"] = cme.area_total
+        row["imc_area"] = cme.imc_area
+        row["memory_area"] = cme.mem_area
+        for name, area in cme.imc_area_breakdown.items():
+            row[f"imc_area.{name}"] = area
+        for name, area in cme.mem_area_breakdown.items():
+            row[f"memory_area.{name}"] = area
+    return row
+
+
+class ResultsTableWriter:
+    """! Collects rows of results and saves them as a columnar results table: a folder with a numpy (.npy) file per
+    column, which `ResultsTable` reads lazily. Rows with missing columns are filled with NaN or an empty string.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        """
+        @param path: folder of the results table
+        @param append: iff true, the rows of the existing table at this path are kept
+        """
+        self.path = path
+        self.columns: dict[str, list[float | str]] = {}
+        self.nb_rows = 0
+        if append and os.path.exists(os.path.join(path, METADATA_FILENAME)):
+            existing_table = ResultsTable(path)
+            self.columns = {name: existing_table[name].tolist() for name in existing_table.columns}
+            self.nb_rows = len(existing_table)
+
+    def add_row(self, row: ResultsRow) -> None:
+        for name, value in row.items():
+            if name not in self.columns:
+                self.columns[name] = [math.nan if isinstance(value, (int, float)) else ""] * self.nb_rows
+            self.columns[name].append(value)
+        self.nb_rows += 1
+        for name, values in self.columns.items():
+            if len(values) < self.nb_rows:
+                values.append(math.nan if isinstance(values[0], (int, float)) else "")
+
+    def save(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        filenames: dict[str, str] = {}
+        for idx, (name, values) in enumerate(self.columns.items()):
+            filenames[name] = f"column_{idx}.npy"
+            is_numeric = all(isinstance(value, (int, float)) for value in values)
+            column = np.array(values, dtype=np.float64) if is_numeric else np.array([str(value) for value in values])
+            np.save(os.path.join(self.path, filenames[name]), column, allow_pickle=False)
+        with open(os.path.join(self.path, METADATA_FILENAME), "w", encoding="UTF-8") as fp:
+            json.dump({"nb_rows": self.nb_rows, "columns": filenames}, fp, indent=4)
+        logger.info("Saved results table with %i rows and %i columns to %s", self.nb_rows, len(filenames), self.path)
+
+
+class ResultsTable:
+    """! Lazy reader of a results table saved by `ResultsTableWriter`. Columns are only loaded when accessed, as
+    read-only memory-mapped numpy arrays.
+    """
+
+    def __init__(self, path: str):
+        """
+        @param path: folder of the results table
+        """
+        self.path = path
+        with open(os.path.join(path, METADATA_FILENAME), encoding="UTF-8") as fp:
+            metadata = json.load(fp)
+        self.nb_rows: int = metadata["nb_rows"]
+        self.filenames: dict[str, str] = metadata["columns"]
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.filenames)
+
+    def __len__(self) -> int:
+        return self.nb_rows
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.filenames
+
+    def __getitem__(self, name: str) -> NDArray[Any]:
+        if name not in self.filenames:
+            raise KeyError(f"Column {name} not in results table {self.path}")
+        return np.load(os.path.join(self.path, self.filenames[name]), mmap_mode="r", allow_pickle=False)
+
+    def load(self, columns: list[str] | None = None) -> dict[str, NDArray[Any]]:
+        """! Load the given columns (all columns if None)"""
+        return {name: self[name] for name in (self.columns if columns is None else columns)}
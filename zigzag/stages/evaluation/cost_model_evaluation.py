@@ -1,7 +1,8 @@
 import logging
 from typing import Any
 
-from zigzag.cost_model.cost_model import CostModelEvaluation
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelEvaluationABC, CostModelSharedInputs
+from zigzag.cost_model.cost_model_cache import CostModelCache, get_cost_model_cache
 from zigzag.cost_model.cost_model_imc import CostModelEvaluationForIMC
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.imc_array import ImcArray
@@ -26,8 +27,20 @@ class CostModelStage(Stage):
         spatial_mapping_int: SpatialMappingInternal,
         temporal_mapping: TemporalMapping,
         access_same_data_considered_as_no_access: bool = True,
+        cost_model_cache_path: str | None = None,
+        cost_model_cache_size: int = 100_000,
+        cost_model_shared_inputs: CostModelSharedInputs | None = None,
         **kwargs: Any,
     ):
+        """
+        @param cost_model_cache_path: Path of the persistent cost model cache (sqlite file). If given, evaluations of
+        previously seen (accelerator, layer, spatial mapping, temporal mapping) combinations are loaded from the cache
+        instead of recomputed. Disabled if None.
+        @param cost_model_cache_size: Maximal number of evaluations kept in the cache (least recently used are evicted).
+        @param cost_model_shared_inputs: Temporal mapping-invariant cost model inputs, shared by the evaluations of all
+        temporal mappings of the same layer and spatial mapping. Derived for this evaluation only if None, or if they
+        were derived from other objects.
+        """
         super().__init__(list_of_callables, **kwargs)
 
         self.accelerator = accelerator
@@ -36,14 +49,49 @@ class CostModelStage(Stage):
         self.spatial_mapping_int = spatial_mapping_int
         self.temporal_mapping = temporal_mapping
         self.access_same_data_considered_as_no_access = access_same_data_considered_as_no_access
+        self.shared_inputs = (
+            cost_model_shared_inputs
+            if cost_model_shared_inputs is not None
+            and cost_model_shared_inputs.matches(accelerator, layer, spatial_mapping, spatial_mapping_int)
+            else None
+        )
+        self.cache: CostModelCache | None = (
+            get_cost_model_cache(cost_model_cache_path, cost_model_cache_size) if cost_model_cache_path else None
+        )
 
     def run(self):
         """! Run the cost model stage by calling the internal zigzag cost model with the correct inputs."""
+        if self.cache is None:
+            yield self.evaluate(), None
+            return
+
+        is_imc = isinstance(self.accelerator.operational_array, ImcArray)
+        cme_type = CostModelEvaluationForIMC if is_imc else CostModelEvaluation
+        key = self.cache.get_key(
+            cme_type,
+            self.accelerator,
+            self.layer,
+            self.spatial_mapping,
+            self.spatial_mapping_int,
+            self.temporal_mapping,
+            self.access_same_data_considered_as_no_access,
+        )
+        live_objects = self.cache.get_live_objects(
+            self.accelerator, self.layer, self.spatial_mapping, self.spatial_mapping_int, self.temporal_mapping
+        )
+        cme = self.cache.get(key, live_objects)
+        if cme is None:
+            cme = self.evaluate()
+            self.cache.put(key, cme, live_objects)
+        yield cme, None
+
+    def evaluate(self) -> CostModelEvaluationABC:
+        """! Evaluate the mapping with the cost model that matches the operational array"""
         operational_array = self.accelerator.operational_array
         if isinstance(operational_array, ImcArray):
             ###############################################
             """
-                I added this to see the max utilization
+            I added this to see the max utilization
             """
             # print("tops_peak, topsw_peak, topsmm2_peak")
             # print(self.accelerator.operational_array.get_macro_level_peak_performance())
@@ -55,6 +103,7 @@ class CostModelStage(Stage):
                 spatial_mapping_int=self.spatial_mapping_int,
                 temporal_mapping=self.temporal_mapping,
                 access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+                shared_inputs=self.shared_inputs,
             )
         else:
             cme = CostModelEvaluation(
@@ -64,8 +113,9 @@ class CostModelStage(Stage):
                 spatial_mapping_int=self.spatial_mapping_int,
                 temporal_mapping=self.temporal_mapping,
                 access_same_data_considered_as_no_access=self.access_same_data_considered_as_no_access,
+                shared_inputs=self.shared_inputs,
             )
-        yield cme, None
+        return cme
 
     def is_leaf(self) -> bool:
         return True
@@ -10,16 +10,17 @@ from typing import Any
 from zigzag.datatypes import MemoryOperand
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.memory_hierarchy import MemoryHierarchy
-from zigzag.hardware.architecture.memory_instance import MemoryInstance
-from zigzag.hardware.architecture.memory_level import MemoryLevel, ServedMemDimensions
+from zigzag.hardware.architecture.memory_level import MemoryLevel
 from zigzag.hardware.architecture.memory_port import DataDirection, PortAllocation
 from zigzag.stages.stage import Stage, StageCallable
-from zigzag.utils import pickle_deepcopy
 from zigzag.workload.layer_node import LayerNode
 from zigzag.workload.workload_abc import WorkloadABC, WorkloadNoDummyABC
 
 logger = logging.getLogger(__name__)
 
+# (act, weight, output) memory operands and the (act, weight, output) target memory levels of a layer
+PrunedAcceleratorKey = tuple[MemoryOperand, MemoryOperand, MemoryOperand, int, int, int]
+
 
 class SearchInterLayerDataLocalityStage(Stage):
     """! Class for searching lowest allowed memory level per operand per layer"""
@@ -46,6 +47,8 @@ class SearchInterLayerDataLocalityStage(Stage):
         self.each_layer_io_data_size: dict[int, list[dict[MemoryOperand, int]]] = {}
         # record of the weight size of entire workload (unit: bit)
         self.weight_size_entire_workload: int = 0
+        # accelerators without unused memory levels, shared by the layers with the same target memory levels
+        self.pruned_accelerators: dict[PrunedAcceleratorKey, Accelerator] = {}
 
         # Derive top mem level of input, weight, output
         layer_0 = self.workload_no_dummy.node_list[0]
@@ -124,6 +127,7 @@ class SearchInterLayerDataLocalityStage(Stage):
             workload=self.workload,
             mem_update_list=self.mem_update_list,
             mem_update_weight=self.mem_update_weight,
+            pruned_accelerators=self.pruned_accelerators,
             **self.kwargs,
         )
         for cme, (layer, extra_info) in sub_stage.run():
@@ -277,13 +281,19 @@ class ExploitInterLayerDataLocalityStage(Stage):
         layer: LayerNode,
         mem_update_list: dict[int, dict[MemoryOperand, int]],
         mem_update_weight: int,
+        pruned_accelerators: dict[PrunedAcceleratorKey, Accelerator] | None = None,
         **kwargs: Any,
     ):
+        """
+        @param pruned_accelerators: Accelerators without unused memory levels generated for previous layers, by their
+        target memory levels. The accelerator of this layer is reused from (or added to) it.
+        """
         super().__init__(list_of_callables, **kwargs)
         self.accelerator = accelerator
         self.layer = layer
         self.mem_update_list = mem_update_list
         self.mem_update_weight = mem_update_weight
+        self.pruned_accelerators = pruned_accelerators if pruned_accelerators is not None else {}
 
     def run(self):
         modified_accelerator = self.generate_accelerator_with_removing_unused_memory()
@@ -299,9 +309,6 @@ class ExploitInterLayerDataLocalityStage(Stage):
     def generate_accelerator_with_removing_unused_memory(self) -> Accelerator:
         # Remove no-use memory level according to update_mem_list and mem_update_weight
         curr_id = self.layer.id
-        operational_array = self.accelerator.operational_array
-        memory_hierarchy = self.accelerator.memory_hierarchy
-
         act_layer_op = self.layer.get_act_layer_op()
         weight_layer_op = self.layer.get_weight_layer_op()
         output_layer_op = self.layer.output_operand
@@ -331,6 +338,27 @@ class ExploitInterLayerDataLocalityStage(Stage):
         else:
             target_const_mem_level = self.mem_update_weight
 
+        key: PrunedAcceleratorKey = (
+            act_mem_op,
+            weight_mem_op,
+            output_mem_op,
+            target_act_mem_level,
+            target_const_mem_level,
+            target_output_mem_level,
+        )
+        if key not in self.pruned_accelerators:
+            self.pruned_accelerators[key] = self.remove_unused_memory(key)
+            logger.info("Update mem architecture for layer %s...", self.layer)
+        return self.pruned_accelerators[key]
+
+    def remove_unused_memory(self, key: PrunedAcceleratorKey) -> Accelerator:
+        """! Build the accelerator without the memory levels above the target levels of the operands. The memory
+        instances and served dimensions are shared with the original accelerator, they are not modified."""
+        act_mem_op, weight_mem_op, output_mem_op = key[:3]
+        target_act_mem_level, target_const_mem_level, target_output_mem_level = key[3:]
+        operational_array = self.accelerator.operational_array
+        memory_hierarchy = self.accelerator.memory_hierarchy
+
         # Initialize the new memory hierarchy
         mh_name = memory_hierarchy.name
         new_mh_name = mh_name + "-without-unused-memory"
@@ -343,7 +371,6 @@ class ExploitInterLayerDataLocalityStage(Stage):
             port_alloc: PortAllocation = memory_level.port_alloc_raw
             served_dimensions = memory_level.served_dimensions
 
-            new_memory_instance: MemoryInstance = pickle_deepcopy(memory_instance)
             new_operands: list[MemoryOperand] = []
             new_port_alloc_data: dict[MemoryOperand, dict[DataDirection, str]] = {}
 
@@ -359,13 +386,12 @@ class ExploitInterLayerDataLocalityStage(Stage):
                 new_port_alloc_data[output_mem_op] = port_alloc.get_alloc_for_mem_op(output_mem_op)
 
             new_port_alloc = PortAllocation(new_port_alloc_data)
-            new_served_dimensions: ServedMemDimensions = pickle_deepcopy(served_dimensions)
             if len(new_operands) > 0:
                 new_memory_hierarchy.add_memory(
-                    memory_instance=new_memory_instance,
+                    memory_instance=memory_instance,
                     operands=new_operands,
                     port_alloc=new_port_alloc,
-                    served_dimensions=new_served_dimensions,
+                    served_dimensions=served_dimensions,
                 )
 
         # Create the new accelerator
@@ -376,7 +402,4 @@ class ExploitInterLayerDataLocalityStage(Stage):
             operational_array=operational_array,
             memory_hierarchy=new_memory_hierarchy,
         )
-
-        logger.info("Update mem architecture for layer %s...", self.layer)
-
         return new_accelerator
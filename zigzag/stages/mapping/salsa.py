@@ -33,7 +33,7 @@ import multiprocessing_on_dill as multiprocessing  # type: ignore
 from zigzag.cost_model.cost_model import CostModelEvaluation
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
-from zigzag.opt.salsa.engine import SalsaEngine
+from zigzag.opt.salsa.engine import SalsaEngine, TracePoint
 from zigzag.stages.stage import Stage, StageCallable
 from zigzag.workload.layer_node import LayerNode
 
@@ -69,6 +69,9 @@ class SalsaStage(Stage):
 
         self.opt_criterion_name = kwargs.get("salsa_opt_criterion", "energy")
         self.number_of_core_allocated = kwargs.get("salsa_number_of_core", 1)
+        self.parallel_tempering = kwargs.get("salsa_parallel_tempering", False)
+        ## Convergence trace of each chain, in parallel tempering mode
+        self.convergence_traces: list[list[TracePoint]] = []
 
         # Multiprocessing parameters
         self.worker_list = []
@@ -100,6 +103,26 @@ class SalsaStage(Stage):
 
         assert isinstance(self.number_of_core, int)  # type: ignore
 
+        if self.parallel_tempering:
+            self.best_cme = self.engine.run_parallel_tempering(self.number_of_core)
+            self.convergence_traces = self.engine.convergence_traces
+        else:
+            self.run_independent_chains()
+
+        assert self.best_cme is not None
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = self.accelerator
+        kwargs["layer"] = self.layer
+        kwargs["spatial_mapping"] = self.spatial_mapping
+        kwargs["temporal_mapping"] = self.best_cme.mapping.temporal_mapping
+        sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
+
+        for cme, extra_info in sub_stage.run():
+            yield cme, (self.best_cme.mapping.temporal_mapping, extra_info)
+
+    def run_independent_chains(self):
+        """! Run one independent simulated annealing chain per core and keep the best cost model evaluation"""
+        assert self.engine is not None
         # Create processes
         for core_id in range(0, self.number_of_core):
             p = multiprocessing.Process(target=self.engine.run, args=(self.cme_queue,))  # type: ignore
@@ -119,17 +142,6 @@ class SalsaStage(Stage):
         for core_id in range(0, self.number_of_core):
             self.worker_list[core_id].join()  # type: ignore
 
-        assert self.best_cme is not None
-        kwargs = self.kwargs.copy()
-        kwargs["accelerator"] = self.accelerator
-        kwargs["layer"] = self.layer
-        kwargs["spatial_mapping"] = self.spatial_mapping
-        kwargs["temporal_mapping"] = self.best_cme.mapping.temporal_mapping
-        sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
-
-        for cme, extra_info in sub_stage.run():
-            yield cme, (self.best_cme.mapping.temporal_mapping, extra_info)
-
     def compare_cme_latency(self, cme: CostModelEvaluation):
         """! Compare the latency of the current cost model evaluation with the best latency found so far.
         Then replace the current best cme if the current cme has a lower latency."""
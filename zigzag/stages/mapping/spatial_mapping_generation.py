@@ -1,4 +1,5 @@
 import copy
+import heapq
 import itertools
 import logging
 import math
@@ -120,8 +121,8 @@ class SpatialMappingGeneratorStage(Stage):
                 yield cme, (generated_mapping, extra_info)
 
     def generate_spatial_mappings(self) -> Generator[SpatialMapping, None, None]:
-        """! Generator that yields SpatialMappings
-        # TODO this function first does all the work before it yield the first element
+        """! Generator that yields the `nb_mappings_generated` SpatialMappings with the highest performance indicator,
+        from high to low performance indicator
         """
         max_unrollings = self.get_max_unrolling()
 
@@ -139,43 +140,98 @@ class SpatialMappingGeneratorStage(Stage):
             yield mapping_template
             return
 
-        # For each OADimension to fill, create a generator of MappingSingleOADim candidates
-        mappings_per_oa_dim: list[Generator[MappingSingleOADim, None, None]] = [
-            self.generate_spatial_mapping_single_oa_dim(
-                self.spatial_mapping_hint[oa_dim],
-                max_unrollings[oa_dim],
-                self.oa_dim_sizes[oa_dim],
+        # For each OADimension to fill, list the MappingSingleOADim candidates
+        mappings_per_oa_dim: list[list[MappingSingleOADim]] = [
+            list(
+                self.generate_spatial_mapping_single_oa_dim(
+                    self.spatial_mapping_hint[oa_dim],
+                    max_unrollings[oa_dim],
+                    self.oa_dim_sizes[oa_dim],
+                )
             )
             for oa_dim in oa_dims_to_fill
         ]
 
-        candidate_mappings: list[SpatialMapping] = []
-        for combination in itertools.product(*mappings_per_oa_dim):
-            # Start from the user-defined mapping
-            candidate = mapping_template.copy()
-            for idx, oa_dim in enumerate(oa_dims_to_fill):
-                candidate[oa_dim] = combination[idx]
-            # Candidate can be invalid if unrollings of LayerDim exceed LayerDim size from workload
-            if candidate.is_valid(max_unrollings, self.layer_dim_sizes.data):
-                candidate_mappings.append(candidate)
-
-        assert len(candidate_mappings) > 0, "No valid SpatialMappings found"
-
-        # Sort according to expected performance
-        candidate_mappings = sorted(
-            candidate_mappings,
-            key=lambda x: x.get_performance_indicator(),
-            reverse=True,
+        ranked_mappings = self.generate_ranked_spatial_mappings(
+            mapping_template, oa_dims_to_fill, mappings_per_oa_dim, max_unrollings
         )
 
         # Limit the number of mappings generated
-        for i in range(min(self.nb_mappings_generated, len(candidate_mappings))):
-            candidate = candidate_mappings[i]
+        nb_mappings_yielded = 0
+        for candidate in itertools.islice(ranked_mappings, self.nb_mappings_generated):
             if self.enable_weight_diagonal_mapping:
                 candidate = self.add_input_pr_spatial_loop(candidate)
             candidate = self.limit_unrolling_to_mem_capacity(candidate)
+            nb_mappings_yielded += 1
             yield candidate
 
+        assert nb_mappings_yielded > 0, "No valid SpatialMappings found"
+
+    def generate_ranked_spatial_mappings(
+        self,
+        mapping_template: SpatialMapping,
+        oa_dims_to_fill: list[OADimension],
+        mappings_per_oa_dim: list[list[MappingSingleOADim]],
+        max_unrollings: dict[OADimension, dict[LayerDim, int]],
+    ) -> Generator[SpatialMapping, None, None]:
+        """! Best-first enumeration of the valid combinations of MappingSingleOADim candidates, from high to low
+        performance indicator, without materializing all combinations.
+        The combinations are visited from high to low hardware utilization U, by expanding a frontier of combinations
+        (heap) where the candidates of each OADimension are sorted on utilization. The performance indicator of a
+        mapping never exceeds 2U - 1, so a visited mapping can be yielded as soon as its indicator exceeds this upper
+        bound for the best combination on the frontier. Ties are broken in the order of `itertools.product` over the
+        candidates.
+        @param mapping_template SpatialMapping with the user-defined OADimensions
+        @param oa_dims_to_fill OADimensions that are not defined in the template
+        @param mappings_per_oa_dim For each OADimension to fill, the MappingSingleOADim candidates
+        """
+        if any(len(mappings) == 0 for mappings in mappings_per_oa_dim):
+            return
+
+        # For each OADimension, the candidate indices from high to low utilization
+        order_per_oa_dim = [
+            sorted(range(len(mappings)), key=lambda idx: mappings[idx].utilization, reverse=True)
+            for mappings in mappings_per_oa_dim
+        ]
+        template_utilization = mapping_template.hw_utilization
+
+        def get_utilization(positions: tuple[int, ...]) -> UnrollFactor:
+            return template_utilization * math.prod(
+                mappings[order[pos]].utilization
+                for mappings, order, pos in zip(mappings_per_oa_dim, order_per_oa_dim, positions)
+            )
+
+        # Frontier of combinations to visit, as positions in `order_per_oa_dim`
+        start = tuple(0 for _ in oa_dims_to_fill)
+        to_visit: list[tuple[UnrollFactor, tuple[int, ...]]] = [(-get_utilization(start), start)]
+        seen: set[tuple[int, ...]] = {start}
+        # Valid mappings that may still be outranked by a combination that is not visited yet
+        pending: list[tuple[float, tuple[int, ...], SpatialMapping]] = []
+
+        while to_visit:
+            _, positions = heapq.heappop(to_visit)
+            # Combinations with a lower utilization in one OADimension
+            for dim_idx, pos in enumerate(positions):
+                if pos + 1 < len(order_per_oa_dim[dim_idx]):
+                    successor = positions[:dim_idx] + (pos + 1,) + positions[dim_idx + 1 :]
+                    if successor not in seen:
+                        seen.add(successor)
+                        heapq.heappush(to_visit, (-get_utilization(successor), successor))
+
+            combination = tuple(order[pos] for order, pos in zip(order_per_oa_dim, positions))
+            # Start from the user-defined mapping
+            candidate = mapping_template.copy()
+            for oa_dim, mappings, idx in zip(oa_dims_to_fill, mappings_per_oa_dim, combination):
+                candidate[oa_dim] = copy.deepcopy(mappings[idx])
+            # Candidate can be invalid if unrollings of LayerDim exceed LayerDim size from workload
+            if candidate.is_valid(max_unrollings, self.layer_dim_sizes.data):
+                heapq.heappush(pending, (-candidate.get_performance_indicator(), combination, candidate))
+
+            # Upper bound on the performance indicator of all combinations that are not visited yet
+            max_indicator_to_visit = 2 * -to_visit[0][0] - 1 if to_visit else -math.inf
+            while pending and -pending[0][0] > max_indicator_to_visit:
+                yield heapq.heappop(pending)[2]
+
     def limit_unrolling_to_mem_bandwidth(
         self, mapping: dict[OADimension, dict[LayerDim, int]]
     ) -> dict[OADimension, dict[LayerDim, int]]:
@@ -676,7 +732,7 @@ class SpatialMappingGeneratorStage(Stage):
 
         # check if act is not served in the innermost memories, or it is uti-casting for act.
         # keep the spatial loop as it was if act is not served.
-        if "act_served_oa_dim" not in locals() or len(act_served_oa_dims) != 1:
+        if act_innermost_mem_level is None or len(act_served_oa_dims) != 1:
             return self.accelerator
 
         act_served_oa_dim: OADimension = next(iter(act_served_oa_dims))
@@ -703,19 +759,18 @@ class SpatialMappingGeneratorStage(Stage):
         # Add memories to the new memory hierarchy with the correct attributes
         for memory_level in self.memory_hierarchy.mem_level_list:
             memory_instance = memory_level.memory_instance
+            new_memory_instance: MemoryInstance = pickle_deepcopy(memory_instance)
             if memory_level == act_innermost_mem_level:
-                # scale here. For others, keep them unchanged.
-                prev_size = memory_instance.size
-                new_size = memory_instance.size * mem_scaling_factor
-                memory_instance.update_size(new_size)
+                # scale the copy here, as the original memory instance can be shared with other accelerators. For
+                # others, keep them unchanged.
+                new_memory_instance.update_size(memory_instance.size * mem_scaling_factor)
                 logger.info(
                     "Updated %s size from %i to %i",
                     memory_instance,
-                    prev_size,
-                    new_size,
+                    memory_instance.size,
+                    new_memory_instance.size,
                 )
 
-            new_memory_instance: MemoryInstance = pickle_deepcopy(memory_instance)
             new_operands = pickle_deepcopy(memory_level.operands)
             new_port_alloc = pickle_deepcopy(memory_level.port_alloc_raw)
             new_served_dimensions = pickle_deepcopy(memory_level.served_dimensions)
@@ -1,17 +1,28 @@
 import logging
+import multiprocessing
 from typing import Any, Generator
 
+from zigzag.cost_model.cost_model import CostModelEvaluationABC, CostModelSharedInputs
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
 from zigzag.mapping.temporal_mapping import TemporalMapping
-from zigzag.opt.loma.engine import LomaEngine
+from zigzag.opt.loma.engine import LomaEngine, NoValidLoopOrderingFoundException
 from zigzag.opt.loma.memory_allocator import MemoryAllocator
 from zigzag.opt.loma.multipermute import PermutationConstraint
+from zigzag.stages.results.reduce_stages import get_criteria_functions
 from zigzag.stages.stage import Stage, StageCallable
 from zigzag.workload.layer_node import LayerNode
 
 logger = logging.getLogger(__name__)
 
+# Criteria (see `CME_CRITERIA`) on which the workers of the parallel LOMA mode rank the CMEs of their chunk, for each
+# optimization criterion. The ranking is lexicographic and matches the comparisons of the Minimal reduce stages.
+LOMA_WORKER_CRITERIA: dict[str, tuple[str, ...]] = {
+    "energy": ("energy", "latency"),
+    "latency": ("latency", "energy"),
+    "EDP": ("EDP",),
+}
+
 
 class TemporalMappingGeneratorStage(Stage):
     """! Class that iterates through the different temporal mappings generated through the loop order based memory
@@ -25,50 +36,170 @@ class TemporalMappingGeneratorStage(Stage):
         accelerator: Accelerator,
         layer: LayerNode,
         spatial_mapping: SpatialMappingInternal,
+        loma_number_of_workers: int = 1,
+        loma_reduce_criterion: str | None = None,
+        loma_keep_others: bool = False,
+        loma_branch_and_bound: bool = False,
         **kwargs: Any,
     ):
         """
         @param list_of_callables (List[Callable]): List of substages to call with each generated temporal mapping.
+        @param loma_number_of_workers: Number of worker processes over which the LOMA permutations are split.
+        @param loma_reduce_criterion: Optimization criterion (`energy`, `latency` or `EDP`) of the Minimal stage that
+        reduces the CMEs of this stage. If given, every worker only returns the first best CME of its chunk, which the
+        Minimal stage reduces to the CME of a serial run. If None, the workers return all CMEs of their chunk.
+        @param loma_keep_others: iff true, the workers return all CMEs of their chunk, even if `loma_reduce_criterion`
+        is given, so that the stages above receive the same CMEs, in the same order, as in a serial run. Required if
+        the stages above keep the other CMEs, e.g. with `reduce_minimal_keep_others` or the top-k and Pareto stages.
+        @param loma_branch_and_bound: Prune the LOMA search with lower bounds on the energy of partial loop orderings.
+        Only the CMEs of the orderings that could not be pruned are yielded. These always contain the CME with the
+        minimal energy, so this should only be combined with a reduce stage that minimizes energy.
         """
         super().__init__(list_of_callables, **kwargs)
         self.accelerator = accelerator
         self.layer = layer
         self.spatial_mapping = spatial_mapping
+        self.number_of_workers = loma_number_of_workers
+        if loma_reduce_criterion is not None and loma_reduce_criterion not in LOMA_WORKER_CRITERIA:
+            raise ValueError(
+                f"Invalid LOMA reduce criterion {loma_reduce_criterion}. Must be one of {list(LOMA_WORKER_CRITERIA)}."
+            )
+        self.worker_criteria = (
+            None if loma_reduce_criterion is None or loma_keep_others else LOMA_WORKER_CRITERIA[loma_reduce_criterion]
+        )
+        self.branch_and_bound = loma_branch_and_bound
+        ## Temporal mapping-invariant cost model inputs, shared by the evaluations of all temporal mappings
+        spatial_mapping_int: SpatialMappingInternal | None = kwargs.get("spatial_mapping_int")
+        self.cost_model_shared_inputs = (
+            CostModelSharedInputs(accelerator, layer, spatial_mapping, spatial_mapping_int)
+            if spatial_mapping_int is not None
+            else None
+        )
 
     def run(self):
+        if self.branch_and_bound and not self.is_temporal_ordering_provided():
+            yield from self.run_branch_and_bound()
+            return
+
+        if self.number_of_workers > 1 and not self.is_temporal_ordering_provided():
+            yield from self.run_parallel()
+            return
+
         for temporal_mapping in self.generate_temporal_mappings():
-            kwargs = self.kwargs.copy()
-            kwargs["accelerator"] = self.accelerator
-            kwargs["layer"] = self.layer
-            kwargs["spatial_mapping"] = self.spatial_mapping
-            kwargs["temporal_mapping"] = temporal_mapping
-            sub_stage: Stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
-            for cme, extra_info in sub_stage.run():
+            for cme, extra_info in self.evaluate_temporal_mapping(temporal_mapping):
                 yield cme, (temporal_mapping, extra_info)
 
-    def generate_temporal_mappings(self) -> Generator[TemporalMapping, None, None]:
+    def evaluate_temporal_mapping(self, temporal_mapping: TemporalMapping):
+        """! Run the substages for a single temporal mapping."""
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = self.accelerator
+        kwargs["layer"] = self.layer
+        kwargs["spatial_mapping"] = self.spatial_mapping
+        kwargs["temporal_mapping"] = temporal_mapping
+        kwargs["cost_model_shared_inputs"] = self.cost_model_shared_inputs
+        sub_stage: Stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
+        return sub_stage.run()
+
+    def run_branch_and_bound(self):
+        """! Evaluate the temporal mappings of the branch-and-bound LOMA search, feeding every evaluation back into
+        the search to prune the orderings that can not improve the energy."""
+        engine = self.create_engine()
+        for temporal_mapping in engine.run_branch_and_bound():
+            for cme, extra_info in self.evaluate_temporal_mapping(temporal_mapping):
+                engine.report_cme(cme)
+                yield cme, (temporal_mapping, extra_info)
+
+    def run_parallel(self):
+        """! Split the LOMA permutations in contiguous chunks and evaluate them in a pool of worker processes.
+        The chunks are evaluated in parallel, but their CMEs are yielded chunk by chunk in permutation order. If the
+        workers reduce their chunk, only the best CME of every chunk is yielded, so that the Minimal stage above selects
+        the CME of a serial run (including ties). Otherwise, the stages above receive exactly the CMEs of a serial run.
+        """
+        engine = self.create_engine()
+        engine.prepare()
+
+        kwargs = self.kwargs.copy()
+        kwargs["accelerator"] = self.accelerator
+        kwargs["layer"] = self.layer
+        kwargs["spatial_mapping"] = self.spatial_mapping
+        # Use a few chunks per worker to balance the load over the workers
+        nb_chunks = 4 * self.number_of_workers
+        tasks = (
+            (self.list_of_callables, kwargs, self.worker_criteria, chunk)
+            for chunk in engine.get_ordering_chunks(nb_chunks)
+        )
+
+        logger.info(
+            "Launching %s temporal loop order permutations in chunks over %i workers.",
+            f"{engine.nb_permutations:,}",
+            self.number_of_workers,
+        )
+        yielded = False
+        with multiprocessing.Pool(self.number_of_workers) as pool:
+            for chunk_result in pool.imap(evaluate_loma_chunk, tasks):
+                for cme, extra_info in chunk_result:
+                    yielded = True
+                    yield cme, extra_info
+        if not yielded:
+            raise NoValidLoopOrderingFoundException(engine.no_valid_ordering_message())
+
+    def create_engine(self) -> LomaEngine:
+        """! Create a LomaEngine for this layer, constrained by the partial user-provided temporal ordering."""
         engine = LomaEngine(
             accelerator=self.accelerator,
             layer=self.layer,
             spatial_mapping=self.spatial_mapping,
             **self.kwargs,
         )
+        constraints: list[PermutationConstraint] = self.layer.temporal_ordering.get_constraints()
+        if any(not constr.is_empty() for constr in constraints):
+            engine.set_constraints(constraints)
+        return engine
+
+    def is_temporal_ordering_provided(self) -> bool:
+        """! Check if the user provided the full temporal ordering, in which case no search is needed."""
+        return self.layer.temporal_ordering.is_complete(self.create_engine().get_temporal_loops())
 
+    def generate_temporal_mappings(self) -> Generator[TemporalMapping, None, None]:
         # Return the full, user-provided temporal mapping
-        provided_ordering = self.layer.temporal_ordering
-        all_temporal_loops = engine.get_temporal_loops()
-        if provided_ordering.is_complete(all_temporal_loops):
+        if self.is_temporal_ordering_provided():
             allocator = MemoryAllocator(
-                self.accelerator, self.layer, self.spatial_mapping, provided_ordering.to_legacy_format()  # type: ignore
+                self.accelerator,
+                self.layer,
+                self.spatial_mapping,
+                self.layer.temporal_ordering.to_legacy_format(),  # type: ignore
             )
             temporal_mapping = allocator.run()
             yield temporal_mapping
             return
-        else:
-            constraints: list[PermutationConstraint] = provided_ordering.get_constraints()
-            if any(not constr.is_empty() for constr in constraints):
-                engine.set_constraints(constraints)
-
-            # Generate from scratch
-            for mapping in engine.run():
-                yield mapping
+
+        # Generate from scratch
+        for mapping in self.create_engine().run():
+            yield mapping
+
+
+def evaluate_loma_chunk(
+    task: tuple[list[StageCallable], dict[str, Any], tuple[str, ...] | None, list[list[int]]],
+) -> list[tuple[CostModelEvaluationABC, tuple[TemporalMapping, Any]]]:
+    """! Worker function of the parallel LOMA mode. Evaluates all orderings (of loop ids) of a chunk. If criteria are
+    given, only the first CME that is best on these criteria (ranked lexicographically) is returned. Otherwise, all
+    resulting CMEs are returned, in the order in which the serial run would yield them.
+    """
+    list_of_callables, kwargs, criteria, orderings = task
+    stage = TemporalMappingGeneratorStage(list_of_callables, **kwargs)
+    engine = stage.create_engine()
+    engine.prepare()
+    results = (
+        (cme, (temporal_mapping, extra_info))
+        for temporal_mapping in engine.run_orderings(orderings)
+        for cme, extra_info in stage.evaluate_temporal_mapping(temporal_mapping)
+    )
+    if criteria is None:
+        return list(results)
+
+    # Only the best CME is sent back to the main process, instead of pickling every CME of the chunk
+    criteria_functions = get_criteria_functions(criteria)
+    best_result = min(
+        results, key=lambda result: tuple(criterion(result[0]) for criterion in criteria_functions), default=None
+    )
+    return [] if best_result is None else [best_result]
@@ -1,15 +1,57 @@
 import logging
+import os
+import pickle
+from hashlib import sha256
 from typing import Any
 
+import yaml
+
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.parser.accelerator_factory import AcceleratorFactory
 from zigzag.parser.accelerator_validator import AcceleratorValidator
 from zigzag.stages.stage import Stage, StageCallable
-from zigzag.utils import open_yaml
 
 logger = logging.getLogger(__name__)
 
 
+class AcceleratorParseCache:
+    """! Cache of the accelerators parsed from yaml files. A file is only read again when its modification time or size
+    changed, and only parsed again when its content hash changed. The accelerators are stored pickled, so that every
+    lookup returns an independent copy that is safe to mutate.
+    """
+
+    def __init__(self):
+        ## Content hash of the parsed files, per (real path, modification time in ns, size)
+        self.file_hashes: dict[tuple[str, int, int], str] = {}
+        ## Pickled accelerator, per content hash
+        self.accelerators: dict[str, bytes] = {}
+
+    def get(self, accelerator_yaml_path: str) -> Accelerator:
+        path = os.path.realpath(accelerator_yaml_path)
+        stat = os.stat(path)
+        file_key = (path, stat.st_mtime_ns, stat.st_size)
+        content_hash = self.file_hashes.get(file_key)
+        if content_hash is not None:
+            return pickle.loads(self.accelerators[content_hash])
+
+        with open(path, "rb") as f:
+            content = f.read()
+        content_hash = sha256(content).hexdigest()
+        self.file_hashes[file_key] = content_hash
+        if content_hash in self.accelerators:
+            return pickle.loads(self.accelerators[content_hash])
+
+        accelerator_data = yaml.safe_load(content.decode("utf-8"))
+        accelerator = AcceleratorParserStage.parse_accelerator_data(accelerator_data)
+        self.accelerators[content_hash] = pickle.dumps(accelerator, pickle.HIGHEST_PROTOCOL)
+        logger.debug("Parsed accelerator %s from %s", accelerator.name, accelerator_yaml_path)
+        return accelerator
+
+    def clear(self) -> None:
+        self.file_hashes.clear()
+        self.accelerators.clear()
+
+
 class AcceleratorParserStage(Stage):
     """! Parse to parse an accelerator from a user-defined yaml file."""
 
@@ -24,10 +66,18 @@ class AcceleratorParserStage(Stage):
         for cme, extra_info in sub_stage.run():
             yield cme, extra_info
 
+    ## Accelerators parsed by all stages and `parse_accelerator` calls of this process
+    parse_cache = AcceleratorParseCache()
+
     @staticmethod
     def parse_accelerator(accelerator_yaml_path: str) -> Accelerator:
-        accelerator_data = open_yaml(accelerator_yaml_path)
+        """! Parse the accelerator yaml file. Files that were parsed before (and did not change since) are not
+        validated again: a copy of the cached accelerator is returned."""
+        return AcceleratorParserStage.parse_cache.get(accelerator_yaml_path)
 
+    @staticmethod
+    def parse_accelerator_data(accelerator_data: dict[str, Any]) -> Accelerator:
+        """! Validate, normalize and create the accelerator described by the (yaml) data of an accelerator file"""
         validator = AcceleratorValidator(accelerator_data)
         accelerator_data = validator.normalized_data
         validate_success = validator.validate()
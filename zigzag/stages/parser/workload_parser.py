@@ -41,8 +41,12 @@ class WorkloadParserStage(Stage):
         return factory.create()
 
     def _parse_workload_data(self) -> list[dict[str, Any]]:
-        """! Parse, validate and normalize workload"""
-        workload_data = open_yaml(self.workload_yaml_path)
+        return self.parse_workload_data(self.workload_yaml_path)
+
+    @staticmethod
+    def parse_workload_data(workload_yaml_path: str) -> list[dict[str, Any]]:
+        """! Parse, validate and normalize workload from a given yaml file path"""
+        workload_data = open_yaml(workload_yaml_path)
         workload_validator = WorkloadValidator(workload_data)
         workload_data = workload_validator.normalized_data
         workload_validate_succes = workload_validator.validate()
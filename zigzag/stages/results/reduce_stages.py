@@ -1,12 +1,36 @@
+import heapq
 import logging
-from typing import Any
+from typing import Any, Callable
 
+from zigzag.cost_model.cme_summary import CMESummary, get_cme_area
 from zigzag.cost_model.cost_model import CostModelEvaluation, CumulativeCME
 from zigzag.stages.stage import Stage, StageCallable
 
 logger = logging.getLogger(__name__)
 
 
+# Metrics that can be used to rank CMEs in the TopKStage and ParetoFrontStage. Lower is better.
+CME_CRITERIA: dict[str, Callable[[CostModelEvaluation | CMESummary], float]] = {
+    "energy": lambda cme: cme.energy_total,
+    "latency": lambda cme: cme.latency_total2,
+    "EDP": lambda cme: cme.latency_total2 * cme.energy_total,
+    "area": get_cme_area,
+}
+
+
+def get_criteria_functions(
+    criteria: str | list[str] | tuple[str, ...]
+) -> list[Callable[[CostModelEvaluation | CMESummary], float]]:
+    """! Convert the criteria name(s) to the functions that extract the metrics from a CME."""
+    criteria = [criteria] if isinstance(criteria, str) else list(criteria)
+    if not criteria:
+        raise ValueError("At least one reduce criterion should be given.")
+    for criterion in criteria:
+        if criterion not in CME_CRITERIA:
+            raise ValueError(f"Invalid reduce criterion {criterion}. Must be one of {list(CME_CRITERIA.keys())}.")
+    return [CME_CRITERIA[criterion] for criterion in criteria]
+
+
 class MinimalEnergyStage(Stage):
     """! Class that keeps yields only the cost model evaluation that has minimal energy of all cost model evaluations
     generated by it's substages created by list_of_callables
@@ -17,22 +41,26 @@ class MinimalEnergyStage(Stage):
         list_of_callables: list[StageCallable],
         *,
         reduce_minimal_keep_others: bool = False,
+        reduce_keep_summaries: bool = False,
         **kwargs: Any,
     ):
         """
         Initialize the compare stage.
+        @param reduce_minimal_keep_others: iff true, all received CMEs are yielded as extra_info
+        @param reduce_keep_summaries: iff true, the other CMEs are kept as `CMESummary` instead of full CMEs
         """
         super().__init__(list_of_callables, **kwargs)
         # Visualization stuff
         self.energies: list[float] = []
         self.keep_others = reduce_minimal_keep_others
+        self.keep_summaries = reduce_keep_summaries
 
     def run(self):
         """! Run the compare stage by comparing a new cost model output with the current best found result."""
         sub_list_of_callables = self.list_of_callables[1:]
         substage: Stage = self.list_of_callables[0](sub_list_of_callables, **self.kwargs)
 
-        other_cmes: list[tuple[CostModelEvaluation, Any]] = []
+        other_cmes: list[tuple[CostModelEvaluation | CMESummary, Any]] = []
         best_cme: CostModelEvaluation | None = None
         for cme, extra_info in substage.run():
             assert isinstance(cme, CostModelEvaluation)
@@ -44,7 +72,7 @@ class MinimalEnergyStage(Stage):
             ):
                 best_cme = cme
             if self.keep_others:
-                other_cmes.append((cme, extra_info))
+                other_cmes.append((CMESummary(cme) if self.keep_summaries else cme, extra_info))
 
         assert best_cme is not None
         yield best_cme, other_cmes
@@ -60,20 +88,24 @@ class MinimalLatencyStage(Stage):
         list_of_callables: list[StageCallable],
         *,
         reduce_minimal_keep_others: bool = False,
+        reduce_keep_summaries: bool = False,
         **kwargs: Any,
     ):
         """
         Initialize the compare stage.
+        @param reduce_minimal_keep_others: iff true, all received CMEs are yielded as extra_info
+        @param reduce_keep_summaries: iff true, the other CMEs are kept as `CMESummary` instead of full CMEs
         """
         super().__init__(list_of_callables, **kwargs)
         self.keep_others = reduce_minimal_keep_others
+        self.keep_summaries = reduce_keep_summaries
 
     def run(self):
         """! Run the compare stage by comparing a new cost model output with the current best found result."""
         sub_list_of_callables = self.list_of_callables[1:]
         substage: Stage = self.list_of_callables[0](sub_list_of_callables, **self.kwargs)
 
-        other_cmes: list[tuple[CostModelEvaluation, Any]] = []
+        other_cmes: list[tuple[CostModelEvaluation | CMESummary, Any]] = []
         best_cme: CostModelEvaluation | None = None
         for cme, extra_info in substage.run():
             assert isinstance(cme, CostModelEvaluation)
@@ -84,7 +116,7 @@ class MinimalLatencyStage(Stage):
             ):
                 best_cme = cme
             if self.keep_others:
-                other_cmes.append((cme, extra_info))
+                other_cmes.append((CMESummary(cme) if self.keep_summaries else cme, extra_info))
 
         assert best_cme is not None
         yield best_cme, other_cmes
@@ -100,20 +132,24 @@ class MinimalEDPStage(Stage):
         list_of_callables: list[StageCallable],
         *,
         reduce_minimal_keep_others: bool = False,
+        reduce_keep_summaries: bool = False,
         **kwargs: Any,
     ) -> None:
         """
         Initialize the compare stage.
+        @param reduce_minimal_keep_others: iff true, all received CMEs are yielded as extra_info
+        @param reduce_keep_summaries: iff true, the other CMEs are kept as `CMESummary` instead of full CMEs
         """
         super().__init__(list_of_callables, **kwargs)
         self.keep_others = reduce_minimal_keep_others
+        self.keep_summaries = reduce_keep_summaries
 
     def run(self):
         """! Run the compare stage by comparing a new cost model output with the current best found result."""
         sub_list_of_callables = self.list_of_callables[1:]
         substage: Stage = self.list_of_callables[0](sub_list_of_callables, **self.kwargs)
 
-        other_cmes: list[tuple[CostModelEvaluation, Any]] = []
+        other_cmes: list[tuple[CostModelEvaluation | CMESummary, Any]] = []
         best_cme: CostModelEvaluation | None = None
         for cme, extra_info in substage.run():
             assert isinstance(cme, CostModelEvaluation)
@@ -123,7 +159,7 @@ class MinimalEDPStage(Stage):
             ):
                 best_cme = cme
             if self.keep_others:
-                other_cmes.append((cme, extra_info))
+                other_cmes.append((CMESummary(cme) if self.keep_summaries else cme, extra_info))
 
         assert best_cme is not None
         yield best_cme, other_cmes
@@ -144,3 +180,138 @@ class SumStage(Stage):
             total_cme += cme
             all_cmes.append((cme, extra_info))
         yield total_cme, all_cmes
+
+
+class TopKStage(Stage):
+    """! Class that yields the cost model evaluation that is best according to the given criteria, together with the k
+    best cost model evaluations generated by its substages. The CMEs are ranked lexicographically on the criteria,
+    e.g. `("energy", "latency")` ranks on energy and breaks ties on latency.
+
+    Contrary to `reduce_minimal_keep_others` of the Minimal stages, only k CMEs are kept in memory at any time, using a
+    bounded heap.
+    """
+
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        *,
+        reduce_top_k: int = 10,
+        reduce_criteria: str | list[str] | tuple[str, ...] = ("energy", "latency"),
+        reduce_keep_summaries: bool = False,
+        **kwargs: Any,
+    ):
+        """
+        @param reduce_top_k: number of CMEs to keep
+        @param reduce_criteria: name(s) of the criteria to rank on, from `energy`, `latency`, `EDP` and `area`
+        @param reduce_keep_summaries: iff true, the kept CMEs are held as `CMESummary`, except for the best one
+        """
+        super().__init__(list_of_callables, **kwargs)
+        assert reduce_top_k > 0
+        self.k = reduce_top_k
+        self.criteria = get_criteria_functions(reduce_criteria)
+        self.keep_summaries = reduce_keep_summaries
+
+    def run(self):
+        """! Run the top-k stage by pushing every CME on a heap that holds the k best results received so far."""
+        sub_list_of_callables = self.list_of_callables[1:]
+        substage: Stage = self.list_of_callables[0](sub_list_of_callables, **self.kwargs)
+
+        # Heap entries are ordered such that the root is the worst CME kept. For equal criteria, the CME received
+        # first is considered to be better, like in the Minimal stages.
+        heap: list[tuple[tuple[float, ...], int, CostModelEvaluation | CMESummary, Any]] = []
+        # The best CME is always kept in full, even if the others are summarized
+        best_cme: CostModelEvaluation | None = None
+        best_neg_key: tuple[float, ...] = ()
+        for count, (cme, extra_info) in enumerate(substage.run()):
+            assert isinstance(cme, CostModelEvaluation)
+            neg_key = tuple(-criterion(cme) for criterion in self.criteria)
+            if best_cme is None or neg_key > best_neg_key:
+                best_cme, best_neg_key = cme, neg_key
+            kept_cme = CMESummary(cme) if self.keep_summaries else cme
+            if len(heap) < self.k:
+                heapq.heappush(heap, (neg_key, -count, kept_cme, extra_info))
+            elif (neg_key, -count) > heap[0][:2]:
+                heapq.heapreplace(heap, (neg_key, -count, kept_cme, extra_info))
+
+        assert heap and best_cme is not None, "No CMEs received"
+        top_k_cmes = [(cme, extra_info) for _, _, cme, extra_info in sorted(heap, reverse=True)]
+        top_k_cmes[0] = (best_cme, top_k_cmes[0][1])
+        yield best_cme, top_k_cmes
+
+
+class ParetoFrontStage(Stage):
+    """! Class that yields the cost model evaluation that is best according to the first criterion, together with the
+    Pareto front over all criteria of the cost model evaluations generated by its substages.
+
+    The front is bounded to `reduce_top_k` CMEs. If more non-dominated CMEs are found, the front is truncated by
+    dropping the CME in the most crowded region of the front (smallest crowding distance, as in NSGA-II), so that the
+    kept CMEs stay spread over the front. The extremes of every criterion are never dropped (unless `reduce_top_k` is
+    smaller than the number of criteria). A CME that is only dominated by a dropped CME can enter the front later on,
+    so the result is an approximation of the Pareto front if it is truncated.
+    """
+
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        *,
+        reduce_top_k: int = 10,
+        reduce_criteria: str | list[str] | tuple[str, ...] = ("energy", "latency"),
+        reduce_keep_summaries: bool = False,
+        **kwargs: Any,
+    ):
+        """
+        @param reduce_top_k: maximal number of CMEs on the Pareto front
+        @param reduce_criteria: name(s) of the criteria that span the Pareto front, from `energy`, `latency`, `EDP`
+          and `area`
+        @param reduce_keep_summaries: iff true, the CMEs on the front are held as `CMESummary`, except for the best one
+        """
+        super().__init__(list_of_callables, **kwargs)
+        assert reduce_top_k > 0
+        self.k = reduce_top_k
+        self.criteria = get_criteria_functions(reduce_criteria)
+        self.keep_summaries = reduce_keep_summaries
+
+    def run(self):
+        """! Run the Pareto front stage by updating the front of non-dominated CMEs with every received CME."""
+        sub_list_of_callables = self.list_of_callables[1:]
+        substage: Stage = self.list_of_callables[0](sub_list_of_callables, **self.kwargs)
+
+        front: list[tuple[tuple[float, ...], int, CostModelEvaluation | CMESummary, Any]] = []
+        # The best CME is always kept in full, even if the others are summarized
+        best_cme: CostModelEvaluation | None = None
+        best_key: tuple[float, ...] = ()
+        for count, (cme, extra_info) in enumerate(substage.run()):
+            assert isinstance(cme, CostModelEvaluation)
+            key = tuple(criterion(cme) for criterion in self.criteria)
+            # CMEs that equal a CME on the front are considered dominated, so the first one is kept
+            if any(all(k_front <= k for k_front, k in zip(key_front, key)) for key_front, *_ in front):
+                continue
+            if best_cme is None or key < best_key:
+                best_cme, best_key = cme, key
+            front = [entry for entry in front if not all(k <= k_front for k, k_front in zip(key, entry[0]))]
+            front.append((key, count, CMESummary(cme) if self.keep_summaries else cme, extra_info))
+            if len(front) > self.k:
+                front.pop(self.get_most_crowded_index(front))
+
+        assert front and best_cme is not None, "No CMEs received"
+        front_cmes = [(cme, extra_info) for _, _, cme, extra_info in sorted(front, key=lambda entry: entry[:2])]
+        front_cmes[0] = (best_cme, front_cmes[0][1])
+        yield best_cme, front_cmes
+
+    @staticmethod
+    def get_most_crowded_index(front: list[tuple[tuple[float, ...], int, Any, Any]]) -> int:
+        """! Index of the front entry with the smallest crowding distance: the sum over the criteria of the normalized
+        distance between its two neighbours on the front. The extremes of each criterion have an infinite distance.
+        Ties are broken by dropping the entry with the worst criteria, then the one received last.
+        """
+        distances = [0.0 for _ in front]
+        for criterion_idx in range(len(front[0][0])):
+            order = sorted(range(len(front)), key=lambda idx: front[idx][0][criterion_idx])
+            lowest, highest = front[order[0]][0][criterion_idx], front[order[-1]][0][criterion_idx]
+            distances[order[0]] = distances[order[-1]] = float("inf")
+            if highest == lowest:
+                continue
+            for previous_idx, idx, next_idx in zip(order, order[1:], order[2:]):
+                gap = front[next_idx][0][criterion_idx] - front[previous_idx][0][criterion_idx]
+                distances[idx] += gap / (highest - lowest)
+        return min(range(len(front)), key=lambda idx: (distances[idx], [-k for k in front[idx][0]], -front[idx][1]))
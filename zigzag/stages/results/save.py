@@ -4,11 +4,13 @@ import os
 import pickle
 from typing import Any
 
+from zigzag.cost_model.cme_summary import CMESummary, summarize_cme
 from zigzag.cost_model.cost_model import (
     CostModelEvaluation,
     CostModelEvaluationABC,
     CumulativeCME,
 )
+from zigzag.results_table import ResultsTableWriter, get_cme_row
 from zigzag.stages.stage import Stage, StageCallable
 from zigzag.utils import json_repr_handler
 
@@ -119,15 +121,18 @@ class PickleSaveStage(Stage):
         list_of_callables: list[StageCallable],
         *,
         pickle_filename: str,
+        pickle_summaries: bool = False,
         **kwargs: Any,
     ):
         """
         @param list_of_callables: see Stage
         @param pickle_filename: output pickle filename
+        @param pickle_summaries: iff true, the layer CMEs are saved as `CMESummary` instead of full CMEs
         @param kwargs: any kwargs, passed on to substages
         """
         super().__init__(list_of_callables, **kwargs)
         self.pickle_filename = pickle_filename
+        self.pickle_summaries = pickle_summaries
 
     def run(self):
         """! Run the simple save stage by running the substage and saving the CostModelEvaluation simple json
@@ -136,7 +141,9 @@ class PickleSaveStage(Stage):
         """
         substage = self.list_of_callables[0](self.list_of_callables[1:], **self.kwargs)
         for cme, extra_info in substage.run():
-            all_cmes: list[CostModelEvaluationABC] = [cme for (cme, _) in extra_info]
+            all_cmes: list[CostModelEvaluationABC | CMESummary] = [
+                summarize_cme(cme) if self.pickle_summaries else cme for (cme, _) in extra_info
+            ]
             yield cme, extra_info
 
         # After we have received all the CMEs, save them to the specified output location.
@@ -154,3 +161,43 @@ class PickleSaveStage(Stage):
             )
         except NameError:
             logger.warning("No CMEs found to save in PickleSaveStage")
+
+
+class ColumnarSaveStage(Stage):
+    """! Class that passes through all results yielded by substages, but saves them as rows of a columnar results table
+    (see `ResultsTable`) at the end of the iteration: one row per layer CME, with the energy, latency and area breakdown
+    in columns. If a CumulativeCME is received, the layer CMEs in its extra_info are saved as well, so this can be
+    placed above a SumStage.
+    """
+
+    def __init__(
+        self,
+        list_of_callables: list[StageCallable],
+        *,
+        results_table_path: str,
+        results_table_config: dict[str, float | str] | None = None,
+        results_table_append: bool = False,
+        **kwargs: Any,
+    ):
+        """
+        @param list_of_callables: see Stage
+        @param results_table_path: output folder of the results table
+        @param results_table_config: extra columns saved in every row, to identify the configuration of this run
+        @param results_table_append: iff true, the rows are added to the existing results table, if any
+        @param kwargs: any kwargs, passed on to substages
+        """
+        super().__init__(list_of_callables, **kwargs)
+        self.results_table_path = results_table_path
+        self.results_table_config = results_table_config if results_table_config is not None else {}
+        self.results_table_append = results_table_append
+
+    def run(self):
+        substage = self.list_of_callables[0](self.list_of_callables[1:], **self.kwargs)
+        writer = ResultsTableWriter(self.results_table_path, append=self.results_table_append)
+        for cme, extra_info in substage.run():
+            if isinstance(cme, CumulativeCME):
+                for layer_cme, _ in extra_info:
+                    writer.add_row(get_cme_row(layer_cme, **self.results_table_config))
+            writer.add_row(get_cme_row(cme, **self.results_table_config))
+            yield cme, extra_info
+        writer.save()
@@ -176,6 +176,6 @@ class MultiProcessingGatherStage(Stage):
             for ans in self.queue.get(block=True):
                 yield ans
             count += 1
-            if count % (count_to_get // 10) == 0:
+            if count % max(1, count_to_get // 10) == 0:
                 logger.info("Multiprocessing results received: %i of %i", count, count_to_get)
         close_threadpool()
@@ -1,8 +1,13 @@
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 from typing import Any
 
+from zigzag.cost_model.cost_model import CostModelEvaluation, CostModelEvaluationABC
 from zigzag.hardware.architecture.accelerator import Accelerator
 from zigzag.hardware.architecture.imc_array import ImcArray
+from zigzag.mapping.spatial_mapping_internal import SpatialMappingInternal
+from zigzag.mapping.temporal_mapping import TemporalMapping
 from zigzag.stages.stage import Stage, StageCallable
 from zigzag.workload.layer_node import LayerNode
 from zigzag.workload.workload_abc import WorkloadABC, WorkloadNoDummyABC
@@ -11,7 +16,13 @@ logger = logging.getLogger(__name__)
 
 
 class WorkloadStage(Stage):
-    """! Class that iterates through the nodes in a given workload graph."""
+    """! Class that iterates through the nodes in a given workload graph.
+    Optionally, layers that are equivalent for the mapping search (same dimensions, precisions, operand links and
+    user-defined mapping) are bucketed, and the substages only run for the first layer of every bucket. The results
+    are rebuilt for the other layers in the bucket, so that the stages above still receive one result per layer.
+    Optionally, the layers are evaluated in parallel in a pool of worker processes. The results are still yielded in
+    topological order.
+    """
 
     def __init__(
         self,
@@ -19,16 +30,92 @@ class WorkloadStage(Stage):
         *,
         workload: WorkloadABC | WorkloadNoDummyABC,
         accelerator: Accelerator,
+        deduplicate_layers: bool = False,
+        nb_layer_workers: int = 1,
         **kwargs: Any,
     ):
         """
         Initialization of self.workload.
+        @param deduplicate_layers: Iff true, the substages only run once for every set of equivalent layers.
+        @param nb_layer_workers: Number of worker processes over which the layers are evaluated. The substages must
+        be picklable.
         """
         super().__init__(list_of_callables, **kwargs)
         self.workload = workload
         self.accelerator = accelerator
+        self.deduplicate_layers = deduplicate_layers
+        self.nb_layer_workers = nb_layer_workers
 
     def run(self):
+        layers = self.get_layers_to_process()
+        if self.nb_layer_workers > 1:
+            yield from self.run_parallel(layers)
+            return
+
+        layer_buckets = self.get_layer_buckets(layers) if self.deduplicate_layers else {}
+        if self.deduplicate_layers:
+            logger.info("Found %i sets of equivalent layers in %i layers.", len(layer_buckets), len(layers))
+        # Results of the first layer of every bucket
+        bucket_results: dict[str, list[tuple[CostModelEvaluationABC, Any]]] = {}
+
+        for layer in layers:
+            signature = self.get_layer_signature(layer) if self.deduplicate_layers else ""
+            if signature in bucket_results:
+                logger.info("Reusing the results of %s for equivalent layer %s.", layer_buckets[signature][0], layer)
+                for cme, extra_info in bucket_results[signature]:
+                    yield self.rebuild_cme(cme, layer), (layer, extra_info)
+                continue
+
+            logger.info("Processing  %s...", layer.name)
+            sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **self.get_sub_stage_kwargs(layer))
+            results: list[tuple[CostModelEvaluationABC, Any]] = []
+            for cme, extra_info in sub_stage.run():
+                if self.deduplicate_layers:
+                    results.append((cme, extra_info))
+                yield cme, (layer, extra_info)
+            if self.deduplicate_layers:
+                bucket_results[signature] = results
+
+    def run_parallel(self, layers: list[LayerNode]):
+        """! Dispatch the layers (only the first layer of every set of equivalent layers, if deduplicated) to the
+        worker pool. The results of a layer are yielded as soon as the results of all preceding layers are yielded.
+        The per-layer memory levels of the inter-layer data locality stages are passed to the workers in the kwargs.
+        """
+        signatures = [
+            self.get_layer_signature(layer) if self.deduplicate_layers else str(idx) for idx, layer in enumerate(layers)
+        ]
+        # First layer of every set of equivalent layers
+        layers_to_evaluate: dict[str, LayerNode] = {}
+        for signature, layer in zip(signatures, layers):
+            layers_to_evaluate.setdefault(signature, layer)
+        if self.deduplicate_layers:
+            logger.info("Found %i sets of equivalent layers in %i layers.", len(layers_to_evaluate), len(layers))
+
+        tasks = [(self.list_of_callables, self.get_sub_stage_kwargs(layer)) for layer in layers_to_evaluate.values()]
+        logger.info("Processing %i layers over %i workers...", len(tasks), self.nb_layer_workers)
+        bucket_results: dict[str, list[tuple[CostModelEvaluationABC, Any]]] = {}
+        # The pool is shut down when all results are yielded, or when the stages above stop early
+        with ProcessPoolExecutor(max(1, min(self.nb_layer_workers, len(tasks)))) as pool:
+            # Executor.map returns the results in the order of the tasks, i.e. in topological order
+            evaluated_results = zip(layers_to_evaluate, pool.map(evaluate_layer, tasks))
+            for signature, layer in zip(signatures, layers):
+                while signature not in bucket_results:
+                    evaluated_signature, results = next(evaluated_results)
+                    bucket_results[evaluated_signature] = results
+                evaluated_layer = layers_to_evaluate[signature]
+                if evaluated_layer is not layer:
+                    logger.info("Reusing the results of %s for equivalent layer %s.", evaluated_layer, layer)
+                for cme, extra_info in bucket_results[signature]:
+                    yield (cme if evaluated_layer is layer else self.rebuild_cme(cme, layer)), (layer, extra_info)
+
+    def get_sub_stage_kwargs(self, layer: LayerNode) -> dict[str, Any]:
+        kwargs = self.kwargs.copy()
+        kwargs["layer"] = layer
+        kwargs["accelerator"] = self.accelerator
+        return kwargs
+
+    def get_layers_to_process(self) -> list[LayerNode]:
+        layers: list[LayerNode] = []
         for layer in self.workload.topological_sort():
             # skip the DummyNodes
             if not isinstance(layer, LayerNode):
@@ -41,12 +128,44 @@ class WorkloadStage(Stage):
                 "Add",
             ]:
                 continue
+            layers.append(layer)
+        return layers
 
-            kwargs = self.kwargs.copy()
-            kwargs["layer"] = layer
-            kwargs["accelerator"] = self.accelerator
+    def get_layer_signature(self, layer: LayerNode) -> str:
+        """! Signature of the layer for the mapping search. Also includes the memory levels that the inter-layer data
+        locality stages allow for this layer, since these change the accelerator the layer is mapped on.
+        """
+        mem_update_list: dict[int, Any] = self.kwargs.get("mem_update_list", {})
+        return repr((layer.get_mapping_search_signature(), mem_update_list.get(layer.id)))
 
-            logger.info("Processing  %s...", layer.name)
-            sub_stage = self.list_of_callables[0](self.list_of_callables[1:], **kwargs)
-            for cme, extra_info in sub_stage.run():
-                yield cme, (layer, extra_info)
+    def get_layer_buckets(self, layers: list[LayerNode]) -> dict[str, list[LayerNode]]:
+        """! Bucket the layers by signature. The buckets and the layers in a bucket are in topological order."""
+        layer_buckets: dict[str, list[LayerNode]] = {}
+        for layer in layers:
+            layer_buckets.setdefault(self.get_layer_signature(layer), []).append(layer)
+        return layer_buckets
+
+    @staticmethod
+    def rebuild_cme(cme: CostModelEvaluationABC, layer: LayerNode) -> CostModelEvaluationABC:
+        """! Rebuild the CME of an equivalent layer for the given layer. The spatial and temporal mappings are rebuilt
+        for the given layer and re-evaluated on the same accelerator, so that none of the attributes of the CME (e.g.
+        `mapping` or `temporal_mapping`) refer to the equivalent layer. The other CMEs in the extra_info are not
+        rebuilt.
+        """
+        assert isinstance(cme, CostModelEvaluation)
+        return type(cme)(
+            accelerator=cme.accelerator,
+            layer=layer,
+            spatial_mapping=SpatialMappingInternal(cme.spatial_mapping.mapping_dict_origin, layer),
+            spatial_mapping_int=SpatialMappingInternal(cme.spatial_mapping_int.mapping_dict_origin, layer),
+            temporal_mapping=TemporalMapping(deepcopy(cme.temporal_mapping.mapping_dic_origin), layer),
+            access_same_data_considered_as_no_access=cme.access_same_data_considered_as_no_access,
+        )
+
+
+def evaluate_layer(task: tuple[list[StageCallable], dict[str, Any]]) -> list[tuple[CostModelEvaluationABC, Any]]:
+    """! Worker function of the parallel layer mode. Runs the substages for a single layer."""
+    list_of_callables, kwargs = task
+    logger.info("Processing  %s...", kwargs["layer"].name)
+    sub_stage = list_of_callables[0](list_of_callables[1:], **kwargs)
+    return list(sub_stage.run())
@@ -0,0 +1,279 @@
+import argparse
+import csv
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from datetime import datetime
+from typing import Any, Iterator
+
+import yaml
+from onnx import ModelProto
+
+from zigzag.api import get_zigzag_stages
+from zigzag.parser.onnx.onnx_model_parser import ONNXModelParser
+from zigzag.parser.workload_factory import WorkloadFactory
+from zigzag.results_table import ResultsRow, ResultsTableWriter, get_cme_row
+from zigzag.stages.main import MainStage
+from zigzag.stages.parser.accelerator_parser import AcceleratorParserStage
+from zigzag.stages.parser.workload_parser import WorkloadParserStage
+from zigzag.utils import open_yaml
+from zigzag.workload.dnn_workload import DNNWorkload
+from zigzag.workload.onnx_workload import ONNXWorkload
+
+logger = logging.getLogger(__name__)
+
+# Value of the accelerator (yaml) data to override, per path, e.g. `{"operational_array.adc_resolution": 6}`
+AcceleratorOverrides = dict[str, Any]
+
+## Workload, accelerator data and settings shared by all variants of the sweep that runs in this process
+_sweep_context: dict[str, Any] = {}
+
+
+def apply_accelerator_overrides(accelerator_data: dict[str, Any], overrides: AcceleratorOverrides) -> dict[str, Any]:
+    """! Return a copy of the (yaml) data of an accelerator with the given overrides.
+    @param overrides Value to set for every path in the accelerator data. Paths are the dot-separated keys of the
+        nested mappings (and indices of lists), e.g. `nvm_param.ADC_share_factor`, `operational_array.sizes.0` or
+        `memories.L1_SRAM_512KB.size`. All but the last key of a path must exist.
+    """
+    accelerator_data = deepcopy(accelerator_data)
+    for path, value in overrides.items():
+        *parent_keys, last_key = path.split(".")
+        parent: Any = accelerator_data
+        for key in parent_keys:
+            try:
+                parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+            except (KeyError, IndexError, ValueError) as exc:
+                raise KeyError(f"Accelerator override {path}: {key} not found in the accelerator data.") from exc
+        if isinstance(parent, list):
+            parent[int(last_key)] = value
+        else:
+            parent[last_key] = value
+    return accelerator_data
+
+
+def get_accelerator_variants(grid: dict[str, list[Any]]) -> list[AcceleratorOverrides]:
+    """! Overrides of all accelerator variants in the cartesian product of the given values per path"""
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def init_sweep_context(context: dict[str, Any]) -> None:
+    """! Share the workload, accelerator data and settings of the sweep with the variants that run in this process"""
+    _sweep_context.clear()
+    _sweep_context.update(context)
+
+
+def evaluate_accelerator_variant(overrides: AcceleratorOverrides) -> tuple[dict[str, Any], list[ResultsRow]]:
+    """! Evaluate the workload of the sweep on a single accelerator variant and return its row of the results table,
+    and its rows of the (per layer) columnar results table if requested"""
+    accelerator_data = apply_accelerator_overrides(_sweep_context["accelerator_data"], overrides)
+    accelerator = AcceleratorParserStage.parse_accelerator_data(accelerator_data)
+    row = dict(overrides)
+    if _sweep_context["in_memory_compute"]:
+        # Clock period and area of the whole accelerator. The area of a layer CME only counts the memories of the
+        # memory hierarchy of that layer.
+        row["tclk"] = accelerator.operational_array.tclk
+        row["area_total"] = accelerator.operational_array.area + sum(
+            memory_level.memory_instance.area for memory_level in accelerator.memory_hierarchy.mem_level_list
+        )
+
+    mainstage = MainStage(
+        list_of_callables=_sweep_context["stages"],
+        accelerator=accelerator,
+        # The mapping search initializes the (user-defined) mappings of the layers, so each variant gets its own copy
+        workload=deepcopy(_sweep_context["workload"]),
+        **_sweep_context["kwargs"],
+    )
+    cmes = mainstage.run()
+
+    row["energy_total"] = cmes[0][0].energy_total
+    row["latency_total"] = cmes[0][0].latency_total2
+
+    table_rows: list[ResultsRow] = []
+    if _sweep_context["results_table"]:
+        config = {path: val if isinstance(val, (int, float, str)) else str(val) for path, val in overrides.items()}
+        table_rows = [get_cme_row(cme, **config) for cme, _ in cmes[0][1]] + [get_cme_row(cmes[0][0], **config)]
+    return row, table_rows
+
+
+def get_hardware_performance_zigzag_sweep(
+    workload: str | ModelProto,
+    accelerator: str,
+    mapping: str,
+    grid: dict[str, list[Any]],
+    *,
+    opt: str = "latency",
+    dump_folder: str = f"outputs/{datetime.now()}",
+    results_filename: str | None = None,
+    results_table_path: str | None = None,
+    lpf_limit: int = 6,
+    nb_spatial_mappings_generated: int = 3,
+    in_memory_compute: bool = False,
+    exploit_data_locality: bool = False,
+    enable_mix_spatial_mapping: bool = False,
+    deduplicate_layers: bool = False,
+    nb_variant_workers: int = 1,
+) -> dict[str, list[Any]]:
+    """! ZigZag sweep API: estimates the cost of running the given workload on all variants of the given hardware
+    architecture. The workload and mapping are parsed only once, the accelerator variants are generated in memory.
+    @param workload Either a filepath to the workload ONNX or yaml file, an ONNX model.
+    @param accelerator Filepath to the accelerator yaml file that the variants are derived from.
+    @param mapping Filepath to mapping yaml file.
+    @param grid Values to sweep per path in the accelerator data, e.g.
+        `{"operational_array.adc_resolution": [4, 6, 8], "nvm_param.nvm_array_type": ["1T1R", "2T2R_pseudo_crossbar"]}`
+        All combinations of the values are evaluated. See `apply_accelerator_overrides` for the paths.
+    @param opt Optimization criterion: either `energy`, `latency` or `EDP`.
+    @param dump_folder Folder where outputs will be saved.
+    @param results_filename Filename of the (csv) results table, with one row per variant.
+    @param results_table_path Folder of a columnar results table with one row per layer of every variant, see
+        `ResultsTable`. Not saved if None.
+    @param lpf_limit Determines the number of temporal unrollings that are evaluated.
+    @param nb_spatial_mappings_generated Max nb of spatial mappings automatically generated (if not provided in
+        mapping).
+    @param in_memory_compute Optimizes the run for IMC architectures.
+    @param exploit_data_locality Iff true, an attempt will be made to keep data in lower-level memory in between layers
+    @param enable_mix_spatial_mapping Wether `mixed` spatial mappings will be generated, i.e. unrolling multiple Layer
+        Dimensions in a single Operational Array Dimension.
+    @param deduplicate_layers Iff true, the mapping search runs only once for every set of equivalent layers.
+    @param nb_variant_workers Number of processes over which the variants are evaluated. The layers of each variant are
+        evaluated in its process, contrary to `n_workers` of `get_hardware_performance_zigzag`, which spreads the layers
+        of a single accelerator over processes.
+    @return The results table, per column: the swept values, `energy_total` and `latency_total` (and the `tclk` and
+        `area_total` of the whole accelerator for IMC architectures), with one row per variant in the order of the grid.
+    """
+    results_filename = f"{dump_folder}/sweep_results.csv" if results_filename is None else results_filename
+
+    # Parse the workload and accelerator only once
+    if isinstance(workload, ModelProto) or workload.split(".")[-1] == "onnx":
+        parsed_workload: DNNWorkload | ONNXWorkload = ONNXModelParser(workload, mapping).run()
+    else:
+        parsed_workload = WorkloadFactory(
+            WorkloadParserStage.parse_workload_data(workload), WorkloadParserStage.parse_mapping_data(mapping)
+        ).create()
+    assert accelerator.split(".")[-1] == "yaml", "Expected a yaml file as accelerator input"
+    accelerator_data = open_yaml(accelerator)
+    assert isinstance(accelerator_data, dict)
+
+    # The workload and accelerator are parsed above, the results are saved in the results tables of the sweep
+    stages, reduce_criteria = get_zigzag_stages(
+        opt=opt,
+        workload_parser_stage=None,
+        save_results=False,
+        in_memory_compute=in_memory_compute,
+        exploit_data_locality=exploit_data_locality,
+        enable_mix_spatial_mapping=enable_mix_spatial_mapping,
+        deduplicate_layers=deduplicate_layers,
+    )
+    do_mix_spatial_mapping_generation = in_memory_compute or enable_mix_spatial_mapping
+    context = {
+        "workload": parsed_workload,
+        "accelerator_data": accelerator_data,
+        "in_memory_compute": in_memory_compute,
+        "results_table": results_table_path is not None,
+        "stages": stages,
+        "kwargs": {
+            "dump_folder": dump_folder,
+            "reduce_criteria": reduce_criteria,
+            "loma_lpf_limit": lpf_limit,
+            "nb_mappings_generated": nb_spatial_mappings_generated,
+            "enable_mix_spatial_mapping_generation": do_mix_spatial_mapping_generation,
+            "deduplicate_layers": deduplicate_layers,
+            "access_same_data_considered_as_no_access": True,
+        },
+    }
+
+    variants = get_accelerator_variants(grid)
+    logger.info("Sweeping %i accelerator variants over %i process(es).", len(variants), nb_variant_workers)
+    os.makedirs(os.path.dirname(results_filename) or ".", exist_ok=True)
+    columns: dict[str, list[Any]] = {}
+    table_writer = ResultsTableWriter(results_table_path) if results_table_path is not None else None
+    with open(results_filename, "w", newline="", encoding="utf-8") as results_file:
+        writer: csv.DictWriter[str] | None = None
+        for row, table_rows in run_sweep(variants, context, nb_variant_workers):
+            # Stream the rows into the results table as they become available
+            if writer is None:
+                writer = csv.DictWriter(results_file, fieldnames=list(row))
+                writer.writeheader()
+                columns = {column: [] for column in row}
+            writer.writerow(row)
+            results_file.flush()
+            for column, value in row.items():
+                columns[column].append(value)
+            if table_writer is not None:
+                for table_row in table_rows:
+                    table_writer.add_row(table_row)
+    logger.info("Saved the sweep results to %s", results_filename)
+    if table_writer is not None:
+        table_writer.save()
+    return columns
+
+
+def run_sweep(
+    variants: list[AcceleratorOverrides], context: dict[str, Any], nb_variant_workers: int
+) -> Iterator[tuple[dict[str, Any], list[ResultsRow]]]:
+    """! Evaluate the variants, in this process or spread over a process pool, and yield their rows in order"""
+    if nb_variant_workers <= 1:
+        init_sweep_context(context)
+        yield from map(evaluate_accelerator_variant, variants)
+        return
+    with ProcessPoolExecutor(
+        max_workers=nb_variant_workers, initializer=init_sweep_context, initargs=(context,)
+    ) as executor:
+        yield from executor.map(evaluate_accelerator_variant, variants)
+
+
+def parse_grid(grid_args: list[str]) -> dict[str, list[Any]]:
+    """! Parse the `path=[value, ...]` grid arguments of the command line, with yaml values"""
+    grid: dict[str, list[Any]] = {}
+    for grid_arg in grid_args:
+        path, sep, values = grid_arg.partition("=")
+        parsed_values = yaml.safe_load(values)
+        if not sep or not isinstance(parsed_values, list):
+            raise ValueError(f"Expected a sweep argument of the form path=[value, ...], got {grid_arg}")
+        grid[path] = parsed_values
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep zigzag over variants of an accelerator")
+    parser.add_argument("--model", metavar="path", required=True, help="path to onnx or yaml workload")
+    parser.add_argument("--mapping", metavar="path", required=True, help="path to mapping file")
+    parser.add_argument("--accelerator", metavar="path", required=True, help="path to the base accelerator yaml file")
+    parser.add_argument(
+        "--grid",
+        metavar="path=[values]",
+        action="append",
+        default=[],
+        help="values to sweep for a path in the accelerator data, e.g. operational_array.adc_resolution=[4,6,8]",
+    )
+    parser.add_argument("--opt", default="latency", choices=["energy", "latency", "EDP"])
+    parser.add_argument("--dump-folder", default=f"outputs/{datetime.now()}")
+    parser.add_argument("--results", metavar="path", default=None, help="path of the csv results table")
+    parser.add_argument("--results-table", metavar="path", default=None, help="folder of the per layer results table")
+    parser.add_argument("--lpf-limit", type=int, default=6)
+    parser.add_argument("--in-memory-compute", action="store_true")
+    parser.add_argument("--nb-variant-workers", type=int, default=1, help="number of processes over the variants")
+    args = parser.parse_args()
+
+    logging_level = logging.INFO
+    logging_format = "%(asctime)s - %(funcName)s +%(lineno)s - %(levelname)s - %(message)s"
+    logging.basicConfig(level=logging_level, format=logging_format)
+
+    get_hardware_performance_zigzag_sweep(
+        args.model,
+        args.accelerator,
+        args.mapping,
+        parse_grid(args.grid),
+        opt=args.opt,
+        dump_folder=args.dump_folder,
+        results_filename=args.results,
+        results_table_path=args.results_table,
+        lpf_limit=args.lpf_limit,
+        in_memory_compute=args.in_memory_compute,
+        nb_variant_workers=args.nb_variant_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
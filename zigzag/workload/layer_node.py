@@ -245,6 +245,35 @@ class LayerNode(LayerNodeABC):
     def __str__(self):
         return self.name
 
+    def get_cost_signature(self) -> str:
+        """! Canonical string of all layer attributes that influence the cost model for a given mapping. The layer id,
+        name and input sources are not included, so that identical layers have equal signatures.
+        """
+        return repr(
+            (
+                self.type,
+                self.equation,
+                self.layer_dim_sizes,
+                self.operand_precision,
+                self.dimension_relations,
+                self.padding,
+                self.pr_layer_dim_sizes,
+                self.constant_operands,
+                self.memory_operand_links,
+            )
+        )
+
+    def get_mapping_search_signature(self) -> str:
+        """! Canonical string of all layer attributes that influence the outcome of the mapping search. Layers with
+        equal signatures yield the same search results on the same accelerator.
+        """
+        # The hints are sets: sort them to obtain the same string in every process
+        spatial_mapping_hint = {
+            oa_dim: sorted(str(layer_dim) for layer_dim in layer_dims)
+            for oa_dim, layer_dims in self.spatial_mapping_hint.data.items()
+        }
+        return repr((self.get_cost_signature(), self.spatial_mapping, spatial_mapping_hint, self.temporal_ordering))
+
     def __jsonrepr__(self):
         """! JSON representation used for saving this object to a json file."""
         return json_repr_handler(